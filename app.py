@@ -1,15 +1,119 @@
-from flask import Flask, jsonify, render_template, redirect
+from flask import Flask, Response, render_template, redirect, request
 from flask_cors import CORS
+import click
+import hashlib
+import json
 import os
 from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool, StaticPool
 import logging
 
 # Load environment variables
 load_dotenv()
 
-from backend.extensions import business_user as db, security, init_user_datastore
-from backend.models import User, Role
-from backend.routes import scan_bp, auth_bp
+from backend.extensions import business_user as db, compress, security, init_user_datastore
+from backend.json_provider import ORJSONProvider
+from backend.upload_request import UploadRequest
+
+
+# ==================== STATIC RESPONSES ====================
+# Encoded once at import time instead of on every request
+
+_API_INFO_BODY = json.dumps({
+    'message': 'Food Scanning API with Authentication',
+    'version': '1.0.0',
+    'auth_endpoints': {
+        'register': 'POST /api/auth/register',
+        'login': 'POST /api/auth/login',
+        'logout': 'POST /api/auth/logout',
+        'me': 'GET /api/auth/me'
+    },
+    'scan_endpoints': {
+        'start_session': 'POST /api/scan/start-session',
+        'scan_single': 'POST /api/scan/single',
+        'scan_batch': 'POST /api/scan/batch',
+        'get_session': 'GET /api/scan/session/<session_id>',
+        'get_recent': 'GET /api/scan/recent',
+        'storage_tips': 'POST /api/scan/storage-tips',
+        'storage_tips_stream': 'POST /api/scan/storage-tips/stream',
+        'health': 'GET /api/scan/health'
+    }
+}).encode()
+_API_INFO_ETAG = hashlib.md5(_API_INFO_BODY).hexdigest()
+_API_INFO_HEADERS = {
+    # Weak: Flask-Compress leaves it as is (it rewrites strong ETags per
+    # encoding, e.g. "<md5>:br"), so revalidation matches compressed or not
+    'ETag': f'W/"{_API_INFO_ETAG}"',
+    'Cache-Control': 'public, max-age=3600'
+}
+
+_ERROR_BODIES = {
+    status: json.dumps({'success': False, 'error': message}).encode()
+    for status, message in {
+        400: 'Bad request. Check your JSON format.',
+        404: 'Endpoint not found',
+        413: 'Request payload too large. Max size is 50MB.',
+        500: 'Internal server error'
+    }.items()
+}
+
+
+# Liveness/readiness probes hit this several times a second per pod
+_HEALTH_PATH = '/api/scan/health'
+_HEALTH_BODY = b'{"status":"healthy","service":"Produce Scan API"}'
+_HEALTH_HEADERS = [
+    ('Content-Type', 'application/json'),
+    ('Content-Length', str(len(_HEALTH_BODY)))
+]
+
+
+def _health_middleware(wsgi_app):
+    """
+    Answer GET /api/scan/health before Flask sees the request.
+
+    Skips routing, request/context setup, before/after_request hooks and
+    JSON encoding; every other request goes to wsgi_app unchanged. The
+    blueprint's health_check view still serves other methods (HEAD).
+    """
+    def wsgi(environ, start_response):
+        if environ.get('PATH_INFO') == _HEALTH_PATH and environ.get('REQUEST_METHOD') == 'GET':
+            start_response('200 OK', _HEALTH_HEADERS)
+            return [_HEALTH_BODY]
+        return wsgi_app(environ, start_response)
+    return wsgi
+
+
+def _error_response(body: bytes, status: int):
+    """Wrap a pre-encoded JSON error body in a response."""
+    return Response(body, status=status, mimetype='application/json')
+
+
+def init_database():
+    """
+    Create all tables, upgrade existing ones and seed the default roles.
+
+    Idempotent: up-to-date tables and existing roles are left untouched.
+    Must be called inside an application context.
+    """
+    # Create missing tables, then bring tables created by earlier versions
+    # up to the current models (create_all never alters existing tables)
+    from backend.schema import upgrade_schema
+    db.create_all()
+    upgrade_schema()
+
+    # Create default roles if they don't exist: one INSERT ... ON CONFLICT
+    # DO NOTHING and one commit
+    from backend.extensions import user_datastore
+    from backend.services.auth_service import AuthService
+    if user_datastore:
+        AuthService.ensure_roles([
+            ('admin', 'Administrator with full access'),
+            ('user', 'Standard user'),
+        ])
+
+    # Roles are static from here on; keep them in memory for find_role()
+    if user_datastore:
+        user_datastore.cache_roles()
 
 
 def create_app(config_name: str = 'development'):
@@ -25,6 +129,14 @@ def create_app(config_name: str = 'development'):
 
     app = Flask(__name__)
 
+    # orjson for jsonify() and request.get_json()
+    # (set as the provider class so Flask-Security's wrapper builds on it)
+    app.json_provider_class = ORJSONProvider
+    app.json = ORJSONProvider(app)
+
+    # Multipart image uploads spool to a temp file past 2MB
+    app.request_class = UploadRequest
+
     # ==================== LOGGING CONFIGURATION ====================
     if config_name == 'development':
         logging.basicConfig(
@@ -50,13 +162,72 @@ def create_app(config_name: str = 'development'):
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///produce_scan.db'
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # psycopg 3 prepares a statement server-side after N executions
+    # (default 5); the hot list queries qualify sooner at 3
+    uses_psycopg = app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql+psycopg:')
+
+    # Connection pool
+    if config_name == 'testing':
+        # In-memory SQLite lives on one connection; share it across threads
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'poolclass': StaticPool,
+            'connect_args': {'check_same_thread': False}
+        }
+    elif os.getenv('DB_NULL_POOL'):
+        # Behind pgbouncer (transaction pooling) the bouncer owns pooling;
+        # open/close per checkout instead of holding idle connections
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'poolclass': NullPool,
+            'insertmanyvalues_page_size': 1000,
+            'query_cache_size': 1200
+        }
+        if uses_psycopg:
+            # Transaction pooling can hand each statement a different
+            # server connection, so server-side prepares must stay off
+            app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {
+                'prepare_threshold': None
+            }
+    else:
+        # One pool per gunicorn worker, shared by its greenlets/threads.
+        # db.session is scoped to the request's app context (removed at
+        # teardown), so a request holds one connection from its first query
+        # to its commit/teardown, not one checkout per query.
+        # Pre-ping drops stale connections;
+        # LIFO checkout reuses the most recently returned (warm) connection
+        # and lets surplus ones sit idle long enough to be recycled
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 20)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            'pool_pre_ping': True,
+            'pool_recycle': 1800,
+            'pool_use_lifo': True,
+            # Bulk scan inserts (ProduceScan.bulk_create) are sent as
+            # multi-row INSERT ... VALUES batches of up to 1000 rows
+            'insertmanyvalues_page_size': 1000,
+            # Compiled-SQL cache (default 500): room for every variant of
+            # the scan list / session detail / auth queries
+            'query_cache_size': 1200
+        }
+        if uses_psycopg:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args'] = {
+                'prepare_threshold': 3
+            }
     app.config['JSON_SORT_KEYS'] = False
 
     # ==================== JSON & REQUEST SIZE LIMITS ====================
-    # Allow larger JSON payloads for image data (base64 encoded)
+    # Allow large uploads: multipart batches, or base64 JSON from older clients
     app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max
     app.config['JSON_MAX_SIZE'] = 50 * 1024 * 1024  # 50MB max for JSON
 
+    # ==================== RESPONSE COMPRESSION ====================
+    # Scan/session JSON shrinks 5-10x; Brotli first, gzip fallback
+    app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 5  # gzip
+    app.config['COMPRESS_BR_LEVEL'] = 5
+    app.config['COMPRESS_MIN_SIZE'] = 500
+
     # Flask-Security configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['SECURITY_PASSWORD_SALT'] = os.getenv('SECURITY_PASSWORD_SALT', 'dev-salt-change-in-production')
@@ -65,6 +236,27 @@ def create_app(config_name: str = 'development'):
     app.config['SECURITY_TOKEN_AUTHENTICATION_SCHEME'] = 'Bearer'
     app.config['SECURITY_SESSION_COOKIE_HTTPONLY'] = True
     app.config['SECURITY_SESSION_COOKIE_SAMESITE'] = 'Lax'
+    # Password hashing: Argon2 (argon2-cffi, native C) for new hashes.
+    # pbkdf2_sha512 hashes and passwords stored before hashing was enabled
+    # (plaintext) still verify and are rehashed to Argon2 on the user's
+    # next successful login (AuthService.check_password)
+    app.config['SECURITY_PASSWORD_HASH'] = 'argon2'
+    app.config['SECURITY_PASSWORD_SCHEMES'] = ['argon2', 'pbkdf2_sha512', 'plaintext']
+    app.config['SECURITY_DEPRECATED_PASSWORD_SCHEMES'] = ['pbkdf2_sha512', 'plaintext']
+    # Cost defaults follow the OWASP minimum (19 MiB, 2 passes, ~20-50 ms per
+    # hash); raise them via env on hardware where hashing is faster
+    app.config['SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS'] = {
+        'argon2__time_cost': int(os.getenv('ARGON2_TIME_COST', '2')),
+        'argon2__memory_cost': int(os.getenv('ARGON2_MEMORY_COST_KIB', '19456')),
+        'argon2__parallelism': 1,
+    }
+    if config_name == 'testing':
+        # Tests register and log in for nearly every case: a minimal-cost
+        # Argon2 keeps the hash real without dominating each test's setup
+        app.config['SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS'].update({
+            'argon2__time_cost': 1,
+            'argon2__memory_cost': 1024,
+        })
 
     # ==================== EXTENSIONS INITIALIZATION ====================
 
@@ -74,33 +266,42 @@ def create_app(config_name: str = 'development'):
     # Setup Flask-Security with user datastore
     init_user_datastore(app)
 
+    # Compress JSON/HTML responses
+    compress.init_app(app)
+
+    # app.extensions['scan_service'] (ProduceScanService) is built on first
+    # use - after fork under gunicorn --preload, see get_scan_service()
+
     # ==================== BLUEPRINTS ====================
 
+    # Imported here rather than at module top: routes pull in the services
+    # (LLM client, models), which only need loading once an app is built
+    from backend.routes import scan_bp, auth_bp
+
     # Register blueprints
     app.register_blueprint(auth_bp)  # Auth endpoints
     app.register_blueprint(scan_bp)  # Scan endpoints
 
     # ==================== DATABASE INITIALIZATION ====================
 
-    with app.app_context():
-        # Create all tables
-        db.create_all()
-
-        # Create default roles if they don't exist
-        from backend.extensions import user_datastore
-        if user_datastore and not user_datastore.find_role('admin'):
-            user_datastore.create_role(
-                name='admin',
-                description='Administrator with full access'
-            )
-
-        if user_datastore and not user_datastore.find_role('user'):
-            user_datastore.create_role(
-                name='user',
-                description='Standard user'
-            )
-
-        db.session.commit()
+    # Schema creation and role seeding run once per deploy, not on every
+    # worker boot:  flask --app wsgi init-db
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create or upgrade all tables and seed the default roles."""
+        init_database()
+        click.echo('Database initialized')
+
+    # Old-session cleanup runs out of band (cron), never on the request path:
+    #   0 * * * *  flask --app wsgi cleanup-sessions --days 7
+    @app.cli.command('cleanup-sessions')
+    @click.option('--days', default=7, show_default=True,
+                  help='Delete sessions older than this many days.')
+    def cleanup_sessions_command(days):
+        """Delete scan sessions (and their scans) older than --days."""
+        from backend.database import DatabaseService
+        DatabaseService.delete_old_sessions(days=days)
+        click.echo(f'Deleted sessions older than {days} days')
 
     # ==================== ROUTES ====================
 
@@ -118,60 +319,41 @@ def create_app(config_name: str = 'development'):
         return render_template('dashboard.html')
 
     # API info endpoint
+    # Body is static: serve the pre-encoded bytes and let clients revalidate
     @app.route('/api', methods=['GET'])
     def api_info():
-        return {
-            'message': 'Food Scanning API with Authentication',
-            'version': '1.0.0',
-            'auth_endpoints': {
-                'register': 'POST /api/auth/register',
-                'login': 'POST /api/auth/login',
-                'logout': 'POST /api/auth/logout',
-                'me': 'GET /api/auth/me'
-            },
-            'scan_endpoints': {
-                'start_session': 'POST /api/scan/start-session',
-                'scan_single': 'POST /api/scan/single',
-                'scan_batch': 'POST /api/scan/batch',
-                'get_session': 'GET /api/scan/session/<session_id>',
-                'get_recent': 'GET /api/scan/recent',
-                'storage_tips': 'POST /api/scan/storage-tips',
-                'health': 'GET /api/scan/health'
-            }
-        }, 200
+        if request.if_none_match.contains_weak(_API_INFO_ETAG):
+            return Response(status=304, headers=_API_INFO_HEADERS)
+        return Response(_API_INFO_BODY, status=200, mimetype='application/json',
+                        headers=_API_INFO_HEADERS)
 
     # Error handlers
     @app.errorhandler(404)
     def not_found(error):
-        return jsonify({
-            'success': False,
-            'error': 'Endpoint not found'
-        }), 404
+        return _error_response(_ERROR_BODIES[404], 404)
 
     @app.errorhandler(413)
     def request_entity_too_large(error):
-        return jsonify({
-            'success': False,
-            'error': 'Request payload too large. Max size is 50MB.'
-        }), 413
+        return _error_response(_ERROR_BODIES[413], 413)
 
     @app.errorhandler(400)
     def bad_request(error):
-        return jsonify({
-            'success': False,
-            'error': 'Bad request. Check your JSON format.'
-        }), 400
+        return _error_response(_ERROR_BODIES[400], 400)
 
     @app.errorhandler(500)
     def internal_error(error):
-        return jsonify({
-            'success': False,
-            'error': 'Internal server error'
-        }), 500
+        return _error_response(_ERROR_BODIES[500], 500)
+
+    # Health probes are answered by a WSGI shortcut, ahead of Flask
+    app.wsgi_app = _health_middleware(app.wsgi_app)
 
     return app
 
 
 if __name__ == '__main__':
+    # Development server only - production is served by gunicorn:
+    #   gunicorn -c gunicorn.conf.py wsgi:app
     app = create_app('development')
+    with app.app_context():
+        init_database()
     app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -10,12 +10,227 @@ Error handling: catches SQLAlchemyError and re-raises as Exception with context.
 Database Models:
 - ProduceScan: Individual produce scan records
 - ScanSession: Session grouping multiple scans
+- StorageTip: Stored AI storage recommendations per produce name
 """
 
+import threading
+from contextlib import contextmanager
+from cachetools import TTLCache
+from flask import current_app
 from backend.extensions import business_user as db
-from backend.models import ProduceScan, ScanSession
-from sqlalchemy.exc import SQLAlchemyError
-from uuid import uuid4
+from backend.models import (
+    NOTES_MAX_LENGTH, Produce, ProduceScan, ScanSession, ScanSessionStats,
+    StorageTip, generate_scan_id, generate_session_id
+)
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+
+# ==================== READ-ONLY SCAN QUERIES ====================
+# List endpoints only serialize scans, so they select plain columns
+# instead of hydrating ProduceScan objects (no identity map, no
+# instrumentation). Column order matches ProduceScan.to_dict().
+
+_SCAN_COLUMNS = (
+    ProduceScan.id,
+    ProduceScan.scan_id,
+    ProduceScan.session_id,
+    ProduceScan.user_id,
+    Produce.name.label('produce_name'),
+    ProduceScan.shelf_life_days,
+    ProduceScan.is_expiring_soon.label('is_expiring_soon'),  # Computed in SQL
+    ProduceScan.is_expired.label('is_expired'),
+    ProduceScan.scanned_at,
+    ProduceScan.notes,
+)
+
+
+# Newest first. scanned_at comes from the database clock, which is only
+# second-resolution on SQLite, so id breaks ties between same-second scans
+_NEWEST_FIRST = (ProduceScan.scanned_at.desc(), ProduceScan.id.desc())
+
+
+def _select_scan_dicts(*criteria, order_by=(), limit=None):
+    """
+    Run a column-only SELECT over produce_scans and return to_dict()-style dicts.
+
+    Args:
+        *criteria: WHERE clauses
+        order_by: ORDER BY clauses (tuple, may be empty)
+        limit: Optional row limit
+
+    Returns:
+        list[dict]: One dict per scan (scanned_at stays a datetime)
+    """
+    stmt = select(*_SCAN_COLUMNS).join(
+        Produce, Produce.id == ProduceScan.produce_id
+    ).where(*criteria)
+    if order_by:
+        stmt = stmt.order_by(*order_by)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    return [dict(row) for row in db.session.execute(stmt).mappings()]
+
+
+def _write_session_stats(session_id, **values):
+    """
+    UPDATE a session's stats row, inserting it for sessions that predate
+    the stats table. Does not commit.
+
+    Returns:
+        bool: False if the session itself doesn't exist
+    """
+    result = db.session.execute(
+        update(ScanSessionStats)
+        .where(ScanSessionStats.session_id == session_id)
+        .values(**values)
+    )
+    if result.rowcount:
+        return True
+
+    session_exists = db.session.scalar(
+        select(ScanSession.id).where(ScanSession.session_id == session_id)
+    )
+    if session_exists is None:
+        return False
+
+    db.session.execute(
+        insert(ScanSessionStats).values(session_id=session_id, **values)
+    )
+    return True
+
+
+def _refresh_session_stats(session_id):
+    """
+    Recompute one session's stats row from its scans. Does not commit.
+
+    Returns:
+        bool: False if the session doesn't exist
+    """
+    # Fast path: one UPDATE ... FROM (grouped counts)
+    if ScanSessionStats.refresh_counts([session_id]):
+        return True
+
+    # No scans yet, no stats row yet, or no such session: fall back
+    # to the correlated-subquery form, which handles all three
+    def session_aggregate(expression):
+        # Correlated scalar subquery over this session's scans
+        return select(expression).where(
+            ProduceScan.session_id == session_id
+        ).scalar_subquery()
+
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    return _write_session_stats(
+        session_id,
+        total_scanned=session_aggregate(func.count(ProduceScan.id)),
+        expiring_soon_count=session_aggregate(count_where(ProduceScan.is_expiring_soon)),
+        expired_count=session_aggregate(count_where(ProduceScan.is_expired))
+    )
+
+
+def _clip_notes(notes):
+    """Truncate AI notes to fit ProduceScan.notes (VARCHAR(NOTES_MAX_LENGTH))."""
+    if notes and len(notes) > NOTES_MAX_LENGTH:
+        return notes[:NOTES_MAX_LENGTH - 3] + '...'
+    return notes
+
+
+def _scan_rows(produce_list):
+    """
+    Normalize scan dicts for ProduceScan.bulk_create().
+
+    Optional fields are filled so every row binds the same columns. Missing
+    scan IDs are generated here, up front, rather than by the column
+    default once per row during parameter binding.
+    """
+    return [
+        {
+            'scan_id': produce_data.get('scan_id') or generate_scan_id(),
+            'session_id': produce_data.get('session_id'),
+            'user_id': produce_data.get('user_id'),
+            'produce_name': produce_data['produce_name'],
+            'shelf_life_days': produce_data['shelf_life_days'],
+            'notes': _clip_notes(produce_data.get('notes'))
+        }
+        for produce_data in produce_list
+    ]
+
+
+@contextmanager
+def _pipeline():
+    """
+    Run the enclosed statements in psycopg 3 pipeline mode.
+
+    Statements are sent without waiting for each result, so a write
+    sequence costs about one network round-trip. A no-op on other drivers.
+    """
+    connection = db.session.connection()
+    if connection.dialect.driver != 'psycopg':
+        yield
+        return
+
+    with connection.connection.driver_connection.pipeline():
+        yield
+
+
+# Retries for create_scan_session() when a random session ID collides
+SESSION_ID_ATTEMPTS = 5
+
+# ==================== RECENT SCANS CACHE ====================
+# Dashboard polling re-runs the same "ORDER BY scanned_at DESC LIMIT n"
+# query every few seconds. Serialized results are kept briefly, per app,
+# keyed by (user_id, limit). A scan write drops only its owners' lists and
+# the all-users (None) lists, so one user's scans don't evict everyone.
+
+RECENT_SCANS_CACHE_TTL = 10  # seconds
+_recent_scans_lock = threading.Lock()
+
+
+def _recent_scans_cache():
+    """Return the current app's recent-scans cache, creating it on first use."""
+    cache = current_app.extensions.get('recent_scans_cache')
+    if cache is None:
+        with _recent_scans_lock:
+            cache = current_app.extensions.setdefault(
+                'recent_scans_cache',
+                TTLCache(maxsize=1024, ttl=RECENT_SCANS_CACHE_TTL)
+            )
+    return cache
+
+
+def _cached_recent_scans(key, load):
+    """Return cached scans for key, calling load() on a miss."""
+    cache = _recent_scans_cache()
+    with _recent_scans_lock:
+        scans = cache.get(key)
+
+    if scans is None:
+        scans = load()
+        with _recent_scans_lock:
+            cache[key] = scans
+
+    return scans
+
+
+def _invalidate_recent_scans(user_ids=None):
+    """
+    Drop cached recent-scan lists after scan writes.
+
+    Args:
+        user_ids: Owners of the written scans; their lists and the
+                  all-users lists are dropped. None drops everything.
+    """
+    cache = _recent_scans_cache()
+    with _recent_scans_lock:
+        if user_ids is None:
+            cache.clear()
+            return
+        stale = set(user_ids) | {None}
+        for key in [key for key in cache if key[0] in stale]:
+            cache.pop(key, None)
 
 
 class DatabaseService:
@@ -29,6 +244,25 @@ class DatabaseService:
     - Easier to unit test
     """
 
+    @staticmethod
+    def release_connection():
+        """
+        End the request's read transaction and return its connection to the pool.
+
+        Called before long non-database waits (AI calls). The login check
+        has already opened a transaction to load current_user; without this
+        the pooled connection would stay checked out for the whole AI
+        round-trip. commit() rather than close(): objects stay attached to
+        the session (current_user included) and, with expire_on_commit=False,
+        keep their loaded values - a rollback would expire them and close
+        would detach them. The next query checks out a connection again.
+
+        Example:
+            db_service.release_connection()
+            analysis = ai_service.analyze_produce_from_image(image)
+        """
+        db.session.commit()
+
     @staticmethod
     def create_scan_session(user_id: int = None):
         """
@@ -41,8 +275,10 @@ class DatabaseService:
         - Created timestamp
         - Aggregate counts: total scans, expiring soon, expired
 
-        The session ID is NOT a UUID - it's first 8 characters of UUID
-        for shorter, more user-friendly IDs in URLs/sharing.
+        The session ID is NOT a UUID - it's 8 random hex characters
+        (generate_session_id) for shorter, more user-friendly IDs in URLs/sharing.
+        With only 2^32 possible IDs, a collision on the UNIQUE constraint
+        is retried with a fresh ID.
 
         Args:
             user_id: Optional user ID to associate session with
@@ -60,18 +296,29 @@ class DatabaseService:
             # VALUES ('a1b2c3d4', 5, now())
         """
         try:
-            # Generate 8-character session ID from UUID
-            # Full UUID is 36 chars; truncated to 8 for URLs/UX
-            session_id = str(uuid4())[:8]
-
-            # Create session record
-            session = ScanSession(session_id=session_id, user_id=user_id)
-
-            # Add to session and flush to database
-            db.session.add(session)
-            db.session.commit()
-
-            return session_id
+            for attempt in range(SESSION_ID_ATTEMPTS):
+                # 4 random bytes -> 8 hex chars, straight from the OS RNG
+                session_id = generate_session_id()
+
+                # Create session record (its stats row is inserted alongside)
+                session = ScanSession(
+                    session_id=session_id,
+                    user_id=user_id,
+                    stats=ScanSessionStats()
+                )
+
+                # Add to session and flush to database
+                db.session.add(session)
+                try:
+                    db.session.commit()
+                except IntegrityError:
+                    # session_id already taken - roll back and draw again
+                    db.session.rollback()
+                    if attempt == SESSION_ID_ATTEMPTS - 1:
+                        raise
+                    continue
+
+                return session_id
 
         except SQLAlchemyError as e:
             # Rollback on error to avoid transaction limbo
@@ -87,14 +334,14 @@ class DatabaseService:
 
         Args:
             produce_data: Dictionary with required fields:
-                'scan_id': str (unique ID for this scan)
+                'scan_id': str (optional, generated by the column default)
                 'session_id': str (which session this scan belongs to)
                 'user_id': int (optional, which user scanned this)
                 'produce_name': str (what was scanned)
                 'shelf_life_days': int (AI estimate)
-                'is_expiring_soon': bool (derived from shelf_life_days)
-                'is_expired': bool (derived from shelf_life_days)
-                'notes': str (optional, AI assessment)
+                'is_expiring_soon' / 'is_expired': ignored - derived
+                    from shelf_life_days by ProduceScan
+                'notes': str (optional, AI assessment; truncated to NOTES_MAX_LENGTH)
 
         Returns:
             ProduceScan: The saved ORM object (with auto-generated ID)
@@ -117,22 +364,23 @@ class DatabaseService:
             print(scan.id)  # Auto-incremented ID: 42
         """
         try:
+            produce_name = produce_data['produce_name']
+
             # Create ORM object from provided data
             # Uses .get() for optional fields with defaults
             scan = ProduceScan(
-                scan_id=produce_data['scan_id'],
+                scan_id=produce_data.get('scan_id'),  # None -> column default
                 session_id=produce_data.get('session_id'),
                 user_id=produce_data.get('user_id'),
-                produce_name=produce_data['produce_name'],
+                produce_id=Produce.ids_for([produce_name])[produce_name],
                 shelf_life_days=produce_data['shelf_life_days'],
-                is_expiring_soon=produce_data.get('is_expiring_soon', False),
-                is_expired=produce_data.get('is_expired', False),
-                notes=produce_data.get('notes', None)
+                notes=_clip_notes(produce_data.get('notes'))
             )
 
             # Persist to database
             db.session.add(scan)
             db.session.commit()
+            _invalidate_recent_scans([scan.user_id])
 
             return scan
 
@@ -140,6 +388,92 @@ class DatabaseService:
             db.session.rollback()
             raise Exception(f"Database error saving scan: {str(e)}")
 
+    @staticmethod
+    def save_produce_scans(produce_list: list):
+        """
+        Save many produce scan records in a single transaction.
+
+        Batch counterpart of save_produce_scan(): one multi-row INSERT and
+        one COMMIT for the whole list instead of one round-trip per scan.
+
+        Args:
+            produce_list: List of dictionaries, each with the same fields
+                          accepted by save_produce_scan()
+
+        Returns:
+            list[ProduceScan]: The saved ORM objects, in input order
+                               (with auto-generated IDs)
+
+        Raises:
+            Exception: If database insert fails
+
+        Example:
+            scans = db_service.save_produce_scans([apple_data, banana_data])
+            # INSERT INTO produce_scans (...) VALUES (...), (...) RETURNING ...
+            # (via ProduceScan.bulk_create)
+        """
+        if not produce_list:
+            return []
+
+        try:
+            # Bulk INSERT ... RETURNING: one statement per batch, ORM objects back
+            scans = ProduceScan.bulk_create(_scan_rows(produce_list))
+            db.session.commit()
+            _invalidate_recent_scans({row.get('user_id') for row in produce_list})
+
+            return scans
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Database error saving scans: {str(e)}")
+
+    @staticmethod
+    def save_scan_batch(produce_list: list, session_id: str):
+        """
+        Save a batch of scans and refresh their session's counts atomically.
+
+        The bulk INSERT and the stats UPDATE share one transaction (one
+        COMMIT). On psycopg 3 they are also pipelined, so the whole write
+        costs about one round-trip to the server.
+
+        Args:
+            produce_list: Scan dicts, as for save_produce_scans()
+            session_id: Session whose counts are refreshed afterwards
+
+        Returns:
+            list[ProduceScan]: The saved ORM objects, in input order
+
+        Raises:
+            Exception: If the session doesn't exist or the write fails
+                       (nothing is saved in either case)
+
+        Example:
+            scans = db_service.save_scan_batch([apple_data, banana_data], 'abc123')
+            # INSERT ... RETURNING; UPDATE scan_session_stats ...; COMMIT
+        """
+        try:
+            with _pipeline():
+                scans = ProduceScan.bulk_create(_scan_rows(produce_list)) if produce_list else []
+                found = _refresh_session_stats(session_id)
+                if not found:
+                    db.session.rollback()
+                    raise Exception(f"Session {session_id} not found")
+                db.session.commit()
+
+            _invalidate_recent_scans({row.get('user_id') for row in produce_list})
+            return scans
+
+        except IntegrityError as e:
+            db.session.rollback()
+            # The session_id foreign key rejects scans for an unknown session
+            if DatabaseService.get_scan_session(session_id) is None:
+                raise Exception(f"Session {session_id} not found")
+            raise Exception(f"Database error saving scan batch: {str(e)}")
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Database error saving scan batch: {str(e)}")
+
     @staticmethod
     def update_scan_session(session_id: str, total_scanned: int,
                             expiring_soon_count: int, expired_count: int):
@@ -156,7 +490,7 @@ class DatabaseService:
             expired_count: How many scans are already expired
 
         Returns:
-            ScanSession: Updated session object
+            bool: True if the session was updated
 
         Raises:
             Exception: If session not found or update fails
@@ -168,29 +502,69 @@ class DatabaseService:
                 expiring_soon_count=3,
                 expired_count=1
             )
-            # UPDATE scan_sessions SET total_scanned=10,
+            # UPDATE scan_session_stats SET total_scanned=10,
             # expiring_soon_count=3, expired_count=1 WHERE session_id='abc123'
         """
         try:
-            # Find the session
-            session = ScanSession.query.filter_by(session_id=session_id).first()
-
-            if session:
-                # Update aggregate fields
-                session.total_scanned = total_scanned
-                session.expiring_soon_count = expiring_soon_count
-                session.expired_count = expired_count
+            # Single UPDATE of the narrow stats row - no SELECT round-trip
+            found = _write_session_stats(
+                session_id,
+                total_scanned=total_scanned,
+                expiring_soon_count=expiring_soon_count,
+                expired_count=expired_count
+            )
+            db.session.commit()
 
-                # Commit changes
-                db.session.commit()
-                return session
-            else:
+            if not found:
                 raise Exception(f"Session {session_id} not found")
 
+            return True
+
         except SQLAlchemyError as e:
             db.session.rollback()
             raise Exception(f"Database error updating session: {str(e)}")
 
+    @staticmethod
+    def refresh_scan_session_counts(session_id: str):
+        """
+        Recompute a session's aggregate counts from its stored scans.
+
+        Normally one UPDATE ... FROM a grouped aggregate
+        (ScanSessionStats.refresh_counts); sessions that have no scans or no
+        stats row yet fall back to an UPDATE/INSERT with correlated COUNT/SUM
+        subqueries. No scan rows are loaded into Python either way. Unlike
+        update_scan_session(), the totals cover every scan in the session,
+        not just the most recent batch.
+
+        Args:
+            session_id: Which session to refresh
+
+        Returns:
+            bool: True if the session was updated
+
+        Raises:
+            Exception: If session not found or update fails
+
+        Example:
+            db_service.refresh_scan_session_counts('abc123')
+            # UPDATE scan_session_stats SET total_scanned=c.total, ...
+            # FROM (SELECT session_id, count(*) AS total, ...
+            #       FROM produce_scans ... GROUP BY session_id) AS c
+            # WHERE scan_session_stats.session_id = c.session_id
+        """
+        try:
+            found = _refresh_session_stats(session_id)
+            db.session.commit()
+
+            if not found:
+                raise Exception(f"Session {session_id} not found")
+
+            return True
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Database error refreshing session counts: {str(e)}")
+
     @staticmethod
     def get_scan_session(session_id: str):
         """
@@ -214,8 +588,11 @@ class DatabaseService:
                 print(session.user_id)  # 5
         """
         try:
-            session = ScanSession.query.filter_by(session_id=session_id).first()
-            return session
+            # session_id is UNIQUE: scalar() fetches the single row without
+            # the legacy Query pipeline (the compiled SELECT is cached)
+            return db.session.scalar(
+                select(ScanSession).where(ScanSession.session_id == session_id)
+            )
         except SQLAlchemyError as e:
             raise Exception(f"Database error fetching session: {str(e)}")
 
@@ -224,13 +601,14 @@ class DatabaseService:
         """
         Retrieve all scans belonging to a session.
 
-        Used when displaying session results.
+        Used when displaying session results. Oldest first; a column-only
+        SELECT walking ix_scans_session_scanned, no ORM objects built.
 
         Args:
             session_id: The session ID to fetch scans for
 
         Returns:
-            list[ProduceScan]: List of scan records (empty list if no scans)
+            list[dict]: Scans in ProduceScan.to_dict() form (empty list if no scans)
 
         Raises:
             Exception: If database query fails
@@ -238,13 +616,13 @@ class DatabaseService:
         Example:
             scans = db_service.get_session_scans('abc123')
             for scan in scans:
-                print(f"{scan.produce_name}: {scan.shelf_life_days} days")
+                print(f"{scan['produce_name']}: {scan['shelf_life_days']} days")
         """
         try:
-            scans = ProduceScan.query.filter_by(
-                session_id=session_id
-            ).all()
-            return scans
+            return _select_scan_dicts(
+                ProduceScan.session_id == session_id,
+                order_by=(ProduceScan.scanned_at, ProduceScan.id)
+            )
         except SQLAlchemyError as e:
             raise Exception(f"Database error fetching scans: {str(e)}")
 
@@ -260,8 +638,12 @@ class DatabaseService:
             user_id: User to fetch scans for
             limit: Maximum number of scans to return (default 50)
 
+        Results are cached for RECENT_SCANS_CACHE_TTL seconds per
+        (user_id, limit) and invalidated when scans are saved.
+
         Returns:
-            list[ProduceScan]: User's recent scans, newest first
+            list[dict]: User's recent scans (ProduceScan.to_dict() form),
+                        newest first. Shared with the cache - don't mutate.
 
         Raises:
             Exception: If database query fails
@@ -271,13 +653,15 @@ class DatabaseService:
             # SELECT * FROM produce_scans WHERE user_id=5
             # ORDER BY scanned_at DESC LIMIT 10
         """
+        def load():
+            return _select_scan_dicts(
+                ProduceScan.user_id == user_id,
+                order_by=_NEWEST_FIRST,
+                limit=limit
+            )
+
         try:
-            scans = ProduceScan.query.filter_by(
-                user_id=user_id
-            ).order_by(
-                ProduceScan.scanned_at.desc()  # Newest first
-            ).limit(limit).all()
-            return scans
+            return _cached_recent_scans((user_id, limit), load)
         except SQLAlchemyError as e:
             raise Exception(f"Database error fetching user scans: {str(e)}")
 
@@ -291,8 +675,11 @@ class DatabaseService:
         Args:
             limit: Maximum number of scans to return
 
+        Cached like get_user_recent_scans() under the key (None, limit).
+
         Returns:
-            list[ProduceScan]: Most recent scans, ordered newest first
+            list[dict]: Most recent scans (ProduceScan.to_dict() form),
+                        ordered newest first. Shared with the cache.
 
         Raises:
             Exception: If database query fails
@@ -302,22 +689,55 @@ class DatabaseService:
             # SELECT * FROM produce_scans
             # ORDER BY scanned_at DESC LIMIT 20
         """
+        def load():
+            return _select_scan_dicts(
+                order_by=_NEWEST_FIRST,
+                limit=limit
+            )
+
         try:
-            scans = ProduceScan.query.order_by(
-                ProduceScan.scanned_at.desc()  # Newest first
-            ).limit(limit).all()
-            return scans
+            return _cached_recent_scans((None, limit), load)
         except SQLAlchemyError as e:
             raise Exception(f"Database error fetching recent scans: {str(e)}")
 
+    @staticmethod
+    def stream_user_scans(user_id: int):
+        """
+        Stream all of a user's scans, oldest first, without loading them at once.
+
+        Rows are fetched in batches (ProduceScan.stream_for_user) and
+        yielded one by one, so an export of any size keeps memory flat.
+        Not cached - the full history is only read by exports.
+
+        Args:
+            user_id: The user whose scans to stream
+
+        Yields:
+            dict: id, scan_id, produce_name, shelf_life_days, scanned_at
+
+        Raises:
+            Exception: If database query fails (while iterating)
+
+        Example:
+            for scan in db_service.stream_user_scans(user_id=5):
+                writer.writerow(scan)
+        """
+        try:
+            for row in ProduceScan.stream_for_user(user_id):
+                yield dict(row)
+        except SQLAlchemyError as e:
+            raise Exception(f"Database error streaming user scans: {str(e)}")
+
     @staticmethod
     def delete_old_sessions(days: int = 7):
         """
         Delete scan sessions older than specified number of days.
 
         Used for data cleanup/privacy - removes old anonymous sessions.
-        Cascade delete removes all scans in those sessions (due to
-        ORM cascade='all, delete-orphan' configuration).
+        Runs as one bulk DELETE on scan_sessions with
+        synchronize_session=False, so no rows are loaded and the identity
+        map isn't scanned. Scans and stats rows go with it through the
+        ON DELETE CASCADE foreign keys.
 
         Args:
             days: Delete sessions older than this many days (default 7)
@@ -333,20 +753,93 @@ class DatabaseService:
             # DELETE FROM scan_sessions WHERE created_at < (now() - 30 days)
             # Cascades to DELETE matching records from produce_scans
         """
-        from datetime import datetime, timedelta
+        from datetime import datetime, timedelta, timezone
         try:
             # Calculate cutoff date
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
 
-            # Delete sessions older than cutoff
-            # Cascade rules handle deleting associated scans
-            ScanSession.query.filter(
-                ScanSession.created_at < cutoff_date
-            ).delete()
+            # The database cascades to produce_scans and scan_session_stats
+            db.session.execute(
+                delete(ScanSession).where(
+                    ScanSession.created_at < cutoff_date
+                ).execution_options(synchronize_session=False)
+            )
 
             db.session.commit()
+            _invalidate_recent_scans()
             return True
 
         except SQLAlchemyError as e:
             db.session.rollback()
-            raise Exception(f"Database error deleting old sessions: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Database error deleting old sessions: {str(e)}")
+
+    # ==================== STORAGE TIPS ====================
+
+    @staticmethod
+    def get_storage_tip(produce_name: str, max_age_days: int = 30):
+        """
+        Return stored storage recommendations for a produce name.
+
+        Args:
+            produce_name: Normalized produce name (stripped, lowercase)
+            max_age_days: Rows older than this count as missing
+
+        Returns:
+            str: The stored recommendations, or None if absent or too old
+
+        Raises:
+            Exception: If database query fails
+
+        Example:
+            tips = db_service.get_storage_tip('banana')
+            # SELECT recommendations FROM storage_tips
+            # WHERE produce_name = 'banana' AND created_at >= (now() - 30 days)
+        """
+        from datetime import datetime, timedelta, timezone
+        try:
+            cutoff_date = datetime.now(timezone.utc) - timedelta(days=max_age_days)
+            return db.session.scalar(
+                select(StorageTip.recommendations).where(
+                    StorageTip.produce_name == produce_name,
+                    StorageTip.created_at >= cutoff_date
+                )
+            )
+
+        except SQLAlchemyError as e:
+            raise Exception(f"Database error retrieving storage tip: {str(e)}")
+
+    @staticmethod
+    def save_storage_tip(produce_name: str, recommendations: str):
+        """
+        Store (or replace) the recommendations for a produce name.
+
+        A concurrent insert of the same name by another worker wins; its
+        answer is as good as this one.
+
+        Args:
+            produce_name: Normalized produce name (stripped, lowercase)
+            recommendations: The AI answer
+
+        Raises:
+            Exception: If database commit fails (wraps SQLAlchemyError)
+
+        Example:
+            db_service.save_storage_tip('banana', 'Store at room temperature...')
+        """
+        from datetime import datetime, timezone
+        try:
+            # merge: SELECT by primary key, then INSERT or UPDATE (a stale
+            # row is refreshed with a new created_at)
+            db.session.merge(StorageTip(
+                produce_name=produce_name,
+                recommendations=recommendations,
+                created_at=datetime.now(timezone.utc)
+            ))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            raise Exception(f"Database error saving storage tip: {str(e)}")
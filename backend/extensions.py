@@ -15,15 +15,134 @@ Initialization Flow:
 5. Routes import extensions and use initialized instances
 """
 
+import sqlite3
+from flask_compress import Compress
 from flask_sqlalchemy import SQLAlchemy
 from flask_security import Security, SQLAlchemyUserDatastore
+from sqlalchemy import event, func, select
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 
 # Create SQLAlchemy instance (not yet bound to an app)
-business_user = SQLAlchemy()
+# expire_on_commit=False: objects returned from a write (e.g. a freshly saved
+# scan) keep their loaded attributes after commit, so serializing them
+# doesn't trigger a second SELECT. Flask-SQLAlchemy takes session options
+# here, not from app.config.
+business_user = SQLAlchemy(session_options={'expire_on_commit': False})
+
+
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection for concurrent reads during scan writes.
+
+    - WAL: readers are no longer blocked by the writer
+    - synchronous=NORMAL: fsync at checkpoints only (safe with WAL)
+    - 64MB page cache, in-memory temp tables, 256MB mmap
+    - foreign_keys=ON: SQLite ignores ON DELETE CASCADE without it
+
+    Other databases (DATABASE_URL pointing at Postgres/MySQL) are skipped.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 # Create Flask-Security instance (not yet initialized)
 security = Security()
 
+# Create response compression instance (not yet initialized)
+compress = Compress()
+
+
+
+class CachedRoleUserDatastore(SQLAlchemyUserDatastore):
+    """
+    SQLAlchemyUserDatastore that keeps the (tiny, static) roles table in memory.
+
+    Only 'admin' and 'user' exist, so every find_role() SELECT is redundant
+    after the first. Cached roles are kept detached and merged into the
+    current session with load=False, which attaches them without a query.
+    Users are loaded with their roles JOINed into the same SELECT, so the
+    per-request current_user lookup (and /me's role list) is one query.
+    Users themselves are not cached: every request re-reads the active
+    flag and roles, so a change made by any worker applies at once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._role_cache = {}
+
+    def _copy(self, model, obj):
+        """Return a detached copy of obj's column values."""
+        copy = model(**{
+            attr.key: getattr(obj, attr.key)
+            for attr in sa_inspect(model).column_attrs
+        })
+        make_transient_to_detached(copy)
+        return copy
+
+    def _remember(self, role):
+        """Cache a detached copy of role (the original stays in its session)."""
+        self._role_cache[role.name] = self._copy(self.role_model, role)
+
+    def clear_caches(self):
+        """Forget cached roles (e.g. when the datastore is bound to a new app)."""
+        self._role_cache = {}
+
+    def remember_role(self, role):
+        """Cache a newly committed role, so find_role() never SELECTs it."""
+        self._remember(role)
+
+    def cache_roles(self):
+        """Load all roles into the cache (call after roles are seeded)."""
+        self._role_cache = {}
+        for role in self.db.session.scalars(select(self.role_model)):
+            self._remember(role)
+
+    def find_role(self, role):
+        cached = self._role_cache.get(role)
+        if cached is not None:
+            return self.db.session.merge(cached, load=False)
+
+        found = super().find_role(role)
+        if found is not None:
+            self._remember(found)
+        return found
+
+    def find_user(self, case_insensitive=False, **kwargs):
+        attr, value = kwargs.popitem()  # only a single query attribute accepted
+
+        if attr == 'id':
+            # Primary key: identity map first, SELECT only on a miss.
+            # Roles are JOINed into that SELECT - the current_user loader
+            # runs this on every request, so one round-trip, not two
+            return self.db.session.get(
+                self.user_model, value,
+                options=[joinedload(self.user_model.roles)]
+            )
+
+        column = getattr(self.user_model, attr)
+
+        if case_insensitive:
+            condition = func.lower(column) == func.lower(value)
+        else:
+            condition = column == value
+
+        stmt = select(self.user_model).where(condition).options(
+            joinedload(self.user_model.roles)
+        )
+        return self.db.session.scalars(stmt).unique().first()
+
+
 # Global reference to user datastore
 # Will be set during app initialization (see init_user_datastore function below)
 user_datastore = None
@@ -34,7 +153,8 @@ def init_user_datastore(app):
     Initialize Flask-Security's user datastore after models are defined.
 
     This function must be called AFTER models are imported and defined,
-    but before routes are created. The order matters because:
+    but before routes are created. Safe to call once per app: the datastore
+    is created on the first call and reused afterwards. The order matters because:
 
     1. Models need SQLAlchemy instance (imported from extensions)
     2. User datastore needs User and Role models
@@ -44,7 +164,7 @@ def init_user_datastore(app):
         app: Flask application instance
 
     Returns:
-        SQLAlchemyUserDatastore: The initialized user datastore
+        CachedRoleUserDatastore: The initialized user datastore
 
     Example in app.py:
         from backend.extensions import business_user as db, security, init_user_datastore
@@ -63,10 +183,15 @@ def init_user_datastore(app):
     # (avoids circular imports - models import extensions)
     from backend.models import User, Role
 
-    # Create user datastore
+    # Create user datastore once; repeated app factory calls (tests) reuse it
     # SQLAlchemyUserDatastore is Flask-Security's interface to the database
     # It knows how to create users, find users, add roles, etc.
-    user_datastore = SQLAlchemyUserDatastore(business_user, User, Role)
+    # (subclass caches roles - see CachedRoleUserDatastore)
+    if user_datastore is None:
+        user_datastore = CachedRoleUserDatastore(business_user, User, Role)
+    else:
+        # Cached roles belong to the previous app's database
+        user_datastore.clear_caches()
 
     # Initialize Flask-Security with the app and datastore
     # This sets up:
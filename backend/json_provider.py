@@ -0,0 +1,65 @@
+"""
+ORJSONProvider: Flask JSON provider backed by orjson
+
+Replaces Flask's stdlib-json provider so that jsonify(), returning dicts
+from views, and request.get_json() all go through orjson (C extension).
+
+Why:
+- Scan responses carry lists of scan dicts; request bodies carry
+  multi-megabyte base64 image strings
+- orjson encodes/decodes these several times faster than stdlib json
+  and writes straight to bytes (no intermediate str for responses)
+- datetimes (scanned_at, created_at, last_login_at) are encoded natively,
+  no isoformat() calls in the serializers
+
+Installed in app.py before Flask-Security (which subclasses the provider):
+    app.json_provider_class = ORJSONProvider
+    app.json = ORJSONProvider(app)
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+# Dict keys may be ints (e.g. id -> value maps). Timestamp columns are
+# DateTime(timezone=True): PostgreSQL returns aware values, written with
+# their offset. SQLite has no time zones and returns naive values; those are
+# UTC (CURRENT_TIMESTAMP, datetime.now(timezone.utc)), so they get an
+# explicit +00:00 - browsers would otherwise read them as local time.
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider using orjson for dumps/loads and response bodies.
+
+    Types orjson can't encode natively (Decimal, objects with __html__)
+    fall back to Flask's DefaultJSONProvider.default.
+    """
+
+    option = ORJSON_OPTIONS
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string (stdlib kwargs are ignored)."""
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON str or bytes."""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """
+        Build a JSON response from the encoded bytes.
+
+        Same argument handling as Flask's jsonify(); pretty-prints when
+        compact is False or the app is in debug mode.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=option),
+            mimetype=self.mimetype
+        )
@@ -5,27 +5,80 @@ Three main models:
 1. Role: Authorization roles for users (admin, user, etc.)
 2. User: User accounts with authentication
 3. ProduceScan: Individual scan records
+   (Produce: lookup table of produce names)
 4. ScanSession: Session grouping multiple scans
+5. ScanSessionStats: Aggregate counts for a session (one-to-one)
+6. StorageTip: AI storage recommendations per produce name (persistent cache)
 
 Relationships:
 - User ↔ Role: Many-to-many via roles_users junction table
 - User ↔ ProduceScan: One-to-many (user has many scans)
+- Produce ↔ ProduceScan: One-to-many (name stored once, scans hold its id)
 - ScanSession ↔ ProduceScan: One-to-many (session has many scans)
+- ScanSession ↔ ScanSessionStats: One-to-one (counters kept in a narrow table)
 """
 
-from datetime import datetime
+import os
+import secrets
+import time
 from uuid import uuid4
 from backend.extensions import business_user as db
+from flask import current_app
 from flask_security import UserMixin, RoleMixin
+from sqlalchemy import DDL, event, func, insert, literal_column, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session
+
+# Scans with this many days left or fewer count as "expiring soon"
+EXPIRING_SOON_DAYS = 3
+
+# Longest AI note stored on a scan (longer notes are truncated on save)
+NOTES_MAX_LENGTH = 512
+
+# Longest produce name stored (produce.name, storage_tips.produce_name)
+PRODUCE_NAME_MAX_LENGTH = 100
+
+# 64-bit surrogate keys for the high-volume tables. SQLite only
+# auto-increments an INTEGER PRIMARY KEY (rowid alias, already 64-bit),
+# so it keeps that type there.
+BigIntKey = db.BigInteger().with_variant(db.Integer(), 'sqlite')
+SmallIntKey = db.SmallInteger().with_variant(db.Integer(), 'sqlite')
+
+# ==================== ID GENERATORS ====================
+
+
+# Crockford base32 alphabet used by ULIDs (no I, L, O, U)
+_ULID_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def generate_scan_id():
+    """
+    Return a 26-char ULID scan ID (e.g. '01JA8Z3K7Q4M2XW9N5T6R1B0CD').
+
+    48-bit millisecond timestamp followed by 80 random bits, so IDs sort
+    by creation time and new rows land at the right edge of the unique
+    index instead of on random B-tree pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    return ''.join(_ULID_ALPHABET[(value >> shift) & 31] for shift in range(125, -5, -5))
+
+
+def generate_session_id():
+    """Return an 8-hex-char session ID (e.g. 'a1b2c3d4'), short for URLs."""
+    return secrets.token_hex(4)
+
 
 # ==================== JUNCTION TABLE ====================
 
 roles_users = db.Table(
     'roles_users',
     # Foreign key to user.id
-    db.Column('user_id', db.Integer(), db.ForeignKey('user.id')),
+    # (user_id, role_id) is the primary key: a role is held once, and the
+    # duplicate check in AuthService.assign_role is an index probe
+    db.Column('user_id', db.Integer(), db.ForeignKey('user.id'), primary_key=True),
     # Foreign key to role.id
-    db.Column('role_id', db.Integer(), db.ForeignKey('role.id'))
+    db.Column('role_id', db.Integer(), db.ForeignKey('role.id'), primary_key=True)
 )
 """
 Junction table for many-to-many relationship between User and Role.
@@ -61,7 +114,8 @@ class Role(db.Model, RoleMixin):
     description = db.Column(db.String(255))
 
     def __repr__(self):
-        return f'<Role {self.name}>'
+        # Read the loaded value directly: repr must never trigger a SELECT
+        return '<Role %s>' % self.__dict__.get('name')
 
 
 class User(db.Model, UserMixin):
@@ -87,7 +141,11 @@ class User(db.Model, UserMixin):
     - scans: Relationship to ProduceScan (all scans this user made)
     """
 
+    __mapper_args__ = {'eager_defaults': True}  # Load server-side created_at
+
     id = db.Column(db.Integer, primary_key=True)
+    # unique=True creates the unique index used by exact-match lookups
+    # (login, register duplicate checks)
     email = db.Column(db.String(255), unique=True, nullable=False)
     username = db.Column(db.String(255), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
@@ -98,42 +156,190 @@ class User(db.Model, UserMixin):
         nullable=False,
         default=lambda: str(uuid4())
     )
-    created_at = db.Column(db.DateTime(), default=datetime.utcnow)
-    last_login_at = db.Column(db.DateTime())
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+    last_login_at = db.Column(db.DateTime(timezone=True))
 
     # Relationship: User has many Roles (many-to-many)
     roles = db.relationship(
         'Role',
         secondary=roles_users,  # Use junction table
-        backref=db.backref('users', lazy='dynamic')  # Reverse relation
+        # Needed on every authenticated request (role checks, to_dict), and
+        # a user has one or two: load them for all fetched users in one
+        # IN-query rather than a lazy SELECT per user
+        lazy='selectin',
+        # Reverse relation: a plain lazy list, loaded once per Role instance
+        # (not selectin - every user load pulls in roles, and eager-loading
+        # role.users from there would fetch the whole user table)
+        backref=db.backref('users', lazy='select')
     )
 
     # Relationship: User has many ProduceScan records
     scans = db.relationship(
         'ProduceScan',
-        backref='user',  # Can access user from scan: scan.user
-        lazy=True,  # Load scans when user accessed
+        back_populates='user',  # Can access user from scan: scan.user
+        # Stays lazy: User is loaded on every authenticated request, and
+        # eager-loading a full scan history there would cost more than the
+        # N+1 it avoids. Use .options(selectinload(User.scans)) when listing.
+        lazy='select',
         cascade='all, delete-orphan'  # Delete scans when user deleted
     )
 
     def __repr__(self):
-        return f'<User {self.email}>'
+        # Primary key from the instance dict: no refresh of expired attributes
+        return '<User %s>' % self.__dict__.get('id')
 
     def to_dict(self):
-        """Convert user to dictionary for JSON serialization."""
-        return {
-            'id': self.id,
-            'email': self.email,
-            'username': self.username,
-            'active': self.active,
-            'roles': [role.name for role in self.roles],
-            'created_at': self.created_at.isoformat(),
-            'last_login_at': self.last_login_at.isoformat() if self.last_login_at else None
-        }
+        """
+        Convert user to dictionary for JSON serialization.
+
+        Datetimes are returned as-is; the app's orjson provider writes them
+        as ISO 8601 strings. The result is memoized on the instance (the
+        roles walk runs once) and dropped by the listeners below whenever a serialized
+        attribute changes or the instance is refreshed/expired.
+        """
+        cached = self.__dict__.get('_dict_cache')
+        if cached is None:
+            cached = {
+                'id': self.id,
+                'email': self.email,
+                'username': self.username,
+                'active': self.active,
+                'roles': [role.name for role in self.roles],
+                'created_at': self.created_at,
+                'last_login_at': self.last_login_at
+            }
+            self._dict_cache = cached
+        return dict(cached)  # Shallow copy: callers may add keys
+
+
+# Flask-Security matches login emails case-insensitively
+# (WHERE lower(email) = lower(?)); the unique index on email can't serve
+# that, this expression index can
+db.Index('ix_user_email_lower', func.lower(User.email))
+
+
+def _clear_user_dict_cache(target, *args):
+    """Drop a User's memoized to_dict() output."""
+    target.__dict__.pop('_dict_cache', None)
+
+
+for _attr in (User.email, User.username, User.active, User.created_at, User.last_login_at):
+    event.listen(_attr, 'set', _clear_user_dict_cache)
+event.listen(User.roles, 'append', _clear_user_dict_cache)
+event.listen(User.roles, 'remove', _clear_user_dict_cache)
+event.listen(User, 'refresh', _clear_user_dict_cache)
+event.listen(User, 'expire', _clear_user_dict_cache)
 
 
 # ==================== PRODUCE SCANNING MODELS ====================
 
+class Produce(db.Model):
+    """
+    Produce name dimension table.
+
+    Scans store a small integer produce_id instead of repeating the name
+    string on every row. Names are few, so both directions of the mapping
+    are cached per app (see ids_for / name_for); a cached name costs no
+    query and no join.
+
+    Fields:
+    - id: Primary key (SMALLINT)
+    - name: Produce name as returned by the AI (e.g., 'Apple'), unique
+    """
+
+    __tablename__ = 'produce'
+
+    id = db.Column(SmallIntKey, primary_key=True)
+    name = db.Column(db.String(PRODUCE_NAME_MAX_LENGTH), unique=True, nullable=False)
+
+    @staticmethod
+    def _cache():
+        """Return this app's {'ids': {name: id}, 'names': {id: name}} cache."""
+        return current_app.extensions.setdefault(
+            'produce_cache', {'ids': {}, 'names': {}}
+        )
+
+    @classmethod
+    def ids_for(cls, names) -> dict:
+        """
+        Map produce names to ids, creating rows for names not seen before.
+
+        New rows are inserted in a SAVEPOINT (a concurrent insert of the
+        same name is picked up instead of failing). They only enter the
+        app cache once the surrounding transaction commits.
+
+        Args:
+            names: Iterable of produce names
+
+        Returns:
+            dict: {name: produce_id}
+        """
+        cache = cls._cache()
+        pending = db.session.info.setdefault('pending_produce', {})
+        ids = {}
+        missing = set()
+        for name in names:
+            produce_id = cache['ids'].get(name) or pending.get(name)
+            if produce_id is None:
+                missing.add(name)
+            else:
+                ids[name] = produce_id
+
+        if missing:
+            found = dict(db.session.execute(
+                select(cls.name, cls.id).where(cls.name.in_(missing))
+            ).all())
+            cache['ids'].update(found)
+            cache['names'].update({v: k for k, v in found.items()})
+            ids.update(found)
+
+            for name in missing - found.keys():
+                try:
+                    with db.session.begin_nested():
+                        ids[name] = db.session.scalar(
+                            insert(cls).values(name=name).returning(cls.id)
+                        )
+                    pending[name] = ids[name]
+                except IntegrityError:
+                    # Created by another worker since the SELECT
+                    ids[name] = db.session.scalar(
+                        select(cls.id).where(cls.name == name)
+                    )
+
+        return ids
+
+    @classmethod
+    def name_for(cls, produce_id):
+        """Return the name for produce_id (read-through app cache)."""
+        names = cls._cache()['names']
+        name = names.get(produce_id)
+        if name is None:
+            name = db.session.scalar(select(cls.name).where(cls.id == produce_id))
+            if name is not None:
+                names[produce_id] = name
+        return name
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_produce(session):
+    """Move produce rows created in the committed transaction into the cache."""
+    if session.in_nested_transaction():
+        return  # A SAVEPOINT was released; the outer transaction is still open
+    pending = session.info.pop('pending_produce', None)
+    if pending:
+        cache = Produce._cache()
+        cache['ids'].update(pending)
+        cache['names'].update({v: k for k, v in pending.items()})
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_produce(session):
+    """Forget produce rows whose transaction was rolled back."""
+    if session.in_nested_transaction():
+        return  # Only a SAVEPOINT was rolled back
+    session.info.pop('pending_produce', None)
+
+
 class ProduceScan(db.Model):
     """
     Individual produce scan record.
@@ -143,37 +349,183 @@ class ProduceScan(db.Model):
 
     Fields:
     - id: Primary key (auto-increment, used in responses)
-    - scan_id: Unique identifier for this scan (short UUID)
+    - scan_id: Unique identifier for this scan (ULID, time-sortable)
     - session_id: Foreign key to ScanSession (groups multiple scans)
     - user_id: Foreign key to User (who performed scan)
-    - produce_name: What produce was identified (e.g., 'Apple')
+    - produce_id: Foreign key to Produce (what was identified, e.g. 'Apple');
+      exposed as the produce_name property
     - shelf_life_days: Estimated days until expiration
-    - is_expiring_soon: Derived flag (days <= 3)
-    - is_expired: Derived flag (days <= 0)
+    - is_expiring_soon: Derived flag (days <= 3), computed - not stored
+    - is_expired: Derived flag (days <= 0), computed - not stored
     - scanned_at: Timestamp of when scan was performed
     - notes: AI assessment of freshness/condition
     """
 
     __tablename__ = 'produce_scans'
+    # Timestamps come from the database clock (server_default); fetch them
+    # back in the INSERT's RETURNING clause so they're loaded after commit
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (
+        # Recent scans per user: WHERE user_id=? ORDER BY scanned_at DESC LIMIT n
+        # (B-tree is scanned backwards for the DESC order)
+        db.Index('ix_scans_user_scanned', 'user_id', 'scanned_at'),
+        # Session detail view: WHERE session_id=? (ordered by scan time)
+        db.Index('ix_scans_session_scanned', 'session_id', 'scanned_at'),
+        # "My expiring / expired scans, newest first": partial indexes hold
+        # only the (few) matching rows. Predicates must match the SQL that
+        # is_expiring_soon / is_expired compile to, literals included.
+        db.Index(
+            'ix_scans_expiring_partial', 'user_id', 'scanned_at',
+            postgresql_where=db.text(f'shelf_life_days <= {EXPIRING_SOON_DAYS}'),
+            sqlite_where=db.text(f'shelf_life_days <= {EXPIRING_SOON_DAYS}')
+        ),
+        db.Index(
+            'ix_scans_expired_partial', 'user_id', 'scanned_at',
+            postgresql_where=db.text('shelf_life_days <= 0'),
+            sqlite_where=db.text('shelf_life_days <= 0')
+        ),
+        # PostgreSQL: try harder to keep rows (notes included) in the heap
+        {'postgresql_with': {'toast_tuple_target': 8160}},
+    )
+    # user_id / session_id need no index=True of their own: each leads a
+    # composite index above, which serves plain equality lookups too
 
-    id = db.Column(db.Integer, primary_key=True)
-    scan_id = db.Column(db.String(50), unique=True, nullable=False)
+    id = db.Column(BigIntKey, primary_key=True)
+    scan_id = db.Column(
+        db.String(26),  # ULID
+        unique=True,
+        nullable=False,
+        default=generate_scan_id  # Used when the caller doesn't supply one
+    )
     session_id = db.Column(
         db.String(50),
-        db.ForeignKey('scan_sessions.session_id'),
-        nullable=True  # Scans can exist without session (edge case)
+        db.ForeignKey('scan_sessions.session_id', ondelete='CASCADE'),
+        nullable=False  # Every scan belongs to a session
     )
     user_id = db.Column(
         db.Integer,
         db.ForeignKey('user.id'),
         nullable=True  # Scans can exist without user (anonymous)
     )
-    produce_name = db.Column(db.String(100), nullable=False)
+    produce_id = db.Column(
+        SmallIntKey,
+        db.ForeignKey('produce.id'),
+        nullable=False,
+        index=True  # Filter/group by produce
+    )
     shelf_life_days = db.Column(db.Integer, nullable=False)
-    is_expiring_soon = db.Column(db.Boolean, default=False)
-    is_expired = db.Column(db.Boolean, default=False)
-    scanned_at = db.Column(db.DateTime, default=datetime.utcnow)
-    notes = db.Column(db.Text, nullable=True)
+    scanned_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now())
+    # Capped VARCHAR instead of TEXT: AI notes are short, and a bounded
+    # column stays inline (no TOAST lookup on PostgreSQL)
+    notes = db.Column(db.String(NOTES_MAX_LENGTH), nullable=True)
+
+    # Relationships back to the owning user and session
+    # (counterparts of User.scans and ScanSession.scans)
+    user = db.relationship('User', back_populates='scans')
+    session = db.relationship('ScanSession', back_populates='scans')
+    produce = db.relationship('Produce')
+
+    @property
+    def produce_name(self):
+        """Produce name, from the Produce cache (no join or lazy load)."""
+        return Produce.name_for(self.produce_id)
+
+    # Expiry flags are pure functions of shelf_life_days, so they are
+    # computed (in Python on instances, as SQL on the class) rather than
+    # stored and kept in sync on every write
+    # SQL side renders the threshold inline (not as a bound parameter) so
+    # the planner can match the partial indexes above
+    @hybrid_property
+    def is_expiring_soon(self):
+        return self.shelf_life_days <= EXPIRING_SOON_DAYS
+
+    @is_expiring_soon.inplace.expression
+    @classmethod
+    def _is_expiring_soon_expression(cls):
+        return cls.shelf_life_days <= literal_column(str(EXPIRING_SOON_DAYS))
+
+    @hybrid_property
+    def is_expired(self):
+        return self.shelf_life_days <= 0
+
+    @is_expired.inplace.expression
+    @classmethod
+    def _is_expired_expression(cls):
+        return cls.shelf_life_days <= literal_column('0')
+
+    @classmethod
+    def bulk_create(cls, rows: list, batch_size: int = 1000):
+        """
+        Insert many scans with INSERT ... RETURNING, batch_size rows at a time.
+
+        Rows are plain dicts of column values (no ORM objects are built up
+        front); each batch is one executemany-style statement whose
+        RETURNING clause hands back the new rows as ORM objects, so IDs and
+        defaults come back without a SELECT per row. Does not commit.
+
+        Args:
+            rows: List of column dicts; every dict must have the same keys.
+                  A 'produce_name' key is translated to produce_id.
+            batch_size: Maximum rows per INSERT statement
+
+        Returns:
+            list[ProduceScan]: Inserted scans, in input order
+        """
+        if rows and 'produce_name' in rows[0]:
+            produce_ids = Produce.ids_for({row['produce_name'] for row in rows})
+            rows = [
+                {
+                    **{key: value for key, value in row.items() if key != 'produce_name'},
+                    'produce_id': produce_ids[row['produce_name']]
+                }
+                for row in rows
+            ]
+
+        scans = []
+        for start in range(0, len(rows), batch_size):
+            scans.extend(db.session.scalars(
+                insert(cls).returning(cls, sort_by_parameter_order=True),
+                rows[start:start + batch_size]
+            ).all())
+        return scans
+
+    @classmethod
+    def stream_for_user(cls, user_id: int, batch_size: int = 1000):
+        """
+        Yield every scan of a user as a row mapping, oldest first.
+
+        Selects plain columns (no ProduceScan objects, no to_dict()) and
+        fetches them batch_size rows at a time with yield_per, so memory
+        stays flat however many scans the user has. The caller must finish
+        (or close) the generator inside the app context.
+
+        Args:
+            user_id: Owner of the scans
+            batch_size: Rows fetched from the cursor per round
+
+        Yields:
+            RowMapping: id, scan_id, produce_name, shelf_life_days, scanned_at
+
+        Example:
+            for row in ProduceScan.stream_for_user(5):
+                print(row['produce_name'], row['shelf_life_days'])
+        """
+        stmt = select(
+            cls.id,
+            cls.scan_id,
+            Produce.name.label('produce_name'),
+            cls.shelf_life_days,
+            cls.scanned_at
+        ).join(
+            Produce, Produce.id == cls.produce_id
+        ).where(
+            cls.user_id == user_id
+        ).order_by(
+            cls.scanned_at, cls.id  # Walks ix_scans_user_scanned
+        ).execution_options(yield_per=batch_size)
+
+        for row in db.session.execute(stmt).mappings():
+            yield row
 
     def to_dict(self):
         """Convert scan to dictionary for JSON serialization."""
@@ -186,11 +538,21 @@ class ProduceScan(db.Model):
             'shelf_life_days': self.shelf_life_days,
             'is_expiring_soon': self.is_expiring_soon,
             'is_expired': self.is_expired,
-            'scanned_at': self.scanned_at.isoformat(),
+            'scanned_at': self.scanned_at,  # Serialized to ISO 8601 by orjson
             'notes': self.notes
         }
 
 
+# PostgreSQL: store notes uncompressed in the main row (no TOAST pointer)
+event.listen(
+    ProduceScan.__table__,
+    'after_create',
+    DDL('ALTER TABLE produce_scans ALTER COLUMN notes SET STORAGE MAIN').execute_if(
+        dialect='postgresql'
+    )
+)
+
+
 class ScanSession(db.Model):
     """
     Scan session model - groups multiple scans together.
@@ -204,40 +566,70 @@ class ScanSession(db.Model):
     - id: Primary key (auto-increment)
     - session_id: User-friendly ID (short UUID for URLs)
     - user_id: Which user owns this session (optional)
-    - total_scanned: Aggregate count of scans in session
-    - expiring_soon_count: How many items expiring soon
-    - expired_count: How many items already expired
     - created_at: When session was created
     - scans: Relationship to all ProduceScan records in this session
+    - stats: One-to-one ScanSessionStats row holding the aggregate counts
+      (exposed read-only as total_scanned / expiring_soon_count / expired_count)
 
     Statistics:
     These counts are pre-computed and stored for fast queries.
     Updated after batch scans complete (efficiency optimization).
-    Avoids recalculating from individual scans every time.
+    They live in their own narrow table so the frequent counter UPDATEs
+    don't rewrite (and, on PostgreSQL, bloat) the session row itself.
     """
 
     __tablename__ = 'scan_sessions'
+    __mapper_args__ = {'eager_defaults': True}  # Load server-side created_at
 
-    id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.String(50), unique=True, nullable=False)
+    id = db.Column(BigIntKey, primary_key=True)
+    session_id = db.Column(
+        db.String(50),
+        unique=True,
+        nullable=False,
+        default=generate_session_id
+    )
     user_id = db.Column(
         db.Integer,
         db.ForeignKey('user.id'),
         nullable=True  # Sessions can be anonymous
     )
-    total_scanned = db.Column(db.Integer, default=0)
-    expiring_soon_count = db.Column(db.Integer, default=0)
-    expired_count = db.Column(db.Integer, default=0)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Indexed for the age-based cleanup in delete_old_sessions
+    created_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), index=True)
 
     # Relationship: Session has many ProduceScan records
     scans = db.relationship(
         'ProduceScan',
-        backref='session',  # Can access session from scan: scan.session
-        lazy=True,  # Load scans when session accessed
-        cascade='all, delete-orphan'  # Delete scans when session deleted
+        back_populates='session',  # Can access session from scan: scan.session
+        # Loaded only when accessed; queries that need the scans of many
+        # sessions add .options(selectinload(ScanSession.scans))
+        lazy='select',
+        cascade='all, delete-orphan',  # Delete scans when session deleted
+        passive_deletes=True  # ...via ON DELETE CASCADE, not per-row DELETEs
     )
 
+    # Relationship: Session has one stats row (joined - it's a single row)
+    stats = db.relationship(
+        'ScanSessionStats',
+        uselist=False,
+        lazy='joined',
+        cascade='all, delete-orphan',
+        passive_deletes=True
+    )
+
+    # Counter accessors; sessions created before the stats table have no
+    # stats row yet and read as zero
+    @property
+    def total_scanned(self):
+        return self.stats.total_scanned if self.stats else 0
+
+    @property
+    def expiring_soon_count(self):
+        return self.stats.expiring_soon_count if self.stats else 0
+
+    @property
+    def expired_count(self):
+        return self.stats.expired_count if self.stats else 0
+
     def to_dict(self):
         """Convert session to dictionary for JSON serialization."""
         return {
@@ -246,5 +638,103 @@ class ScanSession(db.Model):
             'total_scanned': self.total_scanned,
             'expiring_soon_count': self.expiring_soon_count,
             'expired_count': self.expired_count,
-            'created_at': self.created_at.isoformat()
-        }
\ No newline at end of file
+            'created_at': self.created_at  # Serialized to ISO 8601 by orjson
+        }
+
+
+class ScanSessionStats(db.Model):
+    """
+    Aggregate scan counts for one ScanSession.
+
+    Split out of scan_sessions so counter updates touch only this small
+    row. Written by DatabaseService.update_scan_session() and
+    refresh_scan_session_counts().
+
+    Fields:
+    - session_id: Primary key and foreign key to ScanSession
+    - total_scanned: Aggregate count of scans in session
+    - expiring_soon_count: How many items expiring soon
+    - expired_count: How many items already expired
+    - updated_at: When the counts were last written
+    """
+
+    __tablename__ = 'scan_session_stats'
+
+    session_id = db.Column(
+        db.String(50),
+        db.ForeignKey('scan_sessions.session_id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    total_scanned = db.Column(db.Integer, nullable=False, default=0)
+    expiring_soon_count = db.Column(db.Integer, nullable=False, default=0)
+    expired_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), server_default=db.func.now(), onupdate=db.func.now())
+
+    @classmethod
+    def refresh_counts(cls, session_ids: list):
+        """
+        Recompute the counters of many sessions in one statement.
+
+        Emits a single UPDATE ... FROM over a grouped aggregate of their
+        scans (one round-trip however many sessions are refreshed):
+
+            UPDATE scan_session_stats SET total_scanned = c.total, ...
+            FROM (SELECT session_id, count(*) AS total,
+                         count(*) FILTER (WHERE shelf_life_days <= 3) AS expiring_soon,
+                         count(*) FILTER (WHERE shelf_life_days <= 0) AS expired
+                  FROM produce_scans WHERE session_id IN (...)
+                  GROUP BY session_id) AS c
+            WHERE scan_session_stats.session_id = c.session_id
+
+        Sessions without scans (or without a stats row) are not matched and
+        keep their stored counts. Does not commit.
+
+        Args:
+            session_ids: Session IDs to refresh
+
+        Returns:
+            int: Number of stats rows updated
+        """
+        counts = select(
+            ProduceScan.session_id,
+            func.count().label('total'),
+            func.count().filter(ProduceScan.is_expiring_soon).label('expiring_soon'),
+            func.count().filter(ProduceScan.is_expired).label('expired')
+        ).where(
+            ProduceScan.session_id.in_(session_ids)
+        ).group_by(ProduceScan.session_id).subquery()
+
+        result = db.session.execute(
+            update(cls)
+            .where(cls.session_id == counts.c.session_id)
+            .values(
+                total_scanned=counts.c.total,
+                expiring_soon_count=counts.c.expiring_soon,
+                expired_count=counts.c.expired
+            )
+        )
+        return result.rowcount
+
+
+# ==================== STORAGE TIPS ====================
+
+class StorageTip(db.Model):
+    """
+    AI storage recommendations for one produce name.
+
+    Storage advice for "apple" doesn't change between requests, so each
+    answer is stored once and shared by every worker and restart; the AI
+    is only asked again once a row is older than the caller's max age.
+    Written by DatabaseService.save_storage_tip().
+
+    Fields:
+    - produce_name: Normalized name (stripped, lowercase), primary key
+    - recommendations: The AI answer (2-3 sentences)
+    - created_at: When the answer was stored
+    """
+
+    __tablename__ = 'storage_tips'
+
+    produce_name = db.Column(db.String(PRODUCE_NAME_MAX_LENGTH), primary_key=True)
+    recommendations = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
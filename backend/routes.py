@@ -13,12 +13,23 @@ Design Principles:
 - Error responses include meaningful messages
 """
 
-from flask import Blueprint, request, jsonify
-from flask_security import login_required, current_user
-from flask_security.utils import verify_password
-from backend.services import ProduceScanService
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_security import (
+    get_request_attr, login_required, login_user, logout_user, roles_required, current_user
+)
+from backend.json_provider import ORJSON_OPTIONS
+from backend.models import PRODUCE_NAME_MAX_LENGTH
+from backend.services import get_scan_service
 from backend.services.auth_service import AuthService
+from itertools import combinations, islice
+import base64
+import binascii
+import hashlib
+import ijson
+import io
 import logging
+import orjson
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +37,311 @@ logger = logging.getLogger(__name__)
 # Protected scanning endpoints + public storage tips endpoint
 
 scan_bp = Blueprint('scan', __name__, url_prefix='/api/scan')
-scan_service = ProduceScanService()
+
+# Scans encoded per write of the streamed /export body
+EXPORT_CHUNK_ROWS = 500
+
+# Most images accepted by one /batch (or /batch/stream) request
+MAX_BATCH_IMAGES = 50
+
+# Largest single image accepted (decoded bytes); bigger ones are a 413
+# before any decoding or AI call
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+
+def _image_size(image) -> int:
+    """Decoded size of an image: raw bytes, or estimated from base64 text."""
+    if isinstance(image, bytes):
+        return len(image)
+    if isinstance(image, str):
+        if image.startswith('data:'):
+            image = image.partition(',')[2]
+        return len(image) * 3 // 4
+    return 0
+
+
+def _oversized_error(field: str):
+    """413 response for an image over MAX_IMAGE_BYTES."""
+    return jsonify({
+        'success': False,
+        'error': f'{field} exceeds the {MAX_IMAGE_BYTES // (1024 * 1024)}MB image limit'
+    }), 413
+
+
+# Produce names the public storage tips endpoints accept: letters, digits,
+# spaces and a little punctuation ("Bok choy", "Granny Smith's")
+_PRODUCE_NAME_PATTERN = re.compile(r"[\w '.,()&-]+")
+
+
+def _produce_name_from(data, endpoint: str):
+    """
+    Validate the produce_name of a storage tips request body.
+
+    The storage tips endpoints are public, and every new name costs an AI
+    call and a stored row, so only plausible produce names get through.
+
+    Returns:
+        tuple: (stripped name, None), or (None, 400 response)
+    """
+    produce_name = data.get('produce_name') if isinstance(data, dict) else None
+    if isinstance(produce_name, str):
+        produce_name = produce_name.strip()
+
+    if not produce_name:
+        logger.warning("%s: Missing produce_name", endpoint)
+        error = 'produce_name is required'
+    elif (
+        not isinstance(produce_name, str)
+        or len(produce_name) > PRODUCE_NAME_MAX_LENGTH
+        or not _PRODUCE_NAME_PATTERN.fullmatch(produce_name)
+    ):
+        logger.warning("%s: Invalid produce_name", endpoint)
+        error = (
+            f'produce_name must be at most {PRODUCE_NAME_MAX_LENGTH} letters, '
+            f'digits, spaces or \' . , ( ) & -'
+        )
+    else:
+        return produce_name, None
+
+    return None, (jsonify({'success': False, 'error': error}), 400)
+
+
+def _request_json():
+    """
+    Parse the JSON request body, or return None if it is missing/malformed.
+
+    Session-authenticated requests parse without caching, so the raw bytes
+    aren't kept around once parsed. Token-authenticated requests reuse the
+    parse Flask-Security's token loader already cached (it reads the body
+    looking for an auth_token key) instead of decoding a multi-MB body twice.
+    """
+    via_token = get_request_attr('fs_authn_via') == 'token'
+    return request.get_json(silent=True, cache=via_token)
+
+
+def _conditional_json(result: dict, *etag_parts):
+    """
+    Answer with result as JSON plus a weak ETag, or a bodyless 304.
+
+    etag_parts identify the content cheaply - scan ids, which never change
+    once written - so a client revalidating with If-None-Match gets its
+    304 without the result being serialized or sent.
+
+    Args:
+        result: Response body (only serialized for a 200)
+        *etag_parts: JSON-encodable values that change whenever result does
+
+    Returns:
+        Response: 200 with body, or 304 if the client's copy is current
+    """
+    etag = hashlib.blake2b(orjson.dumps(etag_parts), digest_size=16).hexdigest()
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(result)
+
+    response.set_etag(etag, weak=True)
+    # Per-user data: the browser may keep it, shared caches may not, and
+    # every reuse is revalidated
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _stream_batch_json(stream):
+    """
+    Stream-parse a JSON /batch body, decoding each image as it is reached.
+
+    ijson walks the body in small buffers, so neither the raw body nor the
+    list of base64 strings is ever held whole: each string is decoded to
+    bytes and dropped before the next one is read. Images past
+    MAX_BATCH_IMAGES are counted but not decoded, and reading stops at
+    the first image over MAX_IMAGE_BYTES (kept undecoded, for the 413).
+
+    Args:
+        stream: The request body stream
+
+    Returns:
+        dict: Same shape as request.get_json() for the fields /batch reads,
+              except 'images' items are already decoded (None for an item
+              that isn't a base64 string, the raw string for an oversized
+              one); None for an empty, malformed or non-object body
+    """
+    data = {}
+    images = None
+    try:
+        # Buffered: ijson probes with read(0), which Werkzeug's LimitedStream
+        # would take for a client disconnect
+        events = ijson.parse(io.BufferedReader(stream))
+        if next(events)[1] != 'start_map':
+            return None
+
+        for prefix, event, value in events:
+            if prefix == '':
+                if event == 'map_key':
+                    data.setdefault(value, True)  # value events below overwrite
+            elif prefix == 'images':
+                if event == 'start_array':
+                    images = data['images'] = []
+                elif event == 'start_map':
+                    images, data['images'] = None, {}
+                elif event not in ('end_array', 'end_map', 'map_key'):
+                    images, data['images'] = None, value
+            elif prefix == 'images.item' and images is not None:
+                if event == 'string' and _image_size(value) > MAX_IMAGE_BYTES:
+                    images.append(value)
+                    break
+                if event == 'string' and len(images) < MAX_BATCH_IMAGES:
+                    images.append(_decode_image_data(value))
+                elif event not in ('end_array', 'end_map', 'map_key'):
+                    images.append(None)
+            elif prefix == 'session_id':
+                if event in ('start_array', 'start_map'):
+                    data['session_id'] = None
+                elif event not in ('end_array', 'end_map', 'map_key'):
+                    data['session_id'] = value
+    except (ijson.JSONError, StopIteration):
+        return None
+
+    return data
+
+
+def _decode_image_data(image_data) -> bytes:
+    """
+    Decode a base64 image from a JSON body into raw bytes.
+
+    Accepts a data URI ("data:image/jpeg;base64,...") or bare base64.
+    The prefix is split off once here, so the AI service receives the
+    same raw bytes as for a multipart upload.
+
+    Args:
+        image_data: Value of the JSON image field
+
+    Returns:
+        bytes: The decoded image, or None if the value isn't a non-empty
+               base64 string (caller answers 400 before any AI call)
+    """
+    if isinstance(image_data, bytes):
+        return image_data or None  # already decoded by _stream_batch_json
+    if not isinstance(image_data, str):
+        return None
+    if image_data.startswith('data:'):
+        image_data = image_data.partition(',')[2]
+    try:
+        return base64.b64decode(image_data) or None
+    except binascii.Error:
+        return None
+
+
+def _read_image_file(image_file) -> bytes:
+    """
+    Read an uploaded image file as raw bytes.
+
+    The upload is read straight from its spooled stream (see
+    UploadRequest), so the image never goes through base64 or JSON parsing.
+    At most MAX_IMAGE_BYTES + 1 bytes are read: enough to tell that an
+    image is oversized without loading all of it.
+
+    Args:
+        image_file: werkzeug FileStorage from request.files
+
+    Returns:
+        bytes: The image, or None for an empty upload
+    """
+    return image_file.stream.read(MAX_IMAGE_BYTES + 1) or None
+
+
+def _batch_images_from_request():
+    """
+    Read and validate the images and session_id of a batch scan request.
+
+    Shared by /batch and /batch/stream. Accepts multipart uploads or a
+    JSON body (see scan_batch for both formats); JSON images are decoded
+    from base64.
+
+    Returns:
+        tuple: (images, session_id, None) when valid, or
+               (None, None, error response) to return as-is
+    """
+    if request.mimetype == 'multipart/form-data':
+        # Multipart upload: one file part per image, read as raw bytes
+        image_files = request.files.getlist('images[]') or request.files.getlist('images')
+        session_id = request.form.get('session_id')
+        images = [image for image in map(_read_image_file, image_files) if image]
+        logger.debug("batch request multipart upload: %s file parts", len(image_files))
+    else:
+        # JSON body; malformed JSON comes back as None (-> our 400).
+        # Streamed (images decoded one at a time) unless Flask-Security's
+        # token loader has already parsed the whole body
+        if request.is_json and get_request_attr('fs_authn_via') != 'token':
+            data = _stream_batch_json(request.stream)
+        else:
+            data = _request_json()
+        logger.debug("batch request body fields: %s", len(data) if data else 0)
+
+        # Validate request body
+        if not data:
+            logger.warning("batch request: Request body is empty")
+            return None, None, (jsonify({
+                'success': False,
+                'error': 'Request body is required'
+            }), 400)
+
+        # Extract fields
+        images = data.get('images', [])
+        session_id = data.get('session_id')
+
+    logger.debug("batch request: images count=%s, session_id=%s",
+                 len(images) if isinstance(images, list) else None, session_id)
+
+    # Oversized images are refused first: the streamed parser stops reading
+    # at the first one, so the other fields may be incomplete
+    if isinstance(images, list):
+        oversized = next((index for index, image in enumerate(images)
+                          if _image_size(image) > MAX_IMAGE_BYTES), None)
+        if oversized is not None:
+            logger.warning("batch request: image %s exceeds the size limit", oversized)
+            return None, None, _oversized_error(f'images[{oversized}]')
+
+    # Validate format and required fields
+    if not isinstance(images, list) or not session_id:
+        logger.warning("batch request: Invalid format - images type=%s, session_id present=%s",
+                       type(images), bool(session_id))
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'images (array) and session_id are required'
+        }), 400)
+
+    # Validate images list is not empty
+    if len(images) == 0:
+        logger.warning("batch request: Empty images list")
+        return None, None, (jsonify({
+            'success': False,
+            'error': 'images cannot be empty'
+        }), 400)
+
+    # One AI call per image: cap the batch so a request can't hold a
+    # worker for minutes
+    if len(images) > MAX_BATCH_IMAGES:
+        logger.warning("batch request: %s images exceeds the limit", len(images))
+        return None, None, (jsonify({
+            'success': False,
+            'error': f'At most {MAX_BATCH_IMAGES} images per batch'
+        }), 400)
+
+    if request.mimetype != 'multipart/form-data':
+        # JSON images arrive as base64 strings: decode (and validate) once
+        # (streamed bodies come in decoded; bytes pass through)
+        images = [_decode_image_data(image) for image in images]
+        if None in images:
+            logger.warning("batch request: image %s is not valid base64", images.index(None))
+            return None, None, (jsonify({
+                'success': False,
+                'error': f'images[{images.index(None)}] must be a base64 image or data URI'
+            }), 400)
+
+    return images, session_id, None
 
 
 @scan_bp.route('/start-session', methods=['POST'])
@@ -66,13 +381,13 @@ def start_session():
         .then(data => console.log(data.session_id))
     """
     try:
-        logger.debug(f"Starting session for user: {current_user.id}")
+        logger.debug("Starting session for user: %s", current_user.id)
 
         # Call service to create session
         # current_user is available from Flask-Security
-        session_id = scan_service.start_scan_session(user_id=current_user.id)
+        session_id = get_scan_service().start_scan_session(user_id=current_user.id)
 
-        logger.debug(f"Session created: {session_id}")
+        logger.debug("Session created: %s", session_id)
 
         return jsonify({
             'success': True,
@@ -81,7 +396,7 @@ def start_session():
         }), 201  # 201 Created
 
     except Exception as e:
-        logger.error(f"Error starting session: {str(e)}")
+        logger.error("Error starting session: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -105,9 +420,19 @@ def scan_single():
             "session_id": "a1b2c3d4"
         }
 
+        or, without base64 on the wire:
+
+        POST /api/scan/single
+        Content-Type: multipart/form-data
+        image=<image file>, session_id=a1b2c3d4
+
+        session_id is optional: without it the scan starts a new session
+        (no /start-session call needed), returned as session_id.
+
     Response (200 OK):
         {
             "success": true,
+            "session_id": "a1b2c3d4",
             "data": {
                 "id": 42,
                 "scan_id": "a1b2c3d4e5",
@@ -123,7 +448,7 @@ def scan_single():
     Response (400 Bad Request):
         {
             "success": false,
-            "error": "image_data and session_id are required"
+            "error": "image_data is required"
         }
 
     Response (500 Server Error):
@@ -139,41 +464,71 @@ def scan_single():
     4. Return analysis + database ID
 
     Notes:
-    - image_data is base64 encoded (can be large - 50MB limit on Flask)
-    - session_id groups scan in a session for user's history
+    - image_data is base64 encoded (can be large - 50MB limit on Flask);
+      it is decoded here, and invalid base64 is a 400 before any AI call
+    - multipart uploads are ~25% smaller, skip the JSON parse of the image,
+      and spool to a temp file past 2MB instead of living in memory
+    - session_id groups scan in a session for user's history; omitted,
+      a new session is created after the AI analysis succeeds
     """
-    data = request.get_json()
-    logger.debug(f"scan_single request body keys: {list(data.keys()) if data else 'None'}")
-
-    # Validate request body exists
-    if not data:
-        logger.warning("scan_single: Request body is empty")
-        return jsonify({
-            'success': False,
-            'error': 'Request body is required'
-        }), 400
-
-    # Extract fields from request
-    image_data = data.get('image_data')
-    session_id = data.get('session_id')
-
-    logger.debug(f"scan_single: image_data present={bool(image_data)}, session_id={session_id}")
-    logger.debug(f"scan_single: image_data length={len(image_data) if image_data else 0} chars")
-
-    # Validate required fields are present
-    if not image_data or not session_id:
-        logger.warning(f"scan_single: Missing fields - image_data: {bool(image_data)}, session_id: {bool(session_id)}")
+    if request.mimetype == 'multipart/form-data':
+        # Multipart upload: image arrives as raw bytes in a file part
+        image_file = request.files.get('image')
+        session_id = request.form.get('session_id')
+        image_data = _read_image_file(image_file) if image_file else None
+        logger.debug("scan_single multipart upload: image present=%s", bool(image_file))
+    else:
+        # JSON body; malformed JSON comes back as None (-> our 400)
+        data = _request_json()
+        logger.debug("scan_single request body fields: %s", len(data) if data else 0)
+
+        # Validate request body exists
+        if not data:
+            logger.warning("scan_single: Request body is empty")
+            return jsonify({
+                'success': False,
+                'error': 'Request body is required'
+            }), 400
+
+        # Extract fields from request
+        image_data = data.get('image_data')
+        session_id = data.get('session_id')
+
+        if _image_size(image_data) > MAX_IMAGE_BYTES:
+            logger.warning("scan_single: image_data exceeds the size limit")
+            return _oversized_error('image_data')
+
+        if image_data:
+            image_data = _decode_image_data(image_data)
+            if image_data is None:
+                logger.warning("scan_single: image_data is not valid base64")
+                return jsonify({
+                    'success': False,
+                    'error': 'image_data must be a base64 image or data URI'
+                }), 400
+
+    logger.debug("scan_single: image_data bytes=%s, session_id=%s",
+                 len(image_data) if image_data else 0, session_id)
+
+    # Multipart images are read to one byte past the limit
+    if _image_size(image_data) > MAX_IMAGE_BYTES:
+        logger.warning("scan_single: image exceeds the size limit")
+        return _oversized_error('image_data')
+
+    # Validate required fields are present (no session_id = new session)
+    if not image_data:
+        logger.warning("scan_single: Missing image_data")
         return jsonify({
             'success': False,
-            'error': 'image_data and session_id are required'
+            'error': 'image_data is required'
         }), 400
 
     try:
-        logger.debug(f"Calling scan_single_produce for session: {session_id}")
+        logger.debug("Calling scan_single_produce for session: %s", session_id)
 
         # Call service to analyze produce
         # Service handles: AI analysis + database save
-        result = scan_service.scan_single_produce(
+        result = get_scan_service().scan_single_produce(
             image_data,
             session_id,
             user_id=current_user.id
@@ -181,12 +536,12 @@ def scan_single():
 
         # Return appropriate status code based on result
         status_code = 200 if result['success'] else 400
-        logger.debug(f"scan_single result: success={result['success']}")
+        logger.debug("scan_single result: success=%s", result['success'])
 
         return jsonify(result), status_code
 
     except Exception as e:
-        logger.error(f"scan_single exception: {str(e)}", exc_info=True)
+        logger.error("scan_single exception: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -204,6 +559,13 @@ def scan_batch():
 
     Request:
         POST /api/scan/batch
+        Content-Type: multipart/form-data
+        images[]=<image file>, images[]=<image file>, ..., session_id=a1b2c3d4
+
+        or, with base64 images in a JSON body:
+
+        POST /api/scan/batch
+        Content-Type: application/json
         {
             "images": [
                 "data:image/jpeg;base64,/9j/4AAQ...",
@@ -222,6 +584,9 @@ def scan_batch():
                 {"produce_name": "Banana", "shelf_life_days": 2, ...},
                 ...
             ],
+            "failed": [
+                {"index": 3, "error": "AI response is not valid JSON..."}
+            ],
             "summary": {
                 "total_scanned": 2,
                 "expiring_soon_count": 1,
@@ -235,71 +600,115 @@ def scan_batch():
             "success": false,
             "error": "images cannot be empty"
         }
+        (also for more than MAX_BATCH_IMAGES images, or invalid base64;
+        "No image could be analyzed", with "failed", if every AI call failed)
+
+    Response (413 Payload Too Large):
+        {
+            "success": false,
+            "error": "images[3] exceeds the 10MB image limit"
+        }
 
     Advantages over multiple /single calls:
     - Single session update instead of N updates
     - Aggregated statistics in one response
     - Better for analytics (batch vs individual)
     - Can batch across multiple scans efficiently
+    - Identical images (burst shots) are analyzed once, see
+      ProduceScanService.scan_batch_produce
+    - Images the AI could not analyze are listed in "failed" (by position)
+      instead of being saved; the rest of the batch is kept
     """
-    data = request.get_json()
-    logger.debug(f"scan_batch request body keys: {list(data.keys()) if data else 'None'}")
-
-    # Validate request body
-    if not data:
-        logger.warning("scan_batch: Request body is empty")
-        return jsonify({
-            'success': False,
-            'error': 'Request body is required'
-        }), 400
-
-    # Extract fields
-    images = data.get('images', [])
-    session_id = data.get('session_id')
-
-    logger.debug(f"scan_batch: images count={len(images)}, session_id={session_id}")
-
-    # Validate format and required fields
-    if not isinstance(images, list) or not session_id:
-        logger.warning(
-            f"scan_batch: Invalid format - images type={type(images)}, session_id present={bool(session_id)}")
-        return jsonify({
-            'success': False,
-            'error': 'images (array) and session_id are required'
-        }), 400
-
-    # Validate images list is not empty
-    if len(images) == 0:
-        logger.warning("scan_batch: Empty images list")
-        return jsonify({
-            'success': False,
-            'error': 'images cannot be empty'
-        }), 400
+    images, session_id, error = _batch_images_from_request()
+    if error:
+        return error
 
     try:
-        logger.debug(f"Calling scan_batch_produce for session: {session_id}")
+        logger.debug("Calling scan_batch_produce for session: %s", session_id)
 
         # Call service to analyze batch
         # Service handles: AI analysis for each + database saves + session update
-        result = scan_service.scan_batch_produce(
+        result = get_scan_service().scan_batch_produce(
             images,
             session_id,
             user_id=current_user.id
         )
 
         status_code = 200 if result['success'] else 400
-        logger.debug(f"scan_batch result: success={result['success']}, count={len(result.get('scans', []))}")
+        logger.debug("scan_batch result: success=%s, count=%s",
+                     result['success'], len(result.get('scans', [])))
 
         return jsonify(result), status_code
 
     except Exception as e:
-        logger.error(f"scan_batch exception: {str(e)}", exc_info=True)
+        logger.error("scan_batch exception: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@scan_bp.route('/batch/stream', methods=['POST'])
+@login_required
+def scan_batch_stream():
+    """
+    Analyze a batch like /batch, streaming each result as it completes.
+
+    Protected Endpoint: Requires authentication
+    Purpose: Show results as they arrive instead of after the slowest image
+
+    Request:
+        Same as /batch (multipart images[] or JSON images, plus session_id)
+
+    Response (200 OK, text/event-stream):
+        event: scan
+        data: {"index": 1, "scan": {"produce_name": "Banana", "shelf_life_days": 2, ...}}
+
+        event: scan
+        data: {"index": 0, "scan": {"produce_name": "Apple", "shelf_life_days": 7, ...}}
+
+        event: failed
+        data: {"index": 2, "error": "..."}
+
+        event: done
+        data: {"success": true, "session_id": "a1b2c3d4", "scans": [...], "failed": [...], "summary": {...}}
+
+    - One 'scan' (or 'failed') event per submitted image, fastest first;
+      index is the image's position in the request
+    - 'done' is the /batch response body, sent once every scan is saved
+      (scan_id and scanned_at only exist from here on)
+    - A failure ends the stream with 'event: error' and
+      data: {"success": false, "error": "..."}
+
+    Response (400 Bad Request / 413 Payload Too Large):
+        Same JSON errors as /batch, before any event is sent
+    """
+    images, session_id, error = _batch_images_from_request()
+    if error:
+        return error
+
+    logger.debug("Streaming scan_batch_produce for session: %s", session_id)
+    events = get_scan_service().scan_batch_produce_stream(
+        images,
+        session_id,
+        user_id=current_user.id
+    )
+
+    def generate():
+        for event in events:
+            name = event.pop('event')
+            if name == 'error':
+                logger.error("scan_batch_stream error: %s", event['error'])
+            yield b'event: ' + name.encode() + b'\ndata: ' + orjson.dumps(
+                event, option=ORJSON_OPTIONS) + b'\n\n'
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # Stop reverse proxies (nginx) from holding events back in a buffer
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @scan_bp.route('/session/<session_id>', methods=['GET'])
 @login_required
 def get_session_results(session_id):
@@ -346,19 +755,24 @@ def get_session_results(session_id):
     - Service checks if session.user_id matches current_user.id
     - Prevents users from viewing other users' scans
     """
-    logger.debug(f"Getting session results for: {session_id}")
+    logger.debug("Getting session results for: %s", session_id)
     try:
         # Call service with user_id for authorization check
-        result = scan_service.get_session_results(session_id, user_id=current_user.id)
+        result = get_scan_service().get_session_results(session_id, user_id=current_user.id)
 
         # Determine status code based on result
         status_code = 200 if result['success'] else 404
-        logger.debug(f"get_session_results: success={result['success']}")
+        logger.debug("get_session_results: success=%s", result['success'])
 
+        if result['success']:
+            # Polling clients revalidate: scans are only ever added
+            return _conditional_json(
+                result, session_id, [scan['id'] for scan in result['scans']]
+            )
         return jsonify(result), status_code
 
     except Exception as e:
-        logger.error(f"get_session_results exception: {str(e)}", exc_info=True)
+        logger.error("get_session_results exception: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -377,7 +791,7 @@ def get_recent():
         GET /api/scan/recent?limit=10
 
     Query Parameters:
-        limit: (optional) Max scans to return, default 50, max 100
+        limit: (optional) Max scans to return, default 50, clamped to 1-100
 
     Response (200 OK):
         {
@@ -396,25 +810,79 @@ def get_recent():
     - Ordered newest first (most recent scans first)
     """
     try:
-        # Parse and validate limit parameter
+        # Parse and validate limit parameter (malformed -> default 50)
         limit = request.args.get('limit', default=50, type=int)
-        limit = min(limit, 100)  # Cap at 100 to prevent large queries
-        logger.debug(f"Getting recent scans for user {current_user.id}, limit={limit}")
+        # Clamp to 1..100: no LIMIT 0 round-trips, no large queries
+        limit = max(1, min(limit, 100))
+        logger.debug("Getting recent scans for user %s, limit=%s", current_user.id, limit)
 
         # Get user's recent scans
-        result = scan_service.get_recent_scans(limit=limit, user_id=current_user.id)
-        logger.debug(f"get_recent: found {result.get('count', 0)} scans")
-
+        result = get_scan_service().get_recent_scans(limit=limit, user_id=current_user.id)
+        logger.debug("get_recent: found %s scans", result.get('count', 0))
+
+        if result['success']:
+            # ETag from the listed scan ids: changes when a scan is added
+            # or removed, 304 for a dashboard poll that sees nothing new
+            return _conditional_json(
+                result, current_user.id, limit, [scan['id'] for scan in result['scans']]
+            )
         return jsonify(result), 200
 
     except Exception as e:
-        logger.error(f"get_recent exception: {str(e)}", exc_info=True)
+        logger.error("get_recent exception: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@scan_bp.route('/export', methods=['GET'])
+@login_required
+def export_scans():
+    """
+    Export the authenticated user's complete scan history.
+
+    Protected Endpoint: Requires authentication
+
+    Request:
+        GET /api/scan/export
+
+    Response (200 OK, streamed):
+        {
+            "success": true,
+            "scans": [
+                {"id": 1, "scan_id": "01J...", "produce_name": "Apple",
+                 "shelf_life_days": 7, "scanned_at": "2024-01-15T10:30:00"},
+                ...
+            ]
+        }
+
+    Purpose:
+    - Full history download, oldest first, with no row limit
+    - Rows are streamed from the database and encoded as they arrive,
+      so the whole history is never held in memory
+    - A database error mid-stream ends the body early (the status line
+      has already been sent), leaving the JSON visibly truncated
+    """
+    logger.debug("Exporting scans for user %s", current_user.id)
+    scans = get_scan_service().export_user_scans(user_id=current_user.id)
+
+    def generate():
+        yield b'{"success":true,"scans":['
+        try:
+            first = True
+            for chunk in iter(lambda: list(islice(scans, EXPORT_CHUNK_ROWS)), []):
+                body = b','.join(orjson.dumps(scan, option=ORJSON_OPTIONS) for scan in chunk)
+                yield body if first else b',' + body
+                first = False
+        except Exception as e:
+            logger.error("export_scans exception: %s", e, exc_info=True)
+            return
+        yield b']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
 @scan_bp.route('/storage-tips', methods=['POST'])
 def storage_tips():
     """
@@ -443,41 +911,112 @@ def storage_tips():
             "success": false,
             "error": "produce_name is required"
         }
+        Also for a name that isn't a string, is over 100 characters or
+        uses characters other than letters, digits, spaces and ' . , ( ) & -
 
     Why Public?
     - Educational content (storage tips help reduce waste)
     - Accessible to all users and anonymous visitors
     - Encourages better food storage practices
     """
-    data = request.get_json()
-    logger.debug(f"storage_tips request body keys: {list(data.keys()) if data else 'None'}")
+    data = request.get_json(silent=True) or {}
+    logger.debug("storage_tips request body fields: %s", len(data))
 
-    # Validate produce_name field
-    if not data or not data.get('produce_name'):
-        logger.warning("storage_tips: Missing produce_name")
-        return jsonify({
-            'success': False,
-            'error': 'produce_name is required'
-        }), 400
+    # Validate produce_name field (bound once, reused below)
+    produce_name, error = _produce_name_from(data, 'storage_tips')
+    if error:
+        return error
 
     try:
-        produce_name = data.get('produce_name')
-        logger.debug(f"Getting storage tips for: {produce_name}")
+        logger.debug("Getting storage tips for: %s", produce_name)
 
         # Service calls AI to generate recommendations
-        result = scan_service.get_storage_tips(produce_name)
+        result = get_scan_service().get_storage_tips(produce_name)
 
         status_code = 200 if result['success'] else 400
         return jsonify(result), status_code
 
     except Exception as e:
-        logger.error(f"storage_tips exception: {str(e)}", exc_info=True)
+        logger.error("storage_tips exception: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 
+@scan_bp.route('/storage-tips/stream', methods=['POST'])
+def storage_tips_stream():
+    """
+    Stream storage recommendations as plain text while the AI writes them.
+
+    PUBLIC Endpoint: No authentication required
+    Purpose: Show the first words of the tips at once instead of after
+    the whole answer
+
+    Request:
+        POST /api/scan/storage-tips/stream
+        {
+            "produce_name": "Apple"
+        }
+
+    Response (200 OK, text/plain, chunked):
+        Store apples in the refrigerator in a plastic bag to maintain
+        humidity. Separate from ethylene-producing fruits...
+
+    - Stored tips arrive as one chunk; new ones piece by piece
+    - If the AI can't be reached, the body is the fallback message
+      ("Could not retrieve storage recommendations: ...")
+
+    Response (400 Bad Request):
+        {
+            "success": false,
+            "error": "produce_name is required"
+        }
+        Also for a name that isn't a string, is over 100 characters or
+        uses characters other than letters, digits, spaces and ' . , ( ) & -
+    """
+    data = request.get_json(silent=True) or {}
+
+    produce_name, error = _produce_name_from(data, 'storage_tips_stream')
+    if error:
+        return error
+
+    logger.debug("Streaming storage tips for: %s", produce_name)
+    chunks = get_scan_service().stream_storage_tips(produce_name)
+
+    response = Response(stream_with_context(chunks), mimetype='text/plain')
+    # Stop reverse proxies (nginx) from holding text back in a buffer
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@scan_bp.route('/storage-tips/cache', methods=['GET'])
+@login_required
+@roles_required('admin')
+def storage_tips_cache():
+    """
+    Report storage tips cache statistics.
+
+    Admin Endpoint: Requires the 'admin' role
+
+    Request:
+        GET /api/scan/storage-tips/cache
+
+    Response (200 OK):
+        {
+            "success": true,
+            "cache": {"hits": 42, "misses": 7, "maxsize": 512, "currsize": 7}
+        }
+
+    Counters are per worker process.
+    """
+    return jsonify({
+        'success': True,
+        'cache': get_scan_service().storage_tips_cache_info()
+    }), 200
+
+
 @scan_bp.route('/health', methods=['GET'])
 def health_check():
     """
@@ -499,6 +1038,9 @@ def health_check():
     - Monitoring tools check this endpoint
     - Kubernetes/Docker health probes use this
     - Simple way to verify service is up
+
+    Note: GET requests are answered by app.py's WSGI health shortcut
+    with the same body before reaching Flask; this view serves HEAD.
     """
     return jsonify({
         'status': 'healthy',
@@ -511,6 +1053,34 @@ def health_check():
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
+# Required JSON fields; FIELDS.difference(data) names what's missing (as a
+# frozenset, the key into the pre-encoded error bodies below)
+_REGISTER_FIELDS = frozenset({'email', 'password', 'username'})
+_LOGIN_FIELDS = frozenset({'email', 'password'})
+
+
+def _missing_fields_bodies(fields):
+    """Pre-encode the 400 body for every non-empty subset of missing fields."""
+    return {
+        frozenset(missing): orjson.dumps({'error': f"Missing required fields: {', '.join(missing)}"})
+        for size in range(1, len(fields) + 1)
+        for missing in combinations(sorted(fields), size)
+    }
+
+
+# Failure bodies are fixed, so they are encoded once here: credential
+# stuffing hammers these paths, and each failure skips dict building and
+# the JSON encoder
+_REGISTER_MISSING_BODIES = _missing_fields_bodies(_REGISTER_FIELDS)
+_LOGIN_MISSING_BODIES = _missing_fields_bodies(_LOGIN_FIELDS)
+_INVALID_CREDENTIALS_BODY = orjson.dumps({'error': 'Invalid email or password'})
+_INACTIVE_BODY = orjson.dumps({'error': 'User account is inactive'})
+
+
+def _auth_error(body: bytes, status: int):
+    """Wrap a pre-encoded JSON error body in a response."""
+    return Response(body, status=status, mimetype='application/json')
+
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -550,7 +1120,7 @@ def register():
 
     Password Handling:
     - Password is NOT returned in response
-    - Flask-Security hashes password with PBKDF2 (configurable)
+    - Password is hashed with Argon2 (SECURITY_PASSWORD_HASH, cost set in app.py)
     - Never store plaintext passwords
 
     Validation:
@@ -558,27 +1128,33 @@ def register():
     - Username: Checked for uniqueness
     - Password: Validated by Flask-Security
     """
-    data = request.get_json()
-    logger.debug(f"Register attempt for email: {data.get('email') if data else 'None'}")
+    # Malformed, missing or non-object JSON reads as an empty body
+    # (-> missing fields 400)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    email = data.get('email')  # bound once: logging and logic below
+    logger.debug("Register attempt for email: %s", email)
 
     # Validate all required fields present
-    if not all(['email' in data, 'password' in data, 'username' in data]):
-        logger.warning("Register: Missing required fields")
-        return jsonify({'error': 'Missing required fields: email, password, username'}), 400
+    missing = _REGISTER_FIELDS.difference(data)
+    if missing:
+        logger.warning("Register: Missing required fields %s", missing)
+        return _auth_error(_REGISTER_MISSING_BODIES[missing], 400)
 
     # Call auth service to create user
     user, message = AuthService.create_user(
-        email=data.get('email'),
-        password=data.get('password'),
-        username=data.get('username')
+        email=email,
+        password=data['password'],
+        username=data['username']
     )
 
     # Check if creation succeeded
     if not user:
-        logger.warning(f"Register failed: {message}")
+        logger.warning("Register failed: %s", message)
         return jsonify({'error': message}), 400
 
-    logger.debug(f"User registered: {user.email}")
+    logger.debug("User registered: %s", user.email)
 
     return jsonify({
         'message': message,
@@ -627,39 +1203,41 @@ def login():
     - Subsequent requests include session cookie
 
     Password Verification:
-    - Uses Flask-Security's verify_password (bcrypt/pbkdf2)
+    - Uses Flask-Security's verify_password (Argon2)
     - Compares provided password against hashed version
     - Constant-time comparison to prevent timing attacks
+    - Unknown emails are checked against a dummy hash (same timing as a
+      wrong password)
     """
-    data = request.get_json()
-    logger.debug(f"Login attempt for email: {data.get('email') if data else 'None'}")
+    # Malformed, missing or non-object JSON reads as an empty body
+    # (-> missing fields 400)
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    email = data.get('email')  # bound once: logging and logic below
+    logger.debug("Login attempt for email: %s", email)
 
     # Validate required fields
-    if not all(['email' in data, 'password' in data]):
-        logger.warning("Login: Missing required fields")
-        return jsonify({'error': 'Missing required fields: email, password'}), 400
+    missing = _LOGIN_FIELDS.difference(data)
+    if missing:
+        logger.warning("Login: Missing required fields %s", missing)
+        return _auth_error(_LOGIN_MISSING_BODIES[missing], 400)
 
-    # Find user by email
-    user = AuthService.get_user_by_email(data.get('email'))
+    # Find user and verify password (one hash check either way)
+    user = AuthService.authenticate(email, data['password'])
 
     if not user:
-        logger.warning(f"Login failed: User not found - {data.get('email')}")
-        return jsonify({'error': 'Invalid email or password'}), 401
-
-    # Verify password using Flask-Security utility
-    if not verify_password(data.get('password'), user.password):
-        logger.warning(f"Login failed: Invalid password - {data.get('email')}")
-        return jsonify({'error': 'Invalid email or password'}), 401
+        logger.warning("Login failed: Invalid email or password - %s", email)
+        return _auth_error(_INVALID_CREDENTIALS_BODY, 401)
 
     # Check if user is active
     if not user.active:
-        logger.warning(f"Login failed: User inactive - {data.get('email')}")
-        return jsonify({'error': 'User account is inactive'}), 403
+        logger.warning("Login failed: User inactive - %s", email)
+        return _auth_error(_INACTIVE_BODY, 403)
 
     # Create session for this user
-    from flask_security import login_user
     login_user(user)
-    logger.debug(f"User logged in: {user.email}")
+    logger.debug("User logged in: %s", user.email)
 
     return jsonify({
         'message': 'Logged in successfully',
@@ -692,8 +1270,7 @@ def logout():
     - Subsequent requests no longer authenticated
     - Redirects to login if accessing protected routes
     """
-    from flask_security import logout_user
-    logger.debug(f"User logging out: {current_user.email}")
+    logger.debug("User logging out: %s", current_user.email)
 
     logout_user()
 
@@ -733,12 +1310,15 @@ def get_current_user():
     - Gets user info for UI display
     - Verifies session cookie is valid
     """
+    # to_dict() is memoized on the user, so a /me poll doesn't walk roles;
+    # orjson writes the ISO 8601
+    user = current_user.to_dict()
     return jsonify({
-        'user_id': current_user.id,
-        'email': current_user.email,
-        'username': current_user.username,
-        'active': current_user.active,
-        'roles': [role.name for role in current_user.roles],
-        'created_at': current_user.created_at.isoformat() if current_user.created_at else None,
-        'last_login_at': current_user.last_login_at.isoformat() if current_user.last_login_at else None
+        'user_id': user['id'],
+        'email': user['email'],
+        'username': user['username'],
+        'active': user['active'],
+        'roles': user['roles'],
+        'created_at': user['created_at'],
+        'last_login_at': user['last_login_at']
     }), 200
\ No newline at end of file
@@ -0,0 +1,474 @@
+"""
+Schema upgrades for databases created by earlier versions of the models.
+
+db.create_all() only creates tables that are missing; it never changes a
+table that already exists. Databases created before a model change are
+brought up to date by upgrade_schema(), which `flask --app wsgi init-db`
+runs right after create_all(). Every step checks whether it is still
+needed, so running init-db again is a no-op.
+
+- SQLite can't alter columns or constraints in place: a table that needs
+  changes is rebuilt from its model (renamed aside, created anew, rows
+  copied, old table dropped) in one transaction with foreign keys off,
+  then checked with PRAGMA foreign_key_check.
+- PostgreSQL tables are changed with ALTER TABLE, in one transaction.
+
+check_schema() runs the same checks at startup (gunicorn.conf.py) and refuses to
+serve from a database that hasn't been upgraded, instead of failing on
+the first query that touches a changed table.
+"""
+
+from contextlib import contextmanager
+from sqlalchemy import inspect as sa_inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+from backend.extensions import business_user as db
+from backend.models import ProduceScan, ScanSession, generate_session_id, roles_users
+
+
+# ==================== CHECKS ====================
+
+def _column_names(inspector, table_name):
+    """Return the set of column names of table_name (empty if it doesn't exist)."""
+    if not inspector.has_table(table_name):
+        return set()
+    return {column['name'] for column in inspector.get_columns(table_name)}
+
+
+def _session_fk_cascades(inspector):
+    """True if produce_scans.session_id's foreign key deletes scans with their session."""
+    return any(
+        fk['referred_table'] == 'scan_sessions'
+        and (fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE'
+        for fk in inspector.get_foreign_keys('produce_scans')
+    )
+
+
+def _naive_timestamp_columns(inspector):
+    """
+    Return (table, column) pairs whose model type is DateTime(timezone=True)
+    but whose database column has no time zone.
+    """
+    naive = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if (
+                isinstance(column.type, db.DateTime) and column.type.timezone
+                and column.name in existing
+                and not getattr(existing[column.name], 'timezone', False)
+            ):
+                naive.append((table.name, column.name))
+    return naive
+
+
+def _pending_upgrades(inspector):
+    """
+    Return the upgrade steps this database still needs, in run order.
+
+    Args:
+        inspector: SQLAlchemy Inspector bound to the database
+
+    Returns:
+        list[str]: Step names (keys of _SQLITE_STEPS / _POSTGRESQL_STEPS)
+    """
+    pending = []
+
+    # Produce names moved into the produce lookup table (produce_id)
+    if 'produce_name' in _column_names(inspector, 'produce_scans'):
+        pending.append('produce_ids')
+
+    # Session counters moved into scan_session_stats
+    if 'total_scanned' in _column_names(inspector, 'scan_sessions'):
+        pending.append('session_stats')
+
+    # Scans are deleted with their session by the database (ON DELETE CASCADE)
+    if inspector.has_table('produce_scans') and not _session_fk_cascades(inspector):
+        pending.append('session_cascade')
+
+    # 64-bit surrogate keys (SQLite keeps INTEGER, see BigIntKey)
+    if inspector.dialect.name == 'postgresql' and any(
+        column['name'] == 'id' and not isinstance(column['type'], db.BigInteger)
+        for table_name in ('scan_sessions', 'produce_scans')
+        if inspector.has_table(table_name)  # Missing: reported by check_schema
+        for column in inspector.get_columns(table_name)
+    ):
+        pending.append('bigint_ids')
+
+    # (user_id, role_id) is roles_users' primary key: no duplicate roles
+    if inspector.has_table('roles_users') and not (
+        inspector.get_pk_constraint('roles_users').get('constrained_columns')
+    ):
+        pending.append('roles_users_pk')
+
+    # Timestamps stored with a time zone (SQLite has none to store)
+    if inspector.dialect.name == 'postgresql' and _naive_timestamp_columns(inspector):
+        pending.append('timestamptz')
+
+    return pending
+
+
+def check_schema():
+    """
+    Raise if the database needs `flask init-db` before the app can use it.
+
+    Raises:
+        RuntimeError: If tables are missing or upgrade steps are pending
+
+    Example:
+        app = create_app('production')
+        with app.app_context():
+            check_schema()
+    """
+    with db.engine.connect() as conn:
+        inspector = sa_inspect(conn)
+        missing = [
+            table.name for table in db.metadata.sorted_tables
+            if not inspector.has_table(table.name)
+        ]
+        pending = _pending_upgrades(inspector)
+
+    if missing or pending:
+        problems = [f"missing tables: {', '.join(missing)}"] if missing else []
+        if pending:
+            problems.append(f"pending upgrades: {', '.join(pending)}")
+        raise RuntimeError(
+            f"Database schema is out of date ({'; '.join(problems)}). "
+            f"Run `flask --app wsgi init-db` to upgrade it."
+        )
+
+
+# ==================== SHARED STEPS ====================
+
+def _adopt_orphan_scans(conn):
+    """
+    Give every scan a session row, ahead of the NOT NULL foreign key.
+
+    Older schemas allowed scans without a session (session_id NULL) and,
+    on SQLite, scans whose session row was gone. Missing session rows are
+    recreated under their old ID; session-less scans get one new session
+    per owner. Each new session is dated by its oldest scan.
+    """
+    conn.execute(text(
+        "INSERT INTO scan_sessions (session_id, user_id, created_at) "
+        "SELECT session_id, MIN(user_id), MIN(scanned_at) FROM produce_scans "
+        "WHERE session_id IS NOT NULL "
+        "AND session_id NOT IN (SELECT session_id FROM scan_sessions) "
+        "GROUP BY session_id"
+    ))
+
+    owners = conn.execute(text(
+        "SELECT DISTINCT user_id FROM produce_scans WHERE session_id IS NULL"
+    )).scalars().all()
+    for user_id in owners:
+        owner_clause = 'user_id IS NULL' if user_id is None else 'user_id = :user_id'
+        session_id = generate_session_id()
+        while conn.execute(
+            text("SELECT 1 FROM scan_sessions WHERE session_id = :session_id"),
+            {'session_id': session_id}
+        ).first():
+            session_id = generate_session_id()
+
+        params = {'session_id': session_id, 'user_id': user_id}
+        conn.execute(text(
+            "INSERT INTO scan_sessions (session_id, user_id, created_at) "
+            "SELECT :session_id, :user_id, MIN(scanned_at) FROM produce_scans "
+            f"WHERE session_id IS NULL AND {owner_clause}"
+        ), params)
+        conn.execute(text(
+            "UPDATE produce_scans SET session_id = :session_id "
+            f"WHERE session_id IS NULL AND {owner_clause}"
+        ), params)
+
+
+def _fill_produce_table(conn):
+    """Insert every produce name used by a scan into the produce table."""
+    conn.execute(text(
+        "INSERT INTO produce (name) "
+        "SELECT DISTINCT produce_name FROM produce_scans "
+        "WHERE produce_name NOT IN (SELECT name FROM produce)"
+    ))
+
+
+def _copy_session_stats(conn):
+    """
+    Copy the counters out of scan_sessions into scan_session_stats.
+
+    Sessions whose counters were never written (NULL) are counted from
+    their scans, with the thresholds of ProduceScan's hybrid properties.
+    """
+    conn.execute(text(
+        "INSERT INTO scan_session_stats "
+        "(session_id, total_scanned, expiring_soon_count, expired_count) "
+        "SELECT s.session_id, "
+        "COALESCE(s.total_scanned, (SELECT COUNT(*) FROM produce_scans p "
+        "WHERE p.session_id = s.session_id)), "
+        "COALESCE(s.expiring_soon_count, (SELECT COUNT(*) FROM produce_scans p "
+        "WHERE p.session_id = s.session_id AND p.shelf_life_days <= 3)), "
+        "COALESCE(s.expired_count, (SELECT COUNT(*) FROM produce_scans p "
+        "WHERE p.session_id = s.session_id AND p.shelf_life_days <= 0)) "
+        "FROM scan_sessions s "
+        "WHERE s.session_id NOT IN (SELECT session_id FROM scan_session_stats)"
+    ))
+
+
+def _delete_incomplete_role_links(conn):
+    """Delete roles_users rows missing a side (the key columns are NOT NULL)."""
+    conn.execute(text(
+        "DELETE FROM roles_users WHERE user_id IS NULL OR role_id IS NULL"
+    ))
+
+
+# ==================== SQLITE ====================
+
+@contextmanager
+def _sqlite_rebuild_transaction(conn):
+    """
+    Run table rebuilds in one transaction, with foreign keys checked at the end.
+
+    Foreign keys are switched off (required while tables are swapped) and
+    legacy_alter_table on (renaming a table aside must not rewrite the
+    REFERENCES clauses of the tables that point at it). The driver's
+    implicit transactions are disabled so the DDL is part of the explicit
+    BEGIN ... COMMIT, and a failed rebuild leaves the database untouched.
+    """
+    dbapi_connection = conn.connection.driver_connection
+    conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+    conn.exec_driver_sql('PRAGMA legacy_alter_table=ON')
+    isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    try:
+        conn.exec_driver_sql('BEGIN')
+        try:
+            yield
+            violations = conn.exec_driver_sql('PRAGMA foreign_key_check').all()
+            if violations:
+                raise RuntimeError(
+                    f"Schema upgrade left {len(violations)} rows with dangling "
+                    f"foreign keys (first: {tuple(violations[0])})"
+                )
+            conn.exec_driver_sql('COMMIT')
+        except BaseException:
+            conn.exec_driver_sql('ROLLBACK')
+            raise
+    finally:
+        dbapi_connection.isolation_level = isolation_level
+        conn.exec_driver_sql('PRAGMA legacy_alter_table=OFF')
+        conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+
+
+def _rebuild_sqlite_table(conn, table, expressions=None):
+    """
+    Recreate table from its current model definition and copy its rows over.
+
+    Args:
+        conn: Connection inside _sqlite_rebuild_transaction()
+        table: The model's Table (columns, constraints and indexes to create)
+        expressions: {column name: SQL expression over the old row, aliased
+                     "old"} for columns that don't copy across unchanged.
+                     Other columns are copied by name; columns the old table
+                     doesn't have take their defaults.
+    """
+    expressions = expressions or {}
+    old_name = f'_old_{table.name}'
+    old_columns = _column_names(sa_inspect(conn), table.name)
+
+    # Index names are database-wide: drop the old ones before recreating them
+    old_indexes = conn.execute(text(
+        "SELECT name FROM sqlite_master "
+        "WHERE type = 'index' AND tbl_name = :table AND sql IS NOT NULL"
+    ), {'table': table.name}).scalars().all()
+    for index_name in old_indexes:
+        conn.exec_driver_sql(f'DROP INDEX "{index_name}"')
+
+    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"')
+    conn.execute(CreateTable(table))
+    for index in table.indexes:
+        conn.execute(CreateIndex(index))
+
+    columns, values = [], []
+    for column in table.columns:
+        if column.name in expressions:
+            values.append(expressions[column.name])
+        elif column.name in old_columns:
+            values.append(f'old."{column.name}"')
+        else:
+            continue
+        columns.append(f'"{column.name}"')
+
+    conn.exec_driver_sql(
+        f'INSERT INTO "{table.name}" ({", ".join(columns)}) '
+        f'SELECT {", ".join(values)} FROM "{old_name}" AS old'
+    )
+    conn.exec_driver_sql(f'DROP TABLE "{old_name}"')
+
+
+def _sqlite_produce_ids(conn):
+    """produce_scans.produce_name -> produce_id (rebuilds produce_scans)."""
+    _fill_produce_table(conn)
+    # The rebuilt table's session_id is NOT NULL with an enforced foreign key
+    _adopt_orphan_scans(conn)
+    _rebuild_sqlite_table(conn, ProduceScan.__table__, {
+        'produce_id': '(SELECT id FROM produce WHERE produce.name = old.produce_name)'
+    })
+
+
+def _sqlite_session_stats(conn):
+    """scan_sessions counters -> scan_session_stats (rebuilds scan_sessions)."""
+    _copy_session_stats(conn)
+    _rebuild_sqlite_table(conn, ScanSession.__table__)
+
+
+def _sqlite_session_cascade(conn):
+    """produce_scans.session_id -> NOT NULL, ON DELETE CASCADE (rebuilds produce_scans)."""
+    # Already rebuilt from the current model by the produce_ids step
+    if _session_fk_cascades(sa_inspect(conn)):
+        return
+    _adopt_orphan_scans(conn)
+    _rebuild_sqlite_table(conn, ProduceScan.__table__)
+
+
+def _sqlite_roles_users_pk(conn):
+    """roles_users -> (user_id, role_id) primary key (rebuilds roles_users)."""
+    _delete_incomplete_role_links(conn)
+    # Keep the first of each duplicate pair
+    conn.execute(text(
+        "DELETE FROM roles_users WHERE rowid NOT IN "
+        "(SELECT MIN(rowid) FROM roles_users GROUP BY user_id, role_id)"
+    ))
+    _rebuild_sqlite_table(conn, roles_users)
+
+
+_SQLITE_STEPS = {
+    'produce_ids': _sqlite_produce_ids,
+    'session_stats': _sqlite_session_stats,
+    'session_cascade': _sqlite_session_cascade,
+    'roles_users_pk': _sqlite_roles_users_pk,
+}
+
+
+# ==================== POSTGRESQL ====================
+
+def _postgresql_produce_ids(conn):
+    """produce_scans.produce_name -> produce_id, in place."""
+    _fill_produce_table(conn)
+    conn.execute(text(
+        "ALTER TABLE produce_scans ADD COLUMN produce_id SMALLINT REFERENCES produce (id)"
+    ))
+    conn.execute(text(
+        "UPDATE produce_scans SET produce_id = produce.id "
+        "FROM produce WHERE produce.name = produce_scans.produce_name"
+    ))
+    conn.execute(text("ALTER TABLE produce_scans ALTER COLUMN produce_id SET NOT NULL"))
+    conn.execute(text("ALTER TABLE produce_scans DROP COLUMN produce_name"))
+
+
+def _postgresql_session_stats(conn):
+    """scan_sessions counters -> scan_session_stats, in place."""
+    _copy_session_stats(conn)
+    conn.execute(text(
+        "ALTER TABLE scan_sessions DROP COLUMN total_scanned, "
+        "DROP COLUMN expiring_soon_count, DROP COLUMN expired_count"
+    ))
+
+
+def _postgresql_session_cascade(conn):
+    """produce_scans.session_id -> NOT NULL, ON DELETE CASCADE, in place."""
+    _adopt_orphan_scans(conn)
+    conn.execute(text("ALTER TABLE produce_scans ALTER COLUMN session_id SET NOT NULL"))
+    for fk in sa_inspect(conn).get_foreign_keys('produce_scans'):
+        if fk['referred_table'] == 'scan_sessions':
+            conn.execute(text(f'ALTER TABLE produce_scans DROP CONSTRAINT "{fk["name"]}"'))
+    conn.execute(text(
+        "ALTER TABLE produce_scans ADD CONSTRAINT produce_scans_session_id_fkey "
+        "FOREIGN KEY (session_id) REFERENCES scan_sessions (session_id) ON DELETE CASCADE"
+    ))
+
+
+def _postgresql_bigint_ids(conn):
+    """scan_sessions.id / produce_scans.id (and their sequences) -> BIGINT."""
+    for table_name in ('scan_sessions', 'produce_scans'):
+        conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN id TYPE BIGINT"))
+        sequence = conn.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': table_name}
+        ).scalar()
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} AS BIGINT"))
+
+
+def _postgresql_roles_users_pk(conn):
+    """roles_users -> (user_id, role_id) primary key, in place."""
+    _delete_incomplete_role_links(conn)
+    # Keep the first of each duplicate pair
+    conn.execute(text(
+        "DELETE FROM roles_users a USING roles_users b "
+        "WHERE a.ctid > b.ctid AND a.user_id = b.user_id AND a.role_id = b.role_id"
+    ))
+    conn.execute(text("ALTER TABLE roles_users ADD PRIMARY KEY (user_id, role_id)"))
+
+
+def _postgresql_timestamptz(conn):
+    """Naive TIMESTAMP columns -> TIMESTAMP WITH TIME ZONE, read as UTC."""
+    # Earlier releases wrote these from datetime.utcnow()
+    for table_name, column_name in _naive_timestamp_columns(sa_inspect(conn)):
+        conn.execute(text(
+            f'ALTER TABLE "{table_name}" ALTER COLUMN "{column_name}" '
+            f'TYPE TIMESTAMP WITH TIME ZONE USING "{column_name}" AT TIME ZONE \'UTC\''
+        ))
+
+
+_POSTGRESQL_STEPS = {
+    'produce_ids': _postgresql_produce_ids,
+    'session_stats': _postgresql_session_stats,
+    'session_cascade': _postgresql_session_cascade,
+    'bigint_ids': _postgresql_bigint_ids,
+    'roles_users_pk': _postgresql_roles_users_pk,
+    'timestamptz': _postgresql_timestamptz,
+}
+
+
+# ==================== UPGRADE ====================
+
+def upgrade_schema():
+    """
+    Bring tables created by earlier versions up to the current models.
+
+    Run after db.create_all() (which creates the tables that are new).
+    Applies each pending step, then creates any model index the database
+    lacks (create_all skips the indexes of tables that already exist).
+
+    Raises:
+        RuntimeError: If steps are pending on a database other than
+                      SQLite or PostgreSQL, or a rebuild breaks a foreign key
+
+    Example:
+        db.create_all()
+        upgrade_schema()
+    """
+    engine = db.engine
+    with engine.connect() as conn:
+        pending = _pending_upgrades(sa_inspect(conn))
+
+    if pending:
+        if engine.dialect.name == 'sqlite':
+            with engine.connect() as conn:
+                with _sqlite_rebuild_transaction(conn):
+                    for step in pending:
+                        _SQLITE_STEPS[step](conn)
+        elif engine.dialect.name == 'postgresql':
+            with engine.begin() as conn:
+                for step in pending:
+                    _POSTGRESQL_STEPS[step](conn)
+        else:
+            raise RuntimeError(
+                f"No schema upgrade for {engine.dialect.name} databases "
+                f"(pending: {', '.join(pending)})"
+            )
+
+    # IF NOT EXISTS rather than checkfirst: reflection can't see expression
+    # indexes such as ix_user_email_lower
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
@@ -6,13 +6,22 @@ This service acts as the business logic layer, coordinating between:
 - DatabaseService: Persists scan results and session data
 
 Architecture: Services → Database separation ensures clean dependency flow
+
+One ProduceScanService per app, created on first use (get_scan_service):
+under gunicorn --preload that is after fork, so each worker builds its own
+AI HTTP client instead of sharing the master's sockets.
 """
 
-from uuid import uuid4
-from backend.services.ai_service import AIService
+import functools
+import hashlib
+import logging
+from flask import current_app
+from backend.services.ai_service import AIService, StorageTipBatcher
+from backend.services.storage_tips import known_storage_tips
 from backend.database import DatabaseService
-from typing import Dict, List
+from typing import Dict, Iterator, List, Union
 
+logger = logging.getLogger(__name__)
 
 class ProduceScanService:
     """
@@ -22,10 +31,27 @@ class ProduceScanService:
     for scanning operations lives here.
     """
 
+    # Distinct produce names whose storage tips are kept in memory
+    STORAGE_TIPS_CACHE_SIZE = 512
+
+    # Stored storage tips older than this are asked for again
+    STORAGE_TIPS_MAX_AGE_DAYS = 30
+
     def __init__(self):
         """Initialize service with AI and database dependencies"""
         self.ai_service = AIService()
         self.db_service = DatabaseService()
+        # Storage tips per normalized produce name (a small, fixed set):
+        # repeat requests skip the AI call, first from memory, then from
+        # the storage_tips table (shared across workers and restarts).
+        # Failed calls raise, so they are never cached. Misses arriving
+        # together share one multi-produce AI call (see StorageTipBatcher)
+        self._tips_batcher = StorageTipBatcher(
+            self.ai_service.generate_storage_recommendations_batch
+        )
+        self._storage_tips = functools.lru_cache(maxsize=self.STORAGE_TIPS_CACHE_SIZE)(
+            self._load_storage_tips
+        )
 
     def start_scan_session(self, user_id: int = None) -> str:
         """
@@ -48,7 +74,8 @@ class ProduceScanService:
         session_id = self.db_service.create_scan_session(user_id=user_id)
         return session_id
 
-    def scan_single_produce(self, image_data: str, session_id: str, user_id: int = None) -> Dict:
+    def scan_single_produce(self, image_data: Union[bytes, str], session_id: str = None,
+                            user_id: int = None) -> Dict:
         """
         Analyze a single produce item from an image.
 
@@ -57,15 +84,21 @@ class ProduceScanService:
         2. Result is saved to database with unique scan ID
         3. Returns combined AI analysis + database record info
 
+        Without a session_id, a new session is created for the scan once
+        the AI has answered, saving the client a separate start_scan_session
+        round-trip (a failed analysis leaves no empty session behind).
+
         Args:
-            image_data: Base64 encoded image (can include data URI prefix)
-            session_id: Current session to group this scan under
+            image_data: Raw image bytes (multipart upload), or a base64
+                        encoded image (can include data URI prefix)
+            session_id: Session to group this scan under (None = new session)
             user_id: Optional user ID for authorization tracking
 
         Returns:
             Dict with structure:
             {
                 'success': bool,
+                'session_id': str (the given or newly created session),
                 'data': {
                     'id': int (database ID),
                     'scan_id': str (unique scan ID),
@@ -74,7 +107,7 @@ class ProduceScanService:
                     'is_expiring_soon': bool,
                     'is_expired': bool,
                     'notes': str,
-                    'scanned_at': ISO datetime string
+                    'scanned_at': datetime (ISO 8601 string once serialized)
                 },
                 'error': str (if failed)
             }
@@ -91,40 +124,42 @@ class ProduceScanService:
         """
         try:
             # Step 1: Analyze produce image with AI vision model
+            # (no DB connection is held while waiting on the AI)
             # Returns: {'produce_name': str, 'shelf_life_days': int, ...}
-            analysis = self.ai_service.analyze_produce_from_image(image_data)
+            self.db_service.release_connection()
+            analysis = self.ai_service.submit_produce_image(image_data)
 
-            # Step 2: Generate unique ID for this scan record
-            scan_id = str(uuid4())[:12]  # e.g., "a1b2c3d4e5f6"
-
-            # Step 3: Prepare data for database storage
+            # Step 2: Prepare data for database storage
             # Combines AI analysis with session/user context
+            # (first scan of a new session: create it now, after the AI)
+            # (scan_id is generated by the ProduceScan column default;
+            # expiry flags are derived from shelf_life_days, not stored)
+            if not session_id:
+                session_id = self.db_service.create_scan_session(user_id=user_id)
             produce_data = {
-                'scan_id': scan_id,
                 'session_id': session_id,
                 'user_id': user_id,
                 'produce_name': analysis['produce_name'],
                 'shelf_life_days': analysis['shelf_life_days'],
-                'is_expiring_soon': analysis['is_expiring_soon'],
-                'is_expired': analysis['is_expired'],
                 'notes': analysis['notes']
             }
 
-            # Step 4: Persist scan to database
+            # Step 3: Persist scan to database
             db_record = self.db_service.save_produce_scan(produce_data)
 
-            # Step 5: Return success response with all details
+            # Step 4: Return success response with all details
             return {
                 'success': True,
+                'session_id': session_id,
                 'data': {
                     'id': db_record.id,
-                    'scan_id': scan_id,
+                    'scan_id': db_record.scan_id,
                     'produce_name': analysis['produce_name'],
                     'shelf_life_days': analysis['shelf_life_days'],
                     'is_expiring_soon': analysis['is_expiring_soon'],
                     'is_expired': analysis['is_expired'],
                     'notes': analysis['notes'],
-                    'scanned_at': db_record.scanned_at.isoformat()
+                    'scanned_at': db_record.scanned_at
                 }
             }
 
@@ -135,15 +170,17 @@ class ProduceScanService:
                 'error': str(e)
             }
 
-    def scan_batch_produce(self, images: List[str], session_id: str, user_id: int = None) -> Dict:
+    def scan_batch_produce(self, images: List[Union[bytes, str]], session_id: str,
+                           user_id: int = None) -> Dict:
         """
         Analyze multiple produce items in a single batch operation.
 
         Processes multiple images and aggregates statistics for efficient
-        updates to the session record.
+        updates to the session record. Identical images are sent to the AI
+        only once; every submitted image still gets its own scan record.
 
         Args:
-            images: List of base64 encoded images
+            images: List of images (raw bytes or base64 strings)
             session_id: Session to group all these scans under
             user_id: Optional user ID for tracking
 
@@ -153,6 +190,7 @@ class ProduceScanService:
                 'success': bool,
                 'session_id': str,
                 'scans': [list of scan records],
+                'failed': [{'index': int, 'error': str}, ...],
                 'summary': {
                     'total_scanned': int,
                     'expiring_soon_count': int,
@@ -162,6 +200,10 @@ class ProduceScanService:
                 'error': str (if failed)
             }
 
+            Images the AI could not analyze are not saved: they are listed
+            in 'failed' by position in images, and left out of 'scans' and
+            the summary. If no image could be analyzed, success is False.
+
         Example:
             result = service.scan_batch_produce(
                 images=[img1, img2, img3],
@@ -170,63 +212,182 @@ class ProduceScanService:
             # Scans all 3 images and updates session counts in one operation
         """
         try:
-            # Step 1: Analyze all images with AI in batch
-            # Returns: {'results': [...], 'summary': {...}}
-            batch_analysis = self.ai_service.batch_analyze_produce_from_images(images)
-
-            # Step 2: Save each result to database individually
-            saved_results = []
-            for analysis in batch_analysis['results']:
-                # Generate unique ID for each scan
-                scan_id = str(uuid4())[:12]
-
-                # Prepare database record
-                produce_data = {
-                    'scan_id': scan_id,
-                    'session_id': session_id,
-                    'user_id': user_id,
-                    'produce_name': analysis['produce_name'],
-                    'shelf_life_days': analysis['shelf_life_days'],
-                    'is_expiring_soon': analysis['is_expiring_soon'],
-                    'is_expired': analysis['is_expired'],
-                    'notes': analysis['notes']
-                }
-
-                # Save and collect result
-                db_record = self.db_service.save_produce_scan(produce_data)
-                saved_results.append(db_record.to_dict())
-
-            # Step 3: Update session with aggregated counts
-            # Avoid querying all scans by using pre-computed batch summary
-            summary = batch_analysis['summary']
-            self.db_service.update_scan_session(
-                session_id,
-                total_scanned=summary['total_scanned'],
-                expiring_soon_count=summary['expiring_soon_count'],
-                expired_count=summary['expired_count']
-            )
+            # Step 1: Analyze each distinct image with AI once
+            # (burst shots of the same item are byte-identical: one AI call,
+            # result reused at every position; no DB connection is held
+            # while waiting on the AI)
+            # Returns: {'results': [...], 'summary': {...}}; only results are used
+            unique_images, positions = self._dedupe_images(images)
+            self.db_service.release_connection()
+            batch_analysis = self.ai_service.batch_analyze_produce_from_images(unique_images)
+            analyses = [batch_analysis['results'][position] for position in positions]
+
+            # Steps 2-4: Save one record per submitted image, return summary
+            return self._save_batch_results(analyses, session_id, user_id)
 
-            # Step 4: Return batch response with all results + summary
+        except Exception as e:
             return {
-                'success': True,
-                'session_id': session_id,
-                'scans': saved_results,
-                'summary': {
-                    'total_scanned': summary['total_scanned'],
-                    'expiring_soon_count': summary['expiring_soon_count'],
-                    'expired_count': summary['expired_count'],
-                    # Healthy = items not expiring and not expired
-                    'healthy_count': summary['total_scanned'] - summary['expiring_soon_count'] - summary[
-                        'expired_count']
-                }
+                'success': False,
+                'error': str(e)
             }
 
+    def scan_batch_produce_stream(self, images: List[Union[bytes, str]], session_id: str,
+                                  user_id: int = None) -> Iterator[Dict]:
+        """
+        Analyze a batch like scan_batch_produce, reporting each image as it
+        completes.
+
+        Yields one 'scan' event per submitted image, in completion order,
+        as soon as its AI analysis is done ('failed' for an image the AI
+        could not analyze). After the last image, the analyzed scans are
+        saved in one transaction (same as scan_batch_produce) and a final
+        'done' event carries the saved records and summary. Failures end
+        the stream with an 'error' event.
+
+        Args:
+            images: List of images (raw bytes or base64 strings)
+            session_id: Session to group all these scans under
+            user_id: Optional user ID for tracking
+
+        Yields:
+            Dict, one of:
+            {'event': 'scan', 'index': int, 'scan': {produce analysis}}
+            {'event': 'failed', 'index': int, 'error': str}
+            {'event': 'done', 'success': True, 'session_id': str,
+             'scans': [...], 'failed': [...], 'summary': {...}}
+            {'event': 'error', 'success': False, 'error': str}
+
+        Example:
+            for event in service.scan_batch_produce_stream(images, 'abc12345'):
+                if event['event'] == 'scan':
+                    render_tile(event['index'], event['scan'])
+        """
+        try:
+            # Identical images are analyzed once; each result is reported
+            # at every position it was submitted at
+            unique_images, positions = self._dedupe_images(images)
+            submitted_at = [[] for _ in unique_images]
+            for index, position in enumerate(positions):
+                submitted_at[position].append(index)
+
+            self.db_service.release_connection()
+            analyses = [None] * len(images)
+            for position, analysis in self.ai_service.iter_analyze_produce_from_images(unique_images):
+                for index in submitted_at[position]:
+                    analyses[index] = analysis
+                    if 'error' in analysis:
+                        yield {'event': 'failed', 'index': index, 'error': analysis['error']}
+                    else:
+                        yield {'event': 'scan', 'index': index, 'scan': analysis}
+
+            result = self._save_batch_results(analyses, session_id, user_id)
+            yield {'event': 'done' if result['success'] else 'error', **result}
+
         except Exception as e:
-            return {
+            yield {
+                'event': 'error',
                 'success': False,
                 'error': str(e)
             }
 
+    def _save_batch_results(self, analyses: List[Dict], session_id: str,
+                            user_id: int = None) -> Dict:
+        """
+        Persist one scan per analysis and build the batch response.
+
+        Failed analyses (AIService placeholders, which carry 'error') are
+        reported under 'failed' instead of being saved.
+
+        Args:
+            analyses: AI results, one per submitted image, in submitted order
+            session_id: Session to group the scans under
+            user_id: Optional user ID for tracking
+
+        Returns:
+            Dict: scan_batch_produce's response (success False only if
+                  every image failed; nothing is written then)
+
+        Raises:
+            Exception: If saving the scans or updating the session fails
+        """
+        # Split failed images off; only analyzed ones are saved and counted
+        analyzed = []
+        failed = []
+        for index, analysis in enumerate(analyses):
+            if 'error' in analysis:
+                failed.append({'index': index, 'error': analysis['error']})
+            else:
+                analyzed.append(analysis)
+
+        # Prepare one database record per analyzed image
+        # (scan IDs are generated for the whole batch by save_produce_scans;
+        # expiry flags are derived from shelf_life_days, not stored)
+        produce_list = [{
+            'session_id': session_id,
+            'user_id': user_id,
+            'produce_name': analysis['produce_name'],
+            'shelf_life_days': analysis['shelf_life_days'],
+            'notes': analysis['notes']
+        } for analysis in analyzed]
+
+        if not produce_list:
+            return {
+                'success': False,
+                'error': 'No image could be analyzed',
+                'failed': failed
+            }
+
+        # Save all records and refresh the session counts in
+        # one transaction (counts cover every scan in the session)
+        db_records = self.db_service.save_scan_batch(produce_list, session_id)
+        saved_results = [db_record.to_dict() for db_record in db_records]
+
+        # Freshness counts over submitted images (the AI summary covers
+        # unique images only). The flags derive from shelf_life_days, so
+        # expired items are a subset of expiring-soon ones
+        total_scanned = len(analyzed)
+        expiring_soon_count = sum(analysis['is_expiring_soon'] for analysis in analyzed)
+        expired_count = sum(analysis['is_expired'] for analysis in analyzed)
+
+        # Return batch response with all results + summary
+        return {
+            'success': True,
+            'session_id': session_id,
+            'scans': saved_results,
+            'failed': failed,
+            'summary': {
+                'total_scanned': total_scanned,
+                'expiring_soon_count': expiring_soon_count,
+                'expired_count': expired_count,
+                # Healthy = items not expiring soon (expired ones included there)
+                'healthy_count': total_scanned - expiring_soon_count
+            }
+        }
+
+    @staticmethod
+    def _dedupe_images(images: List[Union[bytes, str]]):
+        """
+        Collapse byte-identical images, keeping first-seen order.
+
+        Args:
+            images: Submitted images (raw bytes or base64 strings)
+
+        Returns:
+            tuple: (unique_images, positions) where images[i] is
+                   unique_images[positions[i]]
+        """
+        unique_images = []
+        first_position = {}  # content digest -> index into unique_images
+        positions = []
+        for image in images:
+            data = image.encode() if isinstance(image, str) else image
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            if digest not in first_position:
+                first_position[digest] = len(unique_images)
+                unique_images.append(image)
+            positions.append(first_position[digest])
+        return unique_images, positions
+
     def get_session_results(self, session_id: str, user_id: int = None) -> Dict:
         """
         Retrieve all scans from a specific session.
@@ -250,7 +411,7 @@ class ProduceScanService:
             }
         """
         try:
-            # Step 1: Fetch session from database
+            # Step 1: Fetch the session (joined to its stats row)
             session = self.db_service.get_scan_session(session_id)
 
             if not session:
@@ -267,14 +428,12 @@ class ProduceScanService:
                     'error': 'Unauthorized access to this session'
                 }
 
-            # Step 3: Fetch all scans in the session
-            scans = self.db_service.get_session_scans(session_id)
-
-            # Step 4: Return combined response
+            # Step 3: Fetch the scans as plain dicts (column-only SELECT,
+            # no ProduceScan objects) - only once access is allowed
             return {
                 'success': True,
                 'session': session.to_dict(),
-                'scans': [scan.to_dict() for scan in scans]
+                'scans': self.db_service.get_session_scans(session_id)
             }
 
         except Exception as e:
@@ -313,10 +472,11 @@ class ProduceScanService:
                 # Global view: most recent scans from all users
                 scans = self.db_service.get_all_recent_scans(limit=limit)
 
+            # Scans come back already serialized (and cached) from the DB layer
             return {
                 'success': True,
                 'count': len(scans),
-                'scans': [scan.to_dict() for scan in scans]
+                'scans': scans
             }
 
         except Exception as e:
@@ -325,12 +485,34 @@ class ProduceScanService:
                 'error': str(e)
             }
 
+    def export_user_scans(self, user_id: int) -> Iterator[Dict]:
+        """
+        Stream a user's complete scan history, oldest first.
+
+        Unlike get_recent_scans() there is no limit: rows are read from
+        the database in batches as the caller iterates, so the route can
+        encode and send them incrementally.
+
+        Args:
+            user_id: The user whose scans to export
+
+        Returns:
+            Iterator of scan dicts:
+            {'id': int, 'scan_id': str, 'produce_name': str,
+             'shelf_life_days': int, 'scanned_at': datetime}
+
+        Raises:
+            Exception: If the database query fails while iterating
+        """
+        return self.db_service.stream_user_scans(user_id=user_id)
+
     def get_storage_tips(self, produce_name: str) -> Dict:
         """
         Get AI-generated storage recommendations for a produce type.
 
         Uses LangChain to prompt the AI model for storage best practices.
-        This is a public endpoint (no auth required).
+        This is a public endpoint (no auth required). Answers are memoized
+        per produce name (case and surrounding whitespace ignored).
 
         Args:
             produce_name: Name of the produce (e.g., "Apple", "Spinach")
@@ -349,8 +531,12 @@ class ProduceScanService:
             # Returns recommendations on temperature, humidity, container type
         """
         try:
-            # Call AI service to generate recommendations
-            recommendations = self.ai_service.get_storage_recommendations(produce_name)
+            # Call AI service to generate recommendations (or reuse the
+            # answer for this produce); an AI failure gets the fallback text
+            try:
+                recommendations = self._storage_tips(str(produce_name).strip().lower())
+            except Exception as e:
+                recommendations = f"Could not retrieve storage recommendations: {str(e)}"
 
             return {
                 'success': True,
@@ -362,4 +548,106 @@ class ProduceScanService:
             return {
                 'success': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    def stream_storage_tips(self, produce_name: str) -> Iterator[str]:
+        """
+        Stream AI-generated storage recommendations for a produce type.
+
+        Common produce (known_storage_tips(), backend/services/storage_tips.py)
+        or a stored answer is yielded whole, at once. Otherwise the AI
+        answer is passed on as it is written, then stored like
+        get_storage_tips answers. An AI failure before any text yields the
+        same fallback message as get_storage_tips; a failure mid-answer
+        ends the stream.
+
+        Args:
+            produce_name: Name of the produce (e.g., "Apple", "Spinach")
+
+        Yields:
+            str: Successive pieces of the recommendations text
+
+        Example:
+            for text in service.stream_storage_tips("Banana"):
+                print(text, end='')
+        """
+        name = str(produce_name).strip().lower()
+        stored = known_storage_tips(name) or self.db_service.get_storage_tip(
+            name, max_age_days=self.STORAGE_TIPS_MAX_AGE_DAYS
+        )
+        if stored is not None:
+            yield stored
+            return
+
+        # No DB connection is held while the AI writes
+        self.db_service.release_connection()
+        pieces = []
+        try:
+            for text in self.ai_service.stream_storage_recommendations(name):
+                pieces.append(text)
+                yield text
+        except Exception as e:
+            if not pieces:
+                yield f"Could not retrieve storage recommendations: {str(e)}"
+            return
+
+        try:
+            self.db_service.save_storage_tip(name, ''.join(pieces))
+        except Exception as e:
+            logger.warning("stream_storage_tips: could not store tips for %s: %s", name, e)
+
+    def _load_storage_tips(self, produce_name: str) -> str:
+        """
+        Storage tips for a normalized name: the common-produce table, a
+        stored answer, else the AI.
+
+        A fresh AI answer is stored for every worker; failing to store it
+        only costs a later AI call, so the answer is returned regardless.
+        """
+        known = known_storage_tips(produce_name)
+        if known is not None:
+            return known
+
+        stored = self.db_service.get_storage_tip(
+            produce_name, max_age_days=self.STORAGE_TIPS_MAX_AGE_DAYS
+        )
+        if stored is not None:
+            return stored
+
+        # No DB connection is held while waiting on the AI
+        self.db_service.release_connection()
+        recommendations = self._tips_batcher.submit(produce_name)
+        try:
+            self.db_service.save_storage_tip(produce_name, recommendations)
+        except Exception as e:
+            logger.warning("_load_storage_tips: could not store tips for %s: %s", produce_name, e)
+        return recommendations
+
+    def storage_tips_cache_info(self) -> Dict:
+        """
+        Report hit/miss statistics of the storage tips cache.
+
+        Returns:
+            Dict: {'hits': int, 'misses': int, 'maxsize': int, 'currsize': int}
+        """
+        return self._storage_tips.cache_info()._asdict()
+
+
+def get_scan_service() -> ProduceScanService:
+    """
+    Return the current app's ProduceScanService, creating it on first use.
+
+    The instance lives in app.extensions['scan_service']; tests can put a
+    preconfigured (or mocked) service there before making requests.
+
+    Returns:
+        ProduceScanService: The app-wide scan service
+
+    Example:
+        session_id = get_scan_service().start_scan_session(user_id=5)
+    """
+    service = current_app.extensions.get('scan_service')
+    if service is None:
+        # setdefault: two threads racing the first request keep one instance
+        service = current_app.extensions.setdefault('scan_service', ProduceScanService())
+    return service
@@ -13,15 +13,267 @@ Architecture:
 - OpenRouter endpoint (https://openrouter.ai) provides API access to Gemini
 - HumanMessage with image_url supports vision analysis
 - Structured JSON responses enable reliable data extraction
+- One pooled keep-alive HTTP client per service: calls reuse TLS connections
+  and in-flight requests are capped by the pool size
 """
 
 import json
 import os
+import re
 import base64
-from typing import Dict, List
+import binascii
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import httpx
+import orjson
+from cachetools import LRUCache
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from PIL import Image, ImageOps
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.messages import HumanMessage
+from backend.models import EXPIRING_SOON_DAYS
+
+
+# Outbound connection pool for the AI endpoint (per AIService, i.e. per worker)
+HTTP_MAX_CONNECTIONS = 50  # in-flight AI calls; further calls wait for a slot
+HTTP_MAX_KEEPALIVE = 20    # idle connections kept open for reuse
+HTTP_KEEPALIVE_EXPIRY = 60  # seconds an idle connection stays open (httpx default: 5)
+HTTP_MAX_RETRIES = 2       # retried on connection errors, 429 and 5xx
+
+# Images of one batch analyzed concurrently
+BATCH_MAX_WORKERS = 8
+
+# Worker-wide AI call budget, shared by every request and batch: calls past
+# AI_MAX_CONCURRENCY queue here (instead of timing out waiting for a pool
+# connection), and AI_RATE_LIMIT_PER_MINUTE (0 = off) spaces them out
+# before the provider answers 429s
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 16))
+AI_RATE_LIMIT_PER_MINUTE = int(os.getenv('AI_RATE_LIMIT_PER_MINUTE', 0))
+
+# Batch images packed into one AI request (one message, one JSON array back):
+# amortizes per-call overhead and prompt tokens. 1 = one request per image
+# (default: a combined answer is slower than parallel single calls)
+AI_BATCH_IMAGES_PER_CALL = max(1, int(os.getenv('AI_BATCH_IMAGES_PER_CALL', 1)))
+
+# Single scans from concurrent requests arriving within this window share
+# one grouped AI call (up to AI_BATCH_IMAGES_PER_CALL images). Adds up to
+# the window to every single scan's latency; 0 = off (one call per scan)
+AI_COALESCE_WINDOW_MS = int(os.getenv('AI_COALESCE_WINDOW_MS', 0))
+
+# Images are downscaled to fit AI_IMAGE_MAX_SIDE px and re-encoded as JPEG
+# before upload: vision tokens, upload size and latency grow with
+# resolution, and a phone photo carries far more detail than freshness
+# grading needs. Smaller images are sent unchanged (0 = never resize)
+AI_IMAGE_MAX_SIDE = int(os.getenv('AI_IMAGE_MAX_SIDE', 512))
+AI_IMAGE_JPEG_QUALITY = 80
+AI_IMAGE_DETAIL = 'low'  # OpenAI-style per-image detail hint
+
+# Leading bytes of the image formats the vision model accepts. Anything
+# else is refused before upload (it would be billed, then fail)
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG', 'image/png'),
+    (b'GIF8', 'image/gif'),
+)
+
+# Native JSON mode for answers that are a single JSON object (OpenAI-style
+# response_format, passed through by OpenRouter). Grouped answers are
+# arrays, which JSON mode doesn't allow, so those still use the prompt alone
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Markdown fence some models wrap JSON answers in, even when told not to
+_CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|$)", re.DOTALL)
+
+# Analyses kept per image content (retries, duplicate uploads): an identical
+# image is answered from memory instead of another AI call
+ANALYSIS_CACHE_SIZE = 1024
+
+# Storage-tip micro-batching: concurrent tip requests arriving within the
+# window share one multi-produce prompt (0 = every request asks alone)
+STORAGE_TIPS_BATCH_SIZE = 16
+STORAGE_TIPS_BATCH_WINDOW_MS = int(os.getenv('STORAGE_TIPS_BATCH_WINDOW_MS', 75))
+
+
+class _RateLimiter:
+    """
+    Token bucket: at most `rate` calls per `per` seconds, bursts up to `rate`.
+
+    acquire() blocks until a token is available; under gevent workers the
+    lock and sleep are cooperative.
+    """
+
+    def __init__(self, rate: int, per: float = 60.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until the bucket has refilled enough."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.rate, self._tokens + (now - self._updated) * self.rate / self.per
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.per / self.rate
+            time.sleep(wait)
+
+
+class RequestBatcher:
+    """
+    Collects concurrent requests into one AI call.
+
+    The first request of a window starts a timer; every request arriving
+    before it fires (or until max_batch distinct keys are queued) is
+    answered by a single fetch_batch(keys) call returning {key: result}.
+    Callers block on their own Future, so the API stays synchronous.
+    Repeated keys in a window are asked once. A key the batch answer
+    leaves out, or a failed call, raises for the affected callers; an
+    Exception given as a key's result is raised for that key only.
+    """
+
+    def __init__(self, fetch_batch, max_batch: int, max_wait_ms: int):
+        """
+        Args:
+            fetch_batch: Callable taking a list of keys, returning {key: result}
+            max_batch: Distinct keys that trigger an immediate dispatch
+            max_wait_ms: Longest a request waits for others to join its batch
+        """
+        self.fetch_batch = fetch_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending = {}  # key -> [Future, ...]
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, key):
+        """Return the result for key, possibly fetched alongside others."""
+        if self.max_wait <= 0:
+            return self._result(key, self.fetch_batch([key]))
+
+        future = Future()
+        with self._lock:
+            self._pending.setdefault(key, []).append(future)
+            if len(self._pending) >= self.max_batch:
+                # Full batch: dispatch now from this request
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.max_wait, self._flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        if batch:
+            self._dispatch(batch)
+        return future.result()
+
+    def _missing(self, key) -> Exception:
+        """Error for a key the batch answer left out."""
+        return ValueError("No result returned for request")
+
+    def _result(self, key, results):
+        """Pick key's result out of a batch answer, raising if it failed."""
+        result = results.get(key)
+        if isinstance(result, Exception):
+            raise result
+        if not result:
+            raise self._missing(key)
+        return result
+
+    def _take(self):
+        """Detach the queued requests (caller holds the lock)."""
+        batch, self._pending = self._pending, {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        # Timer callback: the window is over, send whatever has queued
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        """Fetch results for every queued key and resolve the waiting Futures."""
+        try:
+            results = self.fetch_batch(list(batch))
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(e)
+            return
+
+        for key, futures in batch.items():
+            try:
+                result = self._result(key, results)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future in futures:
+                    future.set_result(result)
+
+
+class StorageTipBatcher(RequestBatcher):
+    """
+    Collects concurrent storage-tip requests into one AI call.
+
+    Keys are produce names; fetch_batch(names) returns {name: tips}.
+    """
+
+    def __init__(self, fetch_batch, max_batch: int = STORAGE_TIPS_BATCH_SIZE,
+                 max_wait_ms: int = STORAGE_TIPS_BATCH_WINDOW_MS):
+        super().__init__(fetch_batch, max_batch, max_wait_ms)
+
+    def _missing(self, key) -> Exception:
+        return ValueError(f"No storage tips returned for {key}")
+
+
+class ProduceResult(BaseModel):
+    """
+    Schema of one produce analysis returned by the vision model.
+
+    Built once at import, so validating an answer is a single compiled
+    pass: required fields are checked, types are coerced, and
+    shelf_life_days is clamped to [0, 30] (AI estimates can fall outside
+    reasonable bounds). Unknown keys the model adds are dropped.
+
+    The expiry flags are derived from the clamped shelf life with the
+    same thresholds as ProduceScan, so an answer like
+    {"shelf_life_days": 100, "is_expired": true} can't contradict itself
+    or the stored scan.
+    """
+
+    produce_name: str
+    shelf_life_days: int
+    is_expiring_soon: bool = False
+    is_expired: bool = False
+    notes: str
+
+    @field_validator('shelf_life_days', mode='before')
+    @classmethod
+    def _clamp_shelf_life(cls, value):
+        return max(0, min(30, int(value)))
+
+    @model_validator(mode='after')
+    def _derive_expiry_flags(self):
+        self.is_expiring_soon = self.shelf_life_days <= EXPIRING_SOON_DAYS
+        self.is_expired = self.shelf_life_days <= 0
+        return self
 
 
 class AIService:
@@ -37,13 +289,86 @@ class AIService:
     access to frontier vision models (Gemini 2 Flash).
     """
 
-    def __init__(self):
+    # Prompts are built once and shared by every call. Each message puts
+    # the fixed text first and the images last, so consecutive calls share
+    # a prefix the provider can serve from its prompt cache
+    _PRODUCE_PROMPT_PART = {
+        "type": "text",
+        # Detailed system prompt for consistent produce analysis
+        "text": """You are an expert food scientist analyzing produce freshness from images.
+
+Analyze the produce in this image and return a JSON response with EXACTLY this structure:
+{
+    "produce_name": "name of the produce identified",
+    "shelf_life_days": estimated days until expiration (integer, minimum 0),
+    "is_expiring_soon": true if 3 days or less remaining, false otherwise,
+    "is_expired": true if 0 or fewer days, false otherwise,
+    "notes": "brief assessment of freshness based on visual appearance"
+}
+
+Rules:
+- shelf_life_days must be an integer between 0 and 30
+- is_expiring_soon is true when shelf_life_days <= 3
+- is_expired is true when shelf_life_days <= 0
+- Analyze based on color, texture, visible damage, ripeness level
+- Provide realistic estimates based on typical produce shelf lives
+- Return ONLY valid JSON, no additional text"""
+    }
+    _PRODUCE_GROUP_PROMPT_PART = {
+        "type": "text",
+        "text": """You are an expert food scientist analyzing produce freshness from images.
+
+You will receive several images, numbered from 1. Analyze the produce in each image
+and return a JSON array with EXACTLY one object per image, in image order, each with this structure:
+{
+    "produce_name": "name of the produce identified",
+    "shelf_life_days": estimated days until expiration (integer, minimum 0),
+    "is_expiring_soon": true if 3 days or less remaining, false otherwise,
+    "is_expired": true if 0 or fewer days, false otherwise,
+    "notes": "brief assessment of freshness based on visual appearance"
+}
+
+Rules:
+- shelf_life_days must be an integer between 0 and 30
+- is_expiring_soon is true when shelf_life_days <= 3
+- is_expired is true when shelf_life_days <= 0
+- Analyze based on color, texture, visible damage, ripeness level
+- Provide realistic estimates based on typical produce shelf lives
+- Return ONLY the valid JSON array, no additional text"""
+    }
+
+    # Storage tips prompts (one produce / several as one JSON object)
+    _STORAGE_PROMPT = PromptTemplate(
+        input_variables=["produce_name"],
+        template="""As a food storage expert, provide brief storage recommendations for {produce_name}.
+            Keep response to 2-3 sentences maximum.
+            Focus on: optimal temperature, humidity, container type, and any special handling."""
+    )
+    _STORAGE_BATCH_PROMPT = PromptTemplate(
+        input_variables=["produce_names"],
+        template="""As a food storage expert, provide brief storage recommendations for each of: {produce_names}.
+            Keep each recommendation to 2-3 sentences maximum.
+            Focus on: optimal temperature, humidity, container type, and any special handling.
+            Respond with ONLY a JSON object mapping each name exactly as given to its recommendations, no other text."""
+    )
+
+    def __init__(self, max_concurrency: int = AI_MAX_CONCURRENCY,
+                 rate_limit_per_minute: int = AI_RATE_LIMIT_PER_MINUTE,
+                 images_per_call: int = AI_BATCH_IMAGES_PER_CALL,
+                 coalesce_window_ms: int = AI_COALESCE_WINDOW_MS):
         """
         Initialize LLM client with OpenRouter configuration.
 
         Expects OPENROUTER_API_KEY env variable to be set.
         Uses Gemini 2 Flash for fast, cost-effective vision analysis.
 
+        Args:
+            max_concurrency: Most AI calls in flight at once from this service
+            rate_limit_per_minute: Most AI calls started per minute (0 = no limit)
+            images_per_call: Batch images sent together in one AI call
+            coalesce_window_ms: How long a single scan waits for concurrent
+                                ones to share its AI call (0 = never)
+
         Raises:
             ValueError: If OPENROUTER_API_KEY not found in environment
         """
@@ -52,6 +377,17 @@ class AIService:
         if not self.api_key:
             raise ValueError("OPENROUTER_API_KEY not set in environment variables")
 
+        # Keep-alive connection pool shared by every call from this service:
+        # no TCP+TLS handshake per scan, bounded concurrent requests. Idle
+        # connections outlive the usual gap between a user's scans
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+
         # Initialize LangChain ChatOpenAI client
         # Note: Despite the name, ChatOpenAI supports any OpenAI-compatible endpoint
         self.llm = ChatOpenAI(
@@ -59,30 +395,215 @@ class AIService:
             api_key=self.api_key,
             base_url="https://openrouter.ai/api/v1",  # OpenRouter API endpoint
             temperature=0.3,  # Lower temp = more deterministic/consistent responses
-            max_tokens=2000  # Sufficient for JSON response + reasoning
+            max_tokens=2000,  # Sufficient for JSON response + reasoning
+            max_retries=HTTP_MAX_RETRIES,
+            http_client=self.http_client
         )
 
-    def analyze_produce_from_image(self, image_data: str) -> Dict:
+        # Call budget shared by all requests served by this service
+        self._call_slots = threading.BoundedSemaphore(max_concurrency)
+        self._rate_limiter = _RateLimiter(rate_limit_per_minute) if rate_limit_per_minute else None
+        self.images_per_call = images_per_call
+
+        # Concurrent single scans share grouped calls (see submit_produce_image).
+        # Keys are the raw image bytes, so identical uploads are sent once
+        self._image_batcher = RequestBatcher(
+            self._analyze_image_batch, max_batch=images_per_call,
+            max_wait_ms=coalesce_window_ms
+        ) if coalesce_window_ms > 0 and images_per_call > 1 else None
+
+        # prompt | llm chains by name (see _chain)
+        self._chains = {}
+
+        # Successful analyses by image digest (failures are never cached)
+        self._analysis_cache = LRUCache(maxsize=ANALYSIS_CACHE_SIZE)
+        self._analysis_cache_lock = threading.Lock()
+
+    def _chain(self, name: str, prompt_template: PromptTemplate):
+        """
+        Return prompt_template | self.llm, composed on first use.
+
+        The chain is rebuilt only if self.llm has been replaced since.
+        """
+        chain = self._chains.get(name)
+        if chain is None or chain.last is not self.llm:
+            chain = self._chains[name] = prompt_template | self.llm
+        return chain
+
+    def _invoke(self, runnable, payload, **kwargs):
+        """Invoke an LLM runnable within the concurrency and rate budget."""
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        with self._call_slots:
+            return runnable.invoke(payload, **kwargs)
+
+    @staticmethod
+    def _strip_code_fence(content: str) -> str:
+        """Remove a markdown ```json ... ``` fence around a JSON answer."""
+        if not content.startswith("```"):
+            # Well-behaved answer: at most a stray closing fence
+            return content[:-3].rstrip() if content.endswith("```") else content
+
+        # One pass: body up to the closing fence (or the end, if the
+        # answer was cut off before it)
+        return _CODE_FENCE_RE.match(content).group(1)
+
+    @staticmethod
+    def _image_key(image_data: Union[bytes, str]) -> bytes:
+        """Content digest of an image, the analysis cache key."""
+        if isinstance(image_data, str):
+            # One encode, then hash past any data URI prefix through a view
+            encoded = image_data.encode()
+            start = encoded.find(b',') + 1 if image_data.startswith('data:') else 0
+            return hashlib.blake2b(memoryview(encoded)[start:], digest_size=16).digest()
+        return hashlib.blake2b(image_data, digest_size=16).digest()
+
+    def _cached_analysis(self, key: bytes):
+        """Return a copy of the cached analysis for key, or None."""
+        with self._analysis_cache_lock:
+            analysis = self._analysis_cache.get(key)
+        return dict(analysis) if analysis is not None else None
+
+    def _remember_analysis(self, key: bytes, analysis: Dict) -> Dict:
+        """Cache a successful analysis under key and return it."""
+        with self._analysis_cache_lock:
+            self._analysis_cache[key] = dict(analysis)
+        return analysis
+
+    @staticmethod
+    def _validated_produce(produce_data: Dict) -> Dict:
+        """
+        Check one parsed produce answer and clamp its shelf life.
+
+        Raises:
+            ValueError: If a required field is missing or has a bad value
+        """
+        try:
+            return ProduceResult.model_validate(produce_data).model_dump()
+        except ValidationError as e:
+            keys = produce_data.keys() if isinstance(produce_data, dict) else type(produce_data)
+            raise ValueError(f"Invalid fields in response. Got: {keys}: {e}") from None
+
+    @staticmethod
+    def _preprocess_image(image_data: bytes) -> bytes:
+        """
+        Downscale an image to fit AI_IMAGE_MAX_SIDE and re-encode it as JPEG.
+
+        JPEGs are decoded at reduced scale (draft mode), so large photos
+        are never fully decompressed. EXIF rotation is applied before the
+        orientation tag is dropped. Images already within the limit, and
+        anything Pillow can't read, are returned unchanged (the model gets
+        the original rather than an error).
+
+        Args:
+            image_data: Raw image bytes
+
+        Returns:
+            bytes: JPEG bytes, or image_data unchanged
+        """
+        if not AI_IMAGE_MAX_SIDE:
+            return image_data
+        try:
+            with Image.open(io.BytesIO(image_data)) as image:
+                if max(image.size) <= AI_IMAGE_MAX_SIDE:
+                    return image_data
+                image.draft('RGB', (AI_IMAGE_MAX_SIDE, AI_IMAGE_MAX_SIDE))
+                image = ImageOps.exif_transpose(image).convert('RGB')
+                image.thumbnail((AI_IMAGE_MAX_SIDE, AI_IMAGE_MAX_SIDE), Image.LANCZOS)
+                output = io.BytesIO()
+                image.save(output, format='JPEG', quality=AI_IMAGE_JPEG_QUALITY)
+                return output.getvalue()
+        except Exception:
+            return image_data
+
+    @staticmethod
+    def _image_mime_type(image_data: bytes) -> Optional[str]:
+        """MIME type of raw image bytes by magic number, or None if unsupported."""
+        if image_data[:4] == b'RIFF' and image_data[8:12] == b'WEBP':
+            return 'image/webp'
+        for signature, mime_type in IMAGE_SIGNATURES:
+            if image_data.startswith(signature):
+                return mime_type
+        return None
+
+    @staticmethod
+    def _check_image(image_data: Union[bytes, str]) -> None:
+        """
+        Refuse raw bytes that are not a JPEG, PNG, WebP or GIF image.
+
+        Only the leading bytes are looked at, so junk is rejected in
+        microseconds instead of after an upload and an AI call. Routes
+        pass raw bytes (JSON images are base64-decoded, and refused if
+        that fails, before this point); strings are forwarded as before.
+
+        Raises:
+            ValueError: If image_data doesn't start with a known signature
+        """
+        if isinstance(image_data, bytes) and AIService._image_mime_type(image_data[:16]) is None:
+            raise ValueError("Not a supported image (expected JPEG, PNG, WebP or GIF)")
+
+    @staticmethod
+    def _image_data_uri(image_data: Union[bytes, str]) -> str:
+        """
+        Turn an uploaded image into a data URI for the vision model.
+
+        The image is downscaled first (see _preprocess_image).
+
+        Args:
+            image_data: Raw image bytes (what the routes pass), or a base64
+                        string with or without a data URI prefix
+
+        Returns:
+            str: "data:<mime>;base64,<data>"
+        """
+        if isinstance(image_data, str):
+            # Input can be: "data:image/jpeg;base64,/9j/4AAQ..." or just "/9j/4AAQ..."
+            # Only the payload is decoded; the string itself is reused as
+            # the URI when the image needs no resizing (no multi-MB copies)
+            is_uri = image_data.startswith('data:')
+            start = image_data.find(',') + 1 if is_uri else 0
+            try:
+                # a2b_base64 reads an ASCII str in place (b64decode would
+                # first encode it to a bytes copy)
+                raw = binascii.a2b_base64(image_data[start:] if start else image_data)
+            except binascii.Error:
+                raw = None
+            resized = AIService._preprocess_image(raw) if raw is not None else None
+            if resized is None or resized is raw:
+                # Unchanged (or not decodable here - the model reports it)
+                return image_data if is_uri else 'data:image/jpeg;base64,' + image_data
+            image_data = resized
+        else:
+            image_data = AIService._preprocess_image(image_data)
+
+        # Raw bytes: label by magic number (JPEG unless PNG/WebP/GIF)
+        mime_type = AIService._image_mime_type(image_data) or 'image/jpeg'
+        return f"data:{mime_type};base64,{base64.b64encode(image_data).decode('ascii')}"
+
+    def analyze_produce_from_image(self, image_data: Union[bytes, str]) -> Dict:
         """
         Analyze a single produce item from a base64 encoded image.
 
         Vision Analysis Process:
-        1. Parse base64 image data (handle data URI prefix)
+        1. Encode raw bytes, or parse base64 image data (handle data URI prefix)
         2. Create HumanMessage with image_url for vision processing
         3. Prompt AI to analyze produce freshness visually
         4. Extract structured JSON response
         5. Validate all required fields present
         6. Ensure numeric values in valid ranges
 
+        Results are cached by image content (blake2b digest), so an
+        identical image is answered without another AI call.
+
         Freshness Rules:
         - is_expiring_soon: true if shelf_life_days <= 3
         - is_expired: true if shelf_life_days <= 0
         - shelf_life_days: clamped to [0, 30] range
 
         Args:
-            image_data: Base64 encoded image string
-                       Can have data URI prefix (data:image/jpeg;base64,XXX)
-                       or just raw base64 (XXX)
+            image_data: Raw image bytes (multipart upload), or a base64
+                       encoded image string, with a data URI prefix
+                       (data:image/jpeg;base64,XXX) or just raw base64 (XXX)
 
         Returns:
             Dict with structure:
@@ -109,51 +630,30 @@ class AIService:
             # }
         """
         try:
-            # Step 1: Clean image data - handle data URI prefix
-            # Input can be: "data:image/jpeg;base64,/9j/4AAQ..."
-            # or just: "/9j/4AAQ..."
-            if ',' in image_data:
-                # Remove data URI prefix (everything before comma)
-                image_data = image_data.split(',')[1]
-
-            # Step 2: Create vision message with image
-            # HumanMessage supports multimodal content (text + images)
-            message = HumanMessage(
-                content=[
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{image_data}"
-                        }
-                    },
-                    {
-                        "type": "text",
-                        # Detailed system prompt for consistent produce analysis
-                        "text": """You are an expert food scientist analyzing produce freshness from images.
+            # Step 0: Refuse non-images before any upload; reuse the answer
+            # for an image analyzed before
+            self._check_image(image_data)
+            key = self._image_key(image_data)
+            cached = self._cached_analysis(key)
+            if cached is not None:
+                return cached
 
-Analyze the produce in this image and return a JSON response with EXACTLY this structure:
-{
-    "produce_name": "name of the produce identified",
-    "shelf_life_days": estimated days until expiration (integer, minimum 0),
-    "is_expiring_soon": true if 3 days or less remaining, false otherwise,
-    "is_expired": true if 0 or fewer days, false otherwise,
-    "notes": "brief assessment of freshness based on visual appearance"
-}
+            # Step 1: Build the data URI the vision endpoint expects
+            # (raw upload bytes are base64-encoded exactly once, here)
+            image_url = self._image_data_uri(image_data)
 
-Rules:
-- shelf_life_days must be an integer between 0 and 30
-- is_expiring_soon is true when shelf_life_days <= 3
-- is_expired is true when shelf_life_days <= 0
-- Analyze based on color, texture, visible damage, ripeness level
-- Provide realistic estimates based on typical produce shelf lives
-- Return ONLY valid JSON, no additional text"""
-                    }
-                ]
-            )
+            # Step 2: Create vision message: the fixed prompt first, the
+            # image (the only part that varies) last
+            # HumanMessage supports multimodal content (text + images)
+            message = HumanMessage(content=[
+                self._PRODUCE_PROMPT_PART,
+                {"type": "image_url", "image_url": {"url": image_url, "detail": AI_IMAGE_DETAIL}},
+            ])
 
-            # Step 3: Invoke LLM with image and prompt
+            # Step 3: Invoke LLM with image and prompt, in JSON mode (the
+            # provider emits a bare JSON object, no fences or prose)
             # LangChain handles API call, token counting, etc.
-            response = self.llm.invoke([message])
+            response = self._invoke(self.llm, [message], response_format=JSON_RESPONSE_FORMAT)
 
             # Step 4: Extract content from response object
             # Response is an AIMessage object, extract .content attribute
@@ -173,58 +673,82 @@ Rules:
 
             # Step 7: Strip markdown code blocks if LLM wrapped JSON in ```json ... ```
             # Some models do this even when told not to
-            if content.startswith("```"):
-                # Remove opening markdown fence
-                content = content.split("```", 2)[1]
-                # Remove language specifier (json)
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-
-            if content.endswith("```"):
-                # Remove closing fence
-                content = content[:-3].strip()
-
-            # Step 8: Parse JSON response
-            # With error handling to show what we got if parsing fails
+            content = self._strip_code_fence(content)
+
+            # Step 8: Parse JSON response (orjson; its decode error is a
+            # json.JSONDecodeError). Show what we got if parsing fails
             try:
-                produce_data = json.loads(content)
+                produce_data = orjson.loads(content)
             except json.JSONDecodeError as e:
                 # Include first 500 chars of invalid response for debugging
                 raise ValueError(f"AI response is not valid JSON. Response: {content[:500]}") from e
 
-            # Step 9: Validate required fields present
-            # Ensures response has exactly the fields we expect
-            required_fields = ['produce_name', 'shelf_life_days', 'is_expiring_soon', 'is_expired', 'notes']
-            if not all(field in produce_data for field in required_fields):
-                raise ValueError(f"Missing required fields in response. Got: {produce_data.keys()}")
-
-            # Step 10: Clamp shelf_life_days to valid range [0, 30]
-            # Handles cases where AI estimates outside reasonable bounds
-            produce_data['shelf_life_days'] = max(0, min(30, int(produce_data['shelf_life_days'])))
-
-            # Step 11: Return validated, cleaned response
-            return produce_data
+            # Steps 9-11: Validate required fields, clamp shelf life, return
+            # (and remember the answer for this image)
+            return self._remember_analysis(key, self._validated_produce(produce_data))
 
         except json.JSONDecodeError as e:
             raise Exception(f"Failed to parse AI response as JSON: {str(e)}")
         except Exception as e:
             raise Exception(f"Error analyzing produce image: {str(e)}")
 
-    def batch_analyze_produce_from_images(self, images: List[str]) -> Dict:
+    def submit_produce_image(self, image_data: Union[bytes, str]) -> Dict:
+        """
+        Analyze one produce image, sharing the AI call with concurrent scans.
+
+        With coalescing enabled (coalesce_window_ms > 0 and
+        images_per_call > 1), raw-byte images from concurrent requests
+        that arrive within the window are sent as one grouped call (see
+        _analyze_group) and each caller gets its own result. Otherwise,
+        and for cached images, this is analyze_produce_from_image.
+
+        Args:
+            image_data: Raw image bytes, or a base64 string
+
+        Returns:
+            Dict: Same structure as analyze_produce_from_image
+
+        Raises:
+            Exception: If image analysis fails
+        """
+        if self._image_batcher is None or not isinstance(image_data, bytes):
+            return self.analyze_produce_from_image(image_data)
+
+        self._check_image(image_data)
+        cached = self._cached_analysis(self._image_key(image_data))
+        if cached is not None:
+            return cached
+        return dict(self._image_batcher.submit(image_data))
+
+    def _analyze_image_batch(self, images: List[bytes]) -> Dict[bytes, Union[Dict, Exception]]:
+        """Coalesced fetch: {image: analysis, or the Exception it failed with}."""
+        analyses = self._analyze_group(images, [self._image_key(image) for image in images])
+        return {
+            image: Exception(f"Error analyzing produce image: {analysis['error']}")
+            if 'error' in analysis else analysis
+            for image, analysis in zip(images, analyses)
+        }
+
+    def batch_analyze_produce_from_images(self, images: List[Union[bytes, str]]) -> Dict:
         """
         Analyze multiple produce images in a batch.
 
-        Processes each image sequentially (not parallelized, but could be optimized).
+        Images are analyzed concurrently (up to BATCH_MAX_WORKERS at a time),
+        so a batch takes about as long as its slowest AI call rather than
+        the sum of them. Results keep the input order.
         Aggregates freshness statistics for efficient session updates.
 
         Error Handling:
         - If an image fails to analyze, inserts placeholder result
         - Continues processing remaining images
-        - Includes error message in notes field
+        - Includes error message in notes field, and in an 'error' key
+          that only placeholders carry
+        - Transient API errors (429, 5xx, connection) are first retried
+          with backoff by the client (HTTP_MAX_RETRIES)
 
         Args:
-            images: List of base64 encoded image strings
+            images: List of images (raw bytes or base64 strings, as for
+                    analyze_produce_from_image)
 
         Returns:
             Dict with structure:
@@ -246,44 +770,248 @@ Rules:
             # Processes all 3 images, returns aggregated results
         """
         results = []
-        expiring_soon_count = 0
-        expired_count = 0
-
-        # Process each image
-        for image_data in images:
-            try:
-                # Analyze individual image
-                analysis = self.analyze_produce_from_image(image_data)
-                results.append(analysis)
-
-                # Tally expiring soon items
-                if analysis.get('is_expiring_soon'):
-                    expiring_soon_count += 1
 
-                # Tally expired items
-                if analysis.get('is_expired'):
-                    expired_count += 1
+        # Process images concurrently (I/O bound: each worker waits on the API)
+        # Threads become greenlets under gunicorn's gevent workers
+        if images:
+            results = [None] * len(images)
+            for index, analysis in self.iter_analyze_produce_from_images(images):
+                results[index] = analysis
 
-            except Exception as e:
-                # If analysis fails, add error placeholder
-                # This allows batch to continue even if one image fails
-                results.append({
-                    'produce_name': 'Unknown',
-                    'shelf_life_days': 0,
-                    'is_expiring_soon': True,  # Treat as expiring for safety
-                    'is_expired': False,
-                    'notes': f'Error analyzing image: {str(e)}'
-                })
-                expiring_soon_count += 1  # Count failed images as "expiring soon"
-
-        # Return results + computed summary statistics
+        # Summary statistics in one post-pass over analyzed images
+        # (error placeholders are not counted as expiring or expired)
+        analyzed = [analysis for analysis in results if 'error' not in analysis]
         return {
             'results': results,
             'summary': {
                 'total_scanned': len(images),
-                'expiring_soon_count': expiring_soon_count,
-                'expired_count': expired_count
+                'expiring_soon_count': sum(analysis['is_expiring_soon'] for analysis in analyzed),
+                'expired_count': sum(analysis['is_expired'] for analysis in analyzed)
+            }
+        }
+
+    def iter_analyze_produce_from_images(self, images: List[Union[bytes, str]]
+                                         ) -> Iterator[Tuple[int, Dict]]:
+        """
+        Analyze multiple produce images, yielding each result as it completes.
+
+        Same concurrency and error placeholders as
+        batch_analyze_produce_from_images, but results arrive in completion
+        order (fastest first) instead of after the slowest image. If the
+        consumer stops early (client disconnected), images not yet sent to
+        the AI are dropped; calls already in flight finish in the background.
+
+        With images_per_call > 1, consecutive images are sent in groups of
+        that size, one AI call per group (see _analyze_group); a group's
+        results arrive together. Images already in the analysis cache are
+        yielded first and never sent.
+
+        Args:
+            images: List of images (raw bytes or base64 strings)
+
+        Yields:
+            tuple: (index into images, produce_data dict)
+
+        Example:
+            for index, analysis in ai_service.iter_analyze_produce_from_images(images):
+                print(index, analysis['produce_name'])
+        """
+        if not images:
+            return
+
+        keys = [self._image_key(image) for image in images]
+        pending = []  # indexes of images not answered from the cache
+        for index, key in enumerate(keys):
+            cached = self._cached_analysis(key)
+            if cached is not None:
+                yield index, cached
+                continue
+            try:
+                self._check_image(images[index])
+            except ValueError:
+                # Not an image: error placeholder now, never part of an AI call
+                yield index, self._analyze_or_placeholder(images[index])
+                continue
+            pending.append(index)
+        if not pending:
+            return
+
+        size = self.images_per_call
+        groups = [pending[start:start + size] for start in range(0, len(pending), size)]
+        pool = ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(groups)))
+        try:
+            futures = {
+                pool.submit(self._analyze_group,
+                            [images[index] for index in group],
+                            [keys[index] for index in group]): group
+                for group in groups
+            }
+            for future in as_completed(futures):
+                yield from zip(futures[future], future.result())
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _analyze_group(self, images: List[Union[bytes, str]], keys: List[bytes]) -> List[Dict]:
+        """
+        Analyze a group of batch images with one AI call.
+
+        All images go into a single message and the model answers with a
+        JSON array, one object per image, in order. If that call fails or
+        its answer can't be matched to the images (not an array, wrong
+        length, an invalid item), the group falls back to one call per
+        image, so one bad combined answer costs retries, not results.
+
+        Args:
+            images: Batch images (one image = a regular call)
+            keys: The images' analysis cache keys (_image_key)
+
+        Returns:
+            List[Dict]: One produce_data dict (or error placeholder) per image
+        """
+        if len(images) == 1:
+            return [self._analyze_or_placeholder(images[0])]
+
+        try:
+            content = [
+                self._PRODUCE_GROUP_PROMPT_PART,
+                {"type": "text", "text": f"There are {len(images)} images: return exactly {len(images)} objects."},
+            ]
+            for number, image_data in enumerate(images, start=1):
+                content.append({"type": "text", "text": f"Image {number}:"})
+                content.append({"type": "image_url", "image_url": {
+                    "url": self._image_data_uri(image_data), "detail": AI_IMAGE_DETAIL
+                }})
+
+            response = self._invoke(self.llm, [HumanMessage(content=content)])
+            answer = response.content if hasattr(response, 'content') else str(response)
+            produce_list = orjson.loads(self._strip_code_fence(str(answer).strip()))
+            if not isinstance(produce_list, list) or len(produce_list) != len(images):
+                raise ValueError(f"Expected a JSON array of {len(images)} results")
+            return [
+                self._remember_analysis(key, self._validated_produce(produce_data))
+                for key, produce_data in zip(keys, produce_list)
+            ]
+
+        except Exception:
+            # Fall back to single-image calls for this group only
+            with ThreadPoolExecutor(max_workers=len(images)) as pool:
+                return list(pool.map(self._analyze_or_placeholder, images))
+
+    def _analyze_or_placeholder(self, image_data: Union[bytes, str]) -> Dict:
+        """
+        Analyze one batch image, returning an error placeholder if it fails.
+
+        This allows the batch to continue even if one image fails. The
+        placeholder's 'error' key marks it as a failure for callers.
+        """
+        try:
+            return self.analyze_produce_from_image(image_data)
+        except Exception as e:
+            return {
+                'produce_name': 'Unknown',
+                'shelf_life_days': 0,
+                'is_expiring_soon': True,  # Treat as expiring for safety
+                'is_expired': False,
+                'notes': f'Error analyzing image: {str(e)}',
+                'error': str(e)
             }
+
+    def generate_storage_recommendations(self, produce_name: str) -> str:
+        """
+        Ask the AI model for storage recommendations, raising on failure.
+
+        Same prompt as get_storage_recommendations, without the fallback
+        message: callers that cache the answer (ProduceScanService) must
+        be able to tell a failed call from real recommendations.
+
+        Args:
+            produce_name: Name of produce item (e.g., 'Banana', 'Spinach')
+
+        Returns:
+            str: Storage recommendations (2-3 sentences)
+
+        Raises:
+            Exception: If the API call fails
+        """
+        # Chain: prompt | llm (applies prompt then passes to LLM), built once
+        chain = self._chain('storage', self._STORAGE_PROMPT)
+
+        # Invoke chain with produce name
+        response = self._invoke(chain, {"produce_name": produce_name})
+
+        # Extract text from response object
+        if hasattr(response, 'content'):
+            return response.content
+        else:
+            return str(response)
+
+    def stream_storage_recommendations(self, produce_name: str) -> Iterator[str]:
+        """
+        Stream storage recommendations as the model writes them.
+
+        Same prompt and call budget as generate_storage_recommendations;
+        the first words arrive long before the full answer. The call slot
+        is held until the stream ends.
+
+        Args:
+            produce_name: Name of produce item (e.g., 'Banana', 'Spinach')
+
+        Yields:
+            str: Successive pieces of the recommendations text
+
+        Raises:
+            Exception: If the API call fails
+        """
+        chain = self._chain('storage', self._STORAGE_PROMPT)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        with self._call_slots:
+            for chunk in chain.stream({"produce_name": produce_name}):
+                text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+                if text:
+                    yield text
+
+    def generate_storage_recommendations_batch(self, produce_names: List[str]) -> Dict[str, str]:
+        """
+        Ask the AI model for storage recommendations for several produce
+        types in one call, raising on failure.
+
+        Used by StorageTipBatcher. A single name goes through the regular
+        one-produce prompt; several are asked for as one JSON object keyed
+        by the given names.
+
+        Args:
+            produce_names: Names of produce items (e.g., ['apple', 'banana'])
+
+        Returns:
+            Dict[str, str]: Recommendations (2-3 sentences) per given name;
+                names the model skipped are missing
+
+        Raises:
+            Exception: If the API call fails or the answer is not JSON
+        """
+        if len(produce_names) == 1:
+            name = produce_names[0]
+            return {name: self.generate_storage_recommendations(name)}
+
+        chain = self._chain('storage_batch', self._STORAGE_BATCH_PROMPT)
+
+        response = self._invoke(chain, {"produce_names": json.dumps(produce_names)})
+        content = response.content if hasattr(response, 'content') else str(response)
+
+        try:
+            tips = orjson.loads(self._strip_code_fence(content.strip()))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"AI response is not valid JSON. Response: {content[:500]}") from e
+        if not isinstance(tips, dict):
+            raise ValueError(f"Expected a JSON object of recommendations. Got: {content[:500]}")
+
+        # Match keys loosely: the model may change case or spacing
+        answered = {str(key).strip().lower(): value for key, value in tips.items()}
+        return {
+            name: str(answered[name.strip().lower()])
+            for name in produce_names
+            if answered.get(name.strip().lower())
         }
 
     def get_storage_recommendations(self, produce_name: str) -> str:
@@ -314,27 +1042,8 @@ Rules:
         Raises:
             Returns error message as string if API fails
         """
-        # Define prompt template with variable for produce name
-        prompt_template = PromptTemplate(
-            input_variables=["produce_name"],
-            template="""As a food storage expert, provide brief storage recommendations for {produce_name}.
-            Keep response to 2-3 sentences maximum.
-            Focus on: optimal temperature, humidity, container type, and any special handling."""
-        )
-
         try:
-            # Create chain using LangChain pipe operator
-            # Syntax: prompt | llm (applies prompt then passes to LLM)
-            chain = prompt_template | self.llm
-
-            # Invoke chain with produce name
-            response = chain.invoke({"produce_name": produce_name})
-
-            # Extract text from response object
-            if hasattr(response, 'content'):
-                return response.content
-            else:
-                return str(response)
+            return self.generate_storage_recommendations(produce_name)
 
         except Exception as e:
             # Return error message as fallback
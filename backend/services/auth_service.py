@@ -15,7 +15,41 @@ Design:
 - Checks for duplicates before creating (email, username, role)
 """
 
+import secrets
+from flask import current_app
+from flask_security.utils import hash_password, verify_password
+from sqlalchemy import exists, insert, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload, load_only, raiseload, selectinload
 import backend.extensions
+from backend.models import Role, User, roles_users
+
+
+# INSERT constructs with ON CONFLICT DO NOTHING, by dialect name
+# (AuthService.ensure_roles)
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+# ==================== DUMMY PASSWORD HASH ====================
+# Logins for unknown emails are checked against a per-app dummy hash, so
+# they cost the same hash work as a wrong password for a real account and
+# response times don't reveal which emails are registered.
+
+
+def _dummy_password_hash():
+    """Return the current app's dummy stored password, creating it on first use."""
+    dummy = current_app.extensions.get('dummy_password_hash')
+    if dummy is None:
+        # Hashed the same way create_user() hashes a password, so
+        # verify_password does the same work for it; nobody knows the
+        # password it was made from
+        dummy = current_app.extensions.setdefault(
+            'dummy_password_hash', hash_password(secrets.token_urlsafe(32))
+        )
+    return dummy
 
 
 class AuthService:
@@ -30,20 +64,24 @@ class AuthService:
     """
 
     @staticmethod
-    def create_user(email, password, username, active=True):
+    def create_user(email, password, username, active=True, roles=()):
         """
-        Create a new user account.
+        Create a new user account, optionally with roles.
+
+        The user and its role links are written in one transaction (one
+        commit), instead of creating the user and assigning roles after.
 
         Validation:
-        - Checks if email already exists (unique constraint)
-        - Checks if username already exists (unique constraint)
-        - Delegates password hashing to Flask-Security
+        - Checks if email or username already exists (unique constraints),
+          with a single query
+        - Hashes the password with Flask-Security (Argon2, see app.py)
 
         Args:
             email (str): User email address
             password (str): User password (Flask-Security will hash it)
             username (str): Display name/login username
             active (bool): Whether account is immediately active (default True)
+            roles (iterable): Names of roles to give the user (default none)
 
         Returns:
             tuple: (user_object, message)
@@ -64,21 +102,39 @@ class AuthService:
         # Get reference to Flask-Security's user datastore
         user_datastore = backend.extensions.user_datastore
 
-        # Check if email already exists
-        if user_datastore.find_user(email=email):
+        # Check email and username in one query (both columns are unique,
+        # so at most two rows: one per taken field). Only the two columns
+        # are selected - no User objects are loaded
+        taken = user_datastore.db.session.execute(
+            select(User.email, User.username).where(
+                or_(User.email == email, User.username == username)
+            )
+        ).all()
+
+        # Check if email already exists (reported first, as before)
+        if any(row.email == email for row in taken):
             return None, "User with this email already exists"
 
         # Check if username already exists
-        if user_datastore.find_user(username=username):
+        if taken:
             return None, "Username already taken"
 
-        # Create user (Flask-Security handles password hashing)
-        # Uses configured password hasher (default: pbkdf2_sha512)
+        # Resolve role names first (cached lookups, no query): an unknown
+        # role fails before anything is written
+        role_objects = []
+        for role_name in roles:
+            role = user_datastore.find_role(role_name)
+            if not role:
+                return None, f"Role '{role_name}' not found"
+            role_objects.append(role)
+
+        # Hash with the configured scheme (SECURITY_PASSWORD_HASH: argon2)
         user = user_datastore.create_user(
             email=email,
-            password=password,
+            password=hash_password(password),
             username=username,
-            active=active
+            active=active,
+            roles=role_objects
         )
 
         # Persist to database
@@ -106,10 +162,80 @@ class AuthService:
         user_datastore = backend.extensions.user_datastore
         return user_datastore.find_user(email=email)
 
+    @staticmethod
+    def check_password(user, password):
+        """
+        Check a login password against the user's stored hash.
+
+        Uses Flask-Security's verify_password (constant-time hash
+        comparison); every call runs the full hash.
+
+        A match against a hash in a deprecated scheme (pbkdf2_sha512, or a
+        legacy plaintext password) is rehashed with the current scheme and
+        committed, so each account is upgraded on its next login.
+
+        Args:
+            user (User): User whose password hash to check against
+            password (str): Password submitted at login
+
+        Returns:
+            bool: True if the password matches
+
+        Example:
+            if AuthService.check_password(user, data['password']):
+                login_user(user)
+        """
+        if not verify_password(password, user.password):
+            return False
+
+        pwd_context = current_app.extensions['security'].pwd_context
+        if pwd_context.needs_update(user.password):
+            user.password = hash_password(password)
+            backend.extensions.user_datastore.commit()
+
+        return True
+
+    @staticmethod
+    def authenticate(email, password):
+        """
+        Look up a user by email and check their password.
+
+        Always performs one password hash check: an unknown email is checked
+        against a dummy hash, so it takes as long as a wrong password for a
+        registered one (no user enumeration by timing).
+
+        Args:
+            email (str): Email submitted at login
+            password (str): Password submitted at login
+
+        Returns:
+            User: The user if the email exists and the password matches,
+                  None otherwise (active status is not checked here)
+
+        Example:
+            user = AuthService.authenticate(data['email'], data['password'])
+            if user and user.active:
+                login_user(user)
+        """
+        user = AuthService.get_user_by_email(email)
+
+        if user is None:
+            # Never matches: the full hash, like a wrong password for a
+            # real account
+            verify_password(password, _dummy_password_hash())
+            return None
+
+        return user if AuthService.check_password(user, password) else None
+
     @staticmethod
     def get_user_by_id(user_id):
         """
-        Retrieve a user by ID.
+        Retrieve a user by ID, loading only what auth checks need.
+
+        Only id, email and active are read from the users row (roles are
+        JOINed into the same SELECT); the password hash and other columns
+        are left unloaded. Reading one of those later costs an extra
+        SELECT - use get_user_full() when the whole row is needed.
 
         Args:
             user_id (int): User's primary key ID
@@ -119,12 +245,74 @@ class AuthService:
 
         Example:
             user = AuthService.get_user_by_id(5)
+            if user and user.active:
+                print(user.email, [role.name for role in user.roles])
+        """
+        user_datastore = backend.extensions.user_datastore
+        return user_datastore.db.session.get(
+            User, user_id,
+            options=[
+                load_only(User.id, User.email, User.active),
+                joinedload(User.roles)
+            ]
+        )
+
+    @staticmethod
+    def get_user_full(user_id):
+        """
+        Retrieve a user by ID with every column loaded.
+
+        For administrative paths that read or update the whole account
+        (username, password hash, timestamps).
+
+        Args:
+            user_id (int): User's primary key ID
+
+        Returns:
+            User: User object if found, None otherwise
+
+        Example:
+            user = AuthService.get_user_full(5)
             if user:
-                print(user.email)
+                print(user.username, user.created_at)
         """
         user_datastore = backend.extensions.user_datastore
         return user_datastore.find_user(id=user_id)
 
+    @staticmethod
+    def list_users_with_roles(limit=50, offset=0):
+        """
+        List users (by id) with their roles, one page at a time.
+
+        Roles are loaded with selectinload: one SELECT for the page of
+        users, then one "WHERE user_id IN (...)" SELECT for all their
+        roles. Single-user lookups (login, current_user) JOIN roles
+        instead - one round-trip for one row - but for a list, a JOIN
+        repeats every user row once per role. Every other relationship is
+        raiseload: touching one (e.g. user.scans) in a loop over the page
+        raises instead of issuing a SELECT per user.
+
+        Args:
+            limit (int): Maximum users to return (default 50)
+            offset (int): Users to skip, for paging (default 0)
+
+        Returns:
+            list: User objects, ordered by id, with roles loaded
+
+        Example:
+            for user in AuthService.list_users_with_roles(limit=20):
+                print(user.email, [role.name for role in user.roles])
+        """
+        user_datastore = backend.extensions.user_datastore
+        stmt = (
+            select(User)
+            .options(selectinload(User.roles), raiseload('*'))
+            .order_by(User.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        return user_datastore.db.session.scalars(stmt).all()
+
     @staticmethod
     def assign_role(user, role_name):
         """
@@ -132,7 +320,14 @@ class AuthService:
 
         Validation:
         - Checks if role exists
-        - Checks if user already has role (prevents duplicates)
+        - Checks if user already has role (prevents duplicates), in the
+          same statement as the insert:
+
+            INSERT INTO roles_users (user_id, role_id)
+            SELECT :user_id, :role_id WHERE NOT EXISTS
+                (SELECT 1 FROM roles_users WHERE user_id = :user_id AND role_id = :role_id)
+
+          so user.roles is never loaded just to be checked
 
         Args:
             user (User): User object to assign role to
@@ -155,14 +350,25 @@ class AuthService:
         if not role:
             return False, f"Role '{role_name}' not found"
 
-        # Check if user already has this role
-        if role in user.roles:
+        # Add role to user unless they already have it (no row inserted)
+        session = user_datastore.db.session
+        result = session.execute(
+            insert(roles_users).from_select(
+                ['user_id', 'role_id'],
+                select(literal(user.id), literal(role.id)).where(~exists().where(
+                    roles_users.c.user_id == user.id,
+                    roles_users.c.role_id == role.id
+                ))
+            )
+        )
+        if result.rowcount == 0:
             return False, "User already has this role"
-
-        # Add role to user
-        user_datastore.add_role_to_user(user, role)
         user_datastore.commit()
 
+        # The loaded roles are stale
+        if user in session:
+            session.expire(user, ['roles'])
+
         return True, f"Role '{role_name}' assigned to user"
 
     @staticmethod
@@ -190,7 +396,8 @@ class AuthService:
         """
         user_datastore = backend.extensions.user_datastore
 
-        # Check if role already exists
+        # Check if role already exists (served from the datastore's role
+        # cache for any name it has seen)
         if user_datastore.find_role(name):
             return None, "Role already exists"
 
@@ -204,8 +411,50 @@ class AuthService:
         user_datastore.put(role)
         user_datastore.commit()
 
+        # Later find_role(name) calls (assign_role, repeated seeding) are
+        # answered from memory
+        user_datastore.remember_role(role)
+
         return role, "Role created successfully"
 
+    @staticmethod
+    def ensure_roles(role_specs):
+        """
+        Create any of the given roles that don't exist yet, in one statement.
+
+        For bootstrap and seeding: a single INSERT ... ON CONFLICT DO
+        NOTHING (PostgreSQL, SQLite) and one commit, instead of a lookup,
+        INSERT and commit per role. Existing roles are left untouched.
+        Other databases fall back to create_role() per missing role.
+
+        Args:
+            role_specs (list): (name, description) tuples
+
+        Returns:
+            None
+
+        Example:
+            AuthService.ensure_roles([
+                ('admin', 'Administrator with full access'),
+                ('user', 'Standard user')
+            ])
+        """
+        user_datastore = backend.extensions.user_datastore
+        session = user_datastore.db.session
+
+        dialect = session.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            for name, description in role_specs:
+                AuthService.create_role(name, description)
+            return
+
+        stmt = _UPSERT_INSERTS[dialect](Role).values([
+            {'name': name, 'description': description}
+            for name, description in role_specs
+        ]).on_conflict_do_nothing(index_elements=['name'])
+        session.execute(stmt)
+        user_datastore.commit()
+
     @staticmethod
     def deactivate_user(user):
         """
@@ -228,8 +477,8 @@ class AuthService:
         """
         user_datastore = backend.extensions.user_datastore
 
+        # user is already in the session: the change is flushed on commit
         user.active = False
-        user_datastore.put(user)
         user_datastore.commit()
 
         return True, "User deactivated"
@@ -255,8 +504,44 @@ class AuthService:
         """
         user_datastore = backend.extensions.user_datastore
 
+        # user is already in the session: the change is flushed on commit
         user.active = True
-        user_datastore.put(user)
         user_datastore.commit()
 
-        return True, "User activated"
\ No newline at end of file
+        return True, "User activated"
+
+    @staticmethod
+    def set_active(user_id, active):
+        """
+        Activate or deactivate a user by ID without loading the user.
+
+        For admin paths that only have the ID: a single UPDATE and no
+        SELECT. A copy of the user already in the session is
+        updated as well.
+
+        Args:
+            user_id (int): User's primary key ID
+            active (bool): New active status
+
+        Returns:
+            tuple: (success: bool, message: str)
+                   Failure: (False, "User not found")
+
+        Example:
+            success, msg = AuthService.set_active(5, False)
+        """
+        user_datastore = backend.extensions.user_datastore
+
+        result = user_datastore.db.session.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(active=active)
+            .returning(User.id)
+        )
+        found = result.scalar_one_or_none() is not None
+        user_datastore.commit()
+
+        if not found:
+            return False, "User not found"
+
+        return True, "User activated" if active else "User deactivated"
\ No newline at end of file
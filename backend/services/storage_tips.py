@@ -0,0 +1,79 @@
+"""
+Storage tips for common produce, answered without an AI call.
+
+Storage advice for everyday produce is well established and doesn't
+depend on the photo, so the most frequently scanned items are answered
+from this table. Only names not listed here reach the AI (and its
+caches). Keys are normalized names: stripped, lowercase, singular.
+"""
+
+from typing import Optional
+
+STORAGE_TIPS = {
+    'apple': "Refrigerate apples at 0-4°C in the crisper drawer, in a loosely closed or perforated bag to keep humidity high. Keep them away from other produce: apples give off ethylene, which speeds up ripening nearby.",
+    'apricot': "Ripen apricots at room temperature in a paper bag, then refrigerate once they give slightly to gentle pressure. Use within 2-3 days of ripening and keep them in a single layer to avoid bruising.",
+    'asparagus': "Trim the ends and stand asparagus upright in a jar with about 2 cm of water in the refrigerator, loosely covered with a plastic bag. Use within 3-4 days for the best texture.",
+    'avocado': "Ripen avocados at room temperature, away from direct sun; a paper bag with a banana speeds this up. Once ripe, refrigerate whole for up to 3 days, and store cut halves with the pit in, surface covered tightly.",
+    'banana': "Keep bananas at room temperature (13-20°C), away from other fruit, and out of direct sunlight. Once ripe, they can be refrigerated to slow further ripening: the peel darkens but the fruit stays firm.",
+    'bell pepper': "Refrigerate bell peppers unwashed in the crisper drawer, in a loosely closed bag, at around 7-10°C. Keep them dry and use within 1-2 weeks; cut peppers keep 3-4 days in a sealed container.",
+    'blueberry': "Refrigerate blueberries unwashed in their ventilated container, lined with a paper towel to absorb moisture. Remove any soft or moldy berries, and wash only just before eating.",
+    'broccoli': "Refrigerate broccoli unwashed in a loosely wrapped or perforated bag in the crisper drawer, where humidity is high. Use within 3-5 days, before the florets start to yellow.",
+    'cabbage': "Refrigerate whole cabbage in the crisper drawer, loosely wrapped, where it keeps for several weeks. Once cut, wrap the cut surface tightly and use within a few days.",
+    'carrot': "Remove the green tops, then refrigerate carrots in a sealed bag or container in the crisper drawer to keep them from drying out. Keep them away from apples and pears, whose ethylene makes carrots bitter.",
+    'cauliflower': "Refrigerate cauliflower stem-side up in a loosely closed bag in the crisper drawer, so moisture doesn't collect on the head. Use within a week, before brown spots appear.",
+    'celery': "Wrap celery tightly in aluminum foil or a damp towel and refrigerate in the crisper drawer to keep it crisp. Limp stalks recover in a glass of cold water.",
+    'cherry': "Refrigerate cherries unwashed, with stems on, in a breathable bag or open container at around 0°C. Wash only before eating and use within a week.",
+    'corn': "Refrigerate corn in its husk, loosely wrapped, and eat it as soon as possible: its sugars turn to starch within days. Remove the husk only just before cooking.",
+    'cucumber': "Store cucumbers wrapped in a dry towel or loosely in a bag in the warmest part of the refrigerator (around 10°C), as they are sensitive to cold. Keep them away from bananas, tomatoes and melons, whose ethylene speeds up spoilage.",
+    'eggplant': "Keep eggplant in a cool spot (10-12°C) and use within a few days; in the refrigerator, store it loosely wrapped in the crisper drawer for no more than 3-4 days. Handle gently, as it bruises easily.",
+    'garlic': "Store whole garlic bulbs in a cool, dry, dark and well-ventilated place such as a mesh bag or open basket, not in the refrigerator. Once cloves are broken off, use them within about 10 days.",
+    'ginger': "Refrigerate unpeeled ginger in a sealed bag with the air pressed out, in the crisper drawer. For longer storage, freeze it whole and grate it straight from frozen.",
+    'grape': "Refrigerate grapes unwashed, on the stem, in a ventilated bag or container in the coldest part of the refrigerator. Remove any damaged grapes and wash only before eating.",
+    'grapefruit': "Keep grapefruit at room temperature for up to a week, or refrigerate in the crisper drawer for 2-3 weeks. Store them loose rather than in a sealed bag so moisture doesn't promote mold.",
+    'green bean': "Refrigerate green beans unwashed in a perforated or loosely closed bag in the crisper drawer. Use within a week, and trim only before cooking.",
+    'kale': "Refrigerate kale unwashed, wrapped in a paper towel inside a loosely closed bag, in the crisper drawer. Use within 5-7 days and keep it away from ethylene-producing fruit.",
+    'kiwi': "Ripen kiwis at room temperature (faster in a paper bag with an apple or banana), then refrigerate once they yield to gentle pressure. Firm kiwis keep for weeks in the refrigerator.",
+    'lemon': "Refrigerate lemons in a sealed bag in the crisper drawer, where they stay juicy for up to a month. At room temperature they keep about a week, out of direct sun.",
+    'lettuce': "Refrigerate lettuce unwashed, wrapped in a paper towel inside a loosely closed bag or container, in the crisper drawer. Keep it away from apples, pears and bananas, which make leaves brown faster.",
+    'lime': "Refrigerate limes in a sealed bag in the crisper drawer to keep them from drying out; they keep for up to a month. At room temperature, use within a week.",
+    'mango': "Ripen mangoes at room temperature until slightly soft and fragrant, then refrigerate for up to 5 days. Don't refrigerate unripe mangoes, as cold stops them from ripening properly.",
+    'mushroom': "Refrigerate mushrooms in a paper bag or their original container, not in sealed plastic, which traps moisture and makes them slimy. Clean only just before cooking and use within a week.",
+    'onion': "Store whole onions in a cool, dry, dark and well-ventilated place in a mesh bag or basket, away from potatoes, which make them sprout and spoil. Refrigerate cut onions in a sealed container and use within a week.",
+    'orange': "Keep oranges at room temperature for up to a week, or refrigerate loose in the crisper drawer for 3-4 weeks. Avoid sealed bags, as trapped moisture promotes mold.",
+    'peach': "Ripen peaches stem-side down at room temperature, in a single layer so they don't bruise. Refrigerate once ripe and eat within 3-5 days.",
+    'pear': "Ripen pears at room temperature, checking near the stem for slight softness, then refrigerate to hold them for up to 5 days. Keep them away from produce sensitive to ethylene, such as leafy greens and carrots.",
+    'pineapple': "Keep a whole pineapple at room temperature for 1-2 days or refrigerate it whole for 3-5 days. Once cut, store pieces in a sealed container in the refrigerator and use within 3-4 days.",
+    'plum': "Ripen plums at room temperature until they yield slightly, then refrigerate in a loosely closed bag for up to 5 days. Handle gently to avoid bruising.",
+    'potato': "Store potatoes in a cool (7-10°C), dark, dry and well-ventilated place such as a paper bag or basket, not in the refrigerator. Keep them away from onions and light, which cause sprouting and green, bitter patches.",
+    'raspberry': "Refrigerate raspberries unwashed in a single layer on a paper towel in a shallow container. They are very perishable: remove moldy berries right away and eat within 1-2 days.",
+    'spinach': "Refrigerate spinach unwashed in a container or bag lined with a paper towel to absorb excess moisture. Use within 3-5 days and remove slimy leaves promptly.",
+    'strawberry': "Refrigerate strawberries unwashed, with caps on, in a single layer on a paper towel in a breathable container. Remove any moldy berries right away and eat within 2-3 days.",
+    'sweet potato': "Store sweet potatoes in a cool (13-15°C), dark, dry and well-ventilated place, not in the refrigerator, which hardens their core and spoils the flavor. Use within 3-5 weeks.",
+    'tomato': "Keep tomatoes at room temperature, stem-side down and out of direct sun, until ripe; refrigeration dulls their flavor and texture. Refrigerate only fully ripe tomatoes you can't use in time, and let them warm up before eating.",
+    'watermelon': "Keep a whole watermelon at room temperature for up to a week, or refrigerate it for 2-3 weeks. Once cut, wrap the cut surface or store pieces in a sealed container in the refrigerator and use within 3-4 days.",
+    'zucchini': "Refrigerate zucchini unwashed in a perforated or loosely closed bag in the crisper drawer. Use within a week; soft spots and shriveling mean it is past its best.",
+}
+
+
+def known_storage_tips(produce_name: str) -> Optional[str]:
+    """
+    Look up storage tips for a common produce name.
+
+    Plural names ("apples", "tomatoes", "cherries") match their singular
+    entry.
+
+    Args:
+        produce_name: Normalized produce name (stripped, lowercase)
+
+    Returns:
+        str: The table's storage tips, or None if the produce isn't listed
+    """
+    tips = STORAGE_TIPS.get(produce_name)
+    if tips is None and produce_name.endswith('s'):
+        if produce_name.endswith('ies'):
+            tips = STORAGE_TIPS.get(produce_name[:-3] + 'y')
+        if tips is None and produce_name.endswith('es'):
+            tips = STORAGE_TIPS.get(produce_name[:-2])
+        if tips is None:
+            tips = STORAGE_TIPS.get(produce_name[:-1])
+    return tips
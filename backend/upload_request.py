@@ -0,0 +1,33 @@
+"""
+UploadRequest: Flask request class that spools image uploads
+
+Scan endpoints accept images as multipart/form-data file parts. Werkzeug
+hands each file part to the request's file stream factory while parsing;
+this class makes that factory a SpooledTemporaryFile, so an upload stays
+in memory up to 2MB and spills to a temp file beyond that.
+
+Why:
+- A typical phone photo (1-2MB) never touches disk
+- A 50MB batch upload doesn't pin 50MB of RAM per concurrent request
+- Routes read raw image bytes - no base64 string, no JSON parse
+
+Installed in app.py:
+    app.request_class = UploadRequest
+"""
+
+from tempfile import SpooledTemporaryFile
+from flask import Request
+
+
+class UploadRequest(Request):
+    """
+    Request whose multipart file parts spool to disk past UPLOAD_SPOOL_SIZE.
+    """
+
+    # Bytes of one file part kept in memory before rolling over to disk
+    UPLOAD_SPOOL_SIZE = 2 * 1024 * 1024
+
+    def _get_file_stream(self, total_content_length, content_type,
+                         filename=None, content_length=None):
+        """Return the stream a file part is written to while parsing."""
+        return SpooledTemporaryFile(max_size=self.UPLOAD_SPOOL_SIZE, mode='rb+')
@@ -0,0 +1,75 @@
+"""
+Gunicorn configuration for the produce scanning API
+
+Worker model:
+- gevent workers (default): scan handlers spend seconds waiting on remote
+  AI calls; under gevent that wait yields to other requests instead of
+  holding a thread, so one worker serves up to worker_connections
+  concurrent scans rather than one per thread
+- gthread workers (GUNICORN_WORKER_CLASS=gthread): plain threads, for
+  environments without gevent
+- preload_app: create_app() runs once in the master, workers share the
+  loaded app memory after fork
+- max_requests + jitter: recycle workers periodically without restarting
+  them all at the same moment
+- when_ready: the master refuses to start workers if the database schema
+  needs `flask --app wsgi init-db` (backend/schema.py)
+
+Every setting can be overridden with the matching GUNICORN_* env variable.
+"""
+
+import multiprocessing
+import os
+import sys
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+
+if worker_class == 'gevent':
+    # Patch before preload_app imports the app (and its HTTP/DB clients),
+    # so every socket the app opens is cooperative
+    from gevent import monkey
+    monkey.patch_all()
+
+    # psycopg2 waits in C, which monkey-patching can't reach; psycogreen
+    # swaps in a cooperative wait callback (not needed for SQLite)
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        pass
+    else:
+        patch_psycopg()
+
+    workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+else:
+    workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+preload_app = True
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# AI vision calls can take several seconds per image
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+
+def when_ready(server):
+    """Check the database schema once, in the master, before workers fork."""
+    # Imported here: the app is already loaded (preload_app), and this
+    # config file is also read by processes that never load it
+    from backend.extensions import business_user as db
+    from backend.schema import check_schema
+    from wsgi import app
+
+    with app.app_context():
+        try:
+            check_schema()
+        except RuntimeError as e:
+            server.log.error(str(e))
+            sys.exit(1)
+        finally:
+            # Workers must not inherit the check's pooled connection
+            db.engine.dispose()
@@ -136,12 +136,14 @@ function clearImage() {
 
 // ==================== SCAN FUNCTIONS ====================
 
-async function scanSingle() {
-    if (!currentSession) {
-        showNotification('Start a session first', 'warning');
-        return;
-    }
+// Images are held as data URLs for previews; uploads send them as binary
+// file parts (multipart) rather than base64 text inside JSON
+async function dataUrlToBlob(dataUrl) {
+    const response = await fetch(dataUrl);
+    return response.blob();
+}
 
+async function scanSingle() {
     if (!currentImageBase64) {
         showNotification('Please capture or upload an image', 'warning');
         return;
@@ -152,17 +154,25 @@ async function scanSingle() {
     btn.innerText = 'Analyzing...';
 
     try {
+        const formData = new FormData();
+        formData.append('image', await dataUrlToBlob(currentImageBase64), 'image');
+        // No session yet: the scan starts one (no separate start-session call)
+        if (currentSession) {
+            formData.append('session_id', currentSession);
+        }
+
         const response = await fetch('/api/scan/single', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                image_data: currentImageBase64,
-                session_id: currentSession
-            })
+            body: formData
         });
 
         const data = await response.json();
         if (data.success) {
+            if (!currentSession) {
+                currentSession = data.session_id;
+                document.getElementById('session-info').classList.remove('hidden');
+                document.getElementById('session-id').innerText = `Session: ${currentSession}`;
+            }
             displaySingleResult(data.data);
             clearImage();
             showNotification('Produce analyzed successfully', 'success');
@@ -252,23 +262,30 @@ async function scanBatch() {
     btn.innerText = 'Analyzing...';
 
     try {
-        const response = await fetch('/api/scan/batch', {
+        const formData = new FormData();
+        for (const image of batchImages) {
+            formData.append('images[]', await dataUrlToBlob(image), 'image');
+        }
+        formData.append('session_id', currentSession);
+
+        // Streamed: each tile renders as soon as its image is analyzed
+        const response = await fetch('/api/scan/batch/stream', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                images: batchImages,
-                session_id: currentSession
-            })
+            body: formData
         });
 
-        const data = await response.json();
+        const data = await readBatchStream(response);
         if (data.success) {
             displayBatchResults(data);
             batchImages = [];
             document.getElementById('batch-images').value = '';
             document.getElementById('batch-preview').classList.add('hidden');
             document.getElementById('batch-thumbnails').innerHTML = '';
-            showNotification(`Analyzed ${data.scans.length} images successfully`, 'success');
+            if (data.failed.length) {
+                showNotification(`Analyzed ${data.scans.length} images, ${data.failed.length} could not be analyzed`, 'warning');
+            } else {
+                showNotification(`Analyzed ${data.scans.length} images successfully`, 'success');
+            }
         } else {
             showNotification('Batch scan failed: ' + data.error, 'error');
         }
@@ -280,6 +297,51 @@ async function scanBatch() {
     }
 }
 
+// Reads /api/scan/batch/stream: renders a tile per 'scan' event and
+// resolves with the final 'done' (or 'error') payload. Validation errors
+// arrive as a plain JSON body instead of a stream.
+async function readBatchStream(response) {
+    if (!response.headers.get('Content-Type').startsWith('text/event-stream')) {
+        return response.json();
+    }
+
+    document.getElementById('results-section').classList.remove('hidden');
+    const container = document.getElementById('results-container');
+    container.innerHTML = '';
+    const tiles = [];
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const event = frame.match(/^event: (.*)$/m)[1];
+            const payload = JSON.parse(frame.match(/^data: (.*)$/m)[1]);
+
+            if (event === 'failed') {
+                continue;  // listed again in the final payload
+            }
+            if (event !== 'scan') {
+                return payload;  // 'done' or 'error'
+            }
+            // Not saved yet: show the analysis time until 'done' arrives
+            tiles[payload.index] = createResultCard({
+                ...payload.scan,
+                scanned_at: new Date().toISOString()
+            });
+            const next = tiles.slice(payload.index + 1).find(tile => tile);
+            container.insertBefore(tiles[payload.index], next || null);
+        }
+    }
+    return { success: false, error: 'Connection closed before the batch finished' };
+}
+
 // ==================== RESULT DISPLAY ====================
 
 function displaySingleResult(result) {
@@ -355,7 +417,8 @@ function createResultCard(result) {
 
 async function getStorageTips(produceName) {
     try {
-        const response = await fetch('/api/scan/storage-tips', {
+        // Streamed: the modal opens with the first words of the answer
+        const response = await fetch('/api/scan/storage-tips/stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -363,13 +426,23 @@ async function getStorageTips(produceName) {
             })
         });
 
-        const data = await response.json();
-        if (data.success) {
-            document.getElementById('tips-produce').innerText = data.produce;
-            document.getElementById('tips-content').innerText = data.recommendations;
-            document.getElementById('tips-modal').classList.add('opacity-100', 'pointer-events-auto');
-        } else {
+        if (!response.ok) {
+            const data = await response.json();
             showNotification('Could not fetch tips: ' + data.error, 'error');
+            return;
+        }
+
+        const content = document.getElementById('tips-content');
+        document.getElementById('tips-produce').innerText = produceName;
+        content.innerText = '';
+        document.getElementById('tips-modal').classList.add('opacity-100', 'pointer-events-auto');
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            content.innerText += decoder.decode(value, { stream: true });
         }
     } catch (error) {
         showNotification('Error fetching tips: ' + error.message, 'error');
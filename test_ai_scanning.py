@@ -4,6 +4,7 @@ from unittest.mock import patch, MagicMock
 from app import create_app
 from backend.extensions import business_user as db
 from backend.models import User
+from backend.services import get_scan_service
 
 
 @pytest.fixture
@@ -24,6 +25,21 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def query_counter(app):
+    """Record every SQL statement executed while the test runs"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
 @pytest.fixture
 def auth_user(app, client):
     """Create authenticated test user and login via API"""
@@ -38,7 +54,7 @@ def auth_user(app, client):
     )
 
     # Login via API to establish session
-    client.post(
+    response = client.post(
         '/api/auth/login',
         json={
             'email': 'test@example.com',
@@ -46,9 +62,10 @@ def auth_user(app, client):
         }
     )
 
-    # Get the created user from database for reference
+    # Get the created user from database for reference (by primary key:
+    # the login response carries the id)
     with app.app_context():
-        user = User.query.filter_by(email='test@example.com').first()
+        user = db.session.get(User, response.get_json()['user_id'])
         return user
 
 
@@ -106,6 +123,78 @@ class TestAIScanningRoutes:
         assert data['data']['produce_name'] == 'Apple'
         assert data['data']['shelf_life_days'] == 7
 
+    def test_scan_batch_rejects_oversized_image(self, client, auth_user, app):
+        """Test that an image over the size limit is a 413 before any AI call"""
+        import base64
+        from backend import routes
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        small = base64.b64encode(b'\xff\xd8\xffsmall').decode()
+        large = base64.b64encode(b'\xff\xd8\xff' + b'x' * 64).decode()
+        with patch.object(routes, 'MAX_IMAGE_BYTES', 32), \
+                patch.object(scan_service.ai_service, 'llm') as mock_llm:
+            response = client.post(
+                '/api/scan/batch',
+                json={'images': [small, large], 'session_id': session_id}
+            )
+
+        assert response.status_code == 413
+        assert 'images[1]' in json.loads(response.data)['error']
+        mock_llm.invoke.assert_not_called()
+
+    def test_scan_single_without_session_starts_one(self, client, auth_user, app):
+        """Test that a single scan without session_id creates its session"""
+        import base64
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Apple',
+            'shelf_life_days': 7,
+            'is_expiring_soon': False,
+            'is_expired': False,
+            'notes': 'Fresh'
+        })
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = mock_response
+
+        with app.app_context():
+            scan_service = get_scan_service()
+
+        with patch.object(scan_service.ai_service, 'llm', mock_llm):
+            response = client.post(
+                '/api/scan/single',
+                json={'image_data': base64.b64encode(b'\xff\xd8\xfffake').decode()}
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['success'] is True
+
+        session = client.get(f"/api/scan/session/{data['session_id']}")
+        assert session.status_code == 200
+        assert json.loads(session.data)['session']['user_id'] == auth_user.id
+        assert [scan['scan_id'] for scan in json.loads(session.data)['scans']] == [
+            data['data']['scan_id']
+        ]
+
+    def test_scan_single_invalid_base64(self, client, auth_user, app):
+        """Test that undecodable image_data is rejected before any AI call"""
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        with patch.object(scan_service.ai_service, 'llm') as mock_llm:
+            response = client.post(
+                '/api/scan/single',
+                json={'image_data': 'data:image/jpeg;base64,abc', 'session_id': session_id}
+            )
+
+        assert response.status_code == 400
+        assert json.loads(response.data)['success'] is False
+        mock_llm.invoke.assert_not_called()
+
     @patch('backend.services.ai_service.ChatOpenAI')
     def test_scan_single_missing_fields(self, mock_chat_openai, client, auth_user, app):
         """Test scan_single with missing required fields"""
@@ -170,6 +259,308 @@ class TestAIScanningRoutes:
         assert data['summary']['total_scanned'] == 2
         assert data['summary']['expiring_soon_count'] == 1
 
+    def test_scan_batch_multipart(self, client, auth_user, app):
+        """Test batch scan with images sent as binary file parts"""
+        from io import BytesIO
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Apple',
+            'shelf_life_days': 7,
+            'is_expiring_soon': False,
+            'is_expired': False,
+            'notes': 'Fresh'
+        })
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = mock_response
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        with patch.object(scan_service.ai_service, 'llm', mock_llm):
+            response = client.post(
+                '/api/scan/batch',
+                data={
+                    'images[]': [
+                        (BytesIO(b'\x89PNG\r\n\x1a\nfake'), 'a.png'),
+                        (BytesIO(b'\xff\xd8\xfffake'), 'b.jpg')
+                    ],
+                    'session_id': session_id
+                },
+                content_type='multipart/form-data'
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['success'] is True
+        assert len(data['scans']) == 2
+        image_urls = [
+            call.args[0][0].content[-1]['image_url']['url']
+            for call in mock_llm.invoke.call_args_list
+        ]
+        assert image_urls[0].startswith('data:image/png;base64,')
+        assert image_urls[1].startswith('data:image/jpeg;base64,')
+
+    def test_scan_batch_stream(self, client, auth_user, app):
+        """Test streamed batch scan: one event per image, then the saved batch"""
+        from io import BytesIO
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Apple',
+            'shelf_life_days': 7,
+            'is_expiring_soon': False,
+            'is_expired': False,
+            'notes': 'Fresh'
+        })
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = mock_response
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        with patch.object(scan_service.ai_service, 'llm', mock_llm):
+            response = client.post(
+                '/api/scan/batch/stream',
+                data={
+                    'images[]': [
+                        (BytesIO(b'\x89PNG\r\n\x1a\nfake'), 'a.png'),
+                        (BytesIO(b'\xff\xd8\xfffake'), 'b.jpg')
+                    ],
+                    'session_id': session_id
+                },
+                content_type='multipart/form-data'
+            )
+            # The body is generated while it is read: read it with the mock in place
+            body = response.get_data(as_text=True)
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        events = [
+            (frame.split('\n')[0], json.loads(frame.split('\n')[1][len('data: '):]))
+            for frame in body.strip().split('\n\n')
+        ]
+        assert [name for name, _ in events] == ['event: scan', 'event: scan', 'event: done']
+        assert sorted(payload['index'] for _, payload in events[:2]) == [0, 1]
+        assert events[2][1]['success'] is True
+        assert len(events[2][1]['scans']) == 2
+        assert events[2][1]['summary']['total_scanned'] == 2
+
+    def test_scan_batch_reports_failed_images(self, client, auth_user, app):
+        """Test that a failed image is reported, not saved, and the rest is kept"""
+        from io import BytesIO
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Apple',
+            'shelf_life_days': 7,
+            'is_expiring_soon': False,
+            'is_expired': False,
+            'notes': 'Fresh'
+        })
+        mock_llm = MagicMock()
+
+        def invoke(messages, *args, **kwargs):
+            if 'image/png' in messages[0].content[-1]['image_url']['url']:
+                raise RuntimeError('model unavailable')
+            return mock_response
+        mock_llm.invoke.side_effect = invoke
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        with patch.object(scan_service.ai_service, 'llm', mock_llm):
+            response = client.post(
+                '/api/scan/batch',
+                data={
+                    'images[]': [
+                        (BytesIO(b'\x89PNG\r\n\x1a\nfake'), 'a.png'),
+                        (BytesIO(b'\xff\xd8\xfffake'), 'b.jpg')
+                    ],
+                    'session_id': session_id
+                },
+                content_type='multipart/form-data'
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [scan['produce_name'] for scan in data['scans']] == ['Apple']
+        assert [failure['index'] for failure in data['failed']] == [0]
+        assert 'model unavailable' in data['failed'][0]['error']
+        assert data['summary']['total_scanned'] == 1
+
+    def test_scan_batch_refuses_non_images(self, client, auth_user, app):
+        """Test that a non-image upload fails without reaching the AI model"""
+        from io import BytesIO
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Apple',
+            'shelf_life_days': 7,
+            'is_expiring_soon': False,
+            'is_expired': False,
+            'notes': 'Fresh'
+        })
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        with patch.object(scan_service.ai_service, 'llm') as mock_llm:
+            mock_llm.invoke.return_value = mock_response
+            response = client.post(
+                '/api/scan/batch',
+                data={
+                    'images[]': [
+                        (BytesIO(b'%PDF-1.7 not a photo'), 'a.pdf'),
+                        (BytesIO(b'\xff\xd8\xfffake'), 'b.jpg')
+                    ],
+                    'session_id': session_id
+                },
+                content_type='multipart/form-data'
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [failure['index'] for failure in data['failed']] == [0]
+        assert 'Not a supported image' in data['failed'][0]['error']
+        assert mock_llm.invoke.call_count == 1
+
+    def test_batch_analysis_packs_images_per_call(self, app):
+        """Test grouped image analysis and its per-image fallback"""
+        import base64
+
+        def answer(name):
+            return {'produce_name': name, 'shelf_life_days': 5, 'is_expiring_soon': False,
+                    'is_expired': False, 'notes': 'Fresh'}
+
+        def invoke(messages, *args, **kwargs):
+            urls = [part['image_url']['url'] for part in messages[0].content
+                    if part['type'] == 'image_url']
+            names = [base64.b64decode(url.partition(',')[2])[3:].decode() for url in urls]
+            response = MagicMock()
+            if len(names) == 1:
+                response.content = json.dumps(answer(names[0]))
+            elif 'bad' in names:
+                response.content = json.dumps([answer('only one')])  # wrong length
+            else:
+                response.content = json.dumps([answer(name) for name in names])
+            return response
+
+        with app.app_context():
+            ai_service = get_scan_service().ai_service
+        images = [b'\xff\xd8\xff' + name.encode()
+                  for name in ['apple', 'pear', 'kiwi', 'bad', 'fig']]
+
+        with patch.object(ai_service, 'llm') as mock_llm, \
+                patch.object(ai_service, 'images_per_call', 3):
+            mock_llm.invoke.side_effect = invoke
+            result = ai_service.batch_analyze_produce_from_images(images)
+
+        assert [r['produce_name'] for r in result['results']] == [
+            'apple', 'pear', 'kiwi', 'bad', 'fig'
+        ]
+        # One call for the first group; the second group's combined answer
+        # is rejected and retried per image
+        assert mock_llm.invoke.call_count == 4
+
+    def test_concurrent_single_scans_share_one_call(self):
+        """Test that single scans arriving together are sent as one grouped call"""
+        import base64
+        import threading
+        from backend.services.ai_service import AIService
+
+        def invoke(messages, *args, **kwargs):
+            urls = [part['image_url']['url'] for part in messages[0].content
+                    if part['type'] == 'image_url']
+            names = [base64.b64decode(url.partition(',')[2])[3:].decode() for url in urls]
+            response = MagicMock()
+            response.content = json.dumps([
+                {'produce_name': name, 'shelf_life_days': 5, 'is_expiring_soon': False,
+                 'is_expired': False, 'notes': 'Fresh'}
+                for name in names
+            ])
+            return response
+
+        ai_service = AIService(images_per_call=4, coalesce_window_ms=200)
+        results = {}
+
+        def scan(name):
+            results[name] = ai_service.submit_produce_image(b'\xff\xd8\xff' + name.encode())
+
+        with patch.object(ai_service, 'llm') as mock_llm:
+            mock_llm.invoke.side_effect = invoke
+            threads = [threading.Thread(target=scan, args=(name,))
+                       for name in ['apple', 'pear', 'kiwi']]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert mock_llm.invoke.call_count == 1
+        assert {name: r['produce_name'] for name, r in results.items()} == {
+            'apple': 'apple', 'pear': 'pear', 'kiwi': 'kiwi'
+        }
+
+    def test_analysis_cached_by_image_content(self, app):
+        """Test that a repeated image is answered without a second AI call"""
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Apple',
+            'shelf_life_days': 7,
+            'is_expiring_soon': False,
+            'is_expired': False,
+            'notes': 'Fresh'
+        })
+
+        with app.app_context():
+            ai_service = get_scan_service().ai_service
+
+        with patch.object(ai_service, 'llm') as mock_llm:
+            mock_llm.invoke.side_effect = RuntimeError('model unavailable')
+            failed = ai_service.batch_analyze_produce_from_images([b'\xff\xd8\xffapple'])
+            mock_llm.invoke.side_effect = None
+            mock_llm.invoke.return_value = mock_response
+            first = ai_service.analyze_produce_from_image(b'\xff\xd8\xffapple')
+            again = ai_service.batch_analyze_produce_from_images([b'\xff\xd8\xffapple'])
+
+        assert 'error' in failed['results'][0]  # failures are not cached
+        assert first['produce_name'] == 'Apple'
+        assert again['results'] == [first]
+        assert mock_llm.invoke.call_count == 2
+
+    def test_scan_batch_dedupes_identical_images(self, client, auth_user, app):
+        """Test that identical images share one AI call but each get a scan"""
+        import base64
+        mock_response = MagicMock()
+        mock_response.content = json.dumps({
+            'produce_name': 'Banana',
+            'shelf_life_days': 2,
+            'is_expiring_soon': True,
+            'is_expired': False,
+            'notes': 'Ripe'
+        })
+        mock_llm = MagicMock()
+        mock_llm.invoke.return_value = mock_response
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            session_id = scan_service.start_scan_session(user_id=auth_user.id)
+
+        burst = base64.b64encode(b'\xff\xd8\xffburst').decode()
+        other = base64.b64encode(b'\xff\xd8\xffother').decode()
+        with patch.object(scan_service.ai_service, 'llm', mock_llm):
+            response = client.post(
+                '/api/scan/batch',
+                json={'images': [burst, other, burst], 'session_id': session_id}
+            )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data['scans']) == 3
+        assert data['summary']['total_scanned'] == 3
+        assert data['summary']['expiring_soon_count'] == 3
+        assert mock_llm.invoke.call_count == 2
+
     @patch('backend.services.ai_service.ChatOpenAI')
     def test_scan_batch_empty_list(self, mock_chat_openai, client, auth_user, app):
         """Test batch scan with empty list"""
@@ -205,6 +596,23 @@ class TestAIScanningRoutes:
         assert data['session']['session_id'] == session_id
         assert data['session']['user_id'] == auth_user.id
 
+    def test_get_session_results_not_modified(self, client, auth_user, app):
+        """Test that revalidating an unchanged session returns 304"""
+        with app.app_context():
+            session_id = get_scan_service().start_scan_session(user_id=auth_user.id)
+
+        first = client.get(f'/api/scan/session/{session_id}')
+        etag = first.headers['ETag']
+
+        response = client.get(
+            f'/api/scan/session/{session_id}',
+            headers={'If-None-Match': etag}
+        )
+
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
     def test_get_session_not_found(self, client, auth_user, app):
         """Test getting non-existent session"""
         response = client.get('/api/scan/session/nonexistent')
@@ -243,6 +651,46 @@ class TestAIScanningRoutes:
         assert data['success'] is True
         assert data['count'] >= 1
 
+    def test_export_scans(self, client, auth_user, app):
+        """Test streaming the user's full scan history, oldest first"""
+        with app.app_context():
+            from backend.database import DatabaseService
+            session_id = DatabaseService.create_scan_session(user_id=auth_user.id)
+            DatabaseService.save_produce_scans([
+                {'session_id': session_id, 'user_id': auth_user.id,
+                 'produce_name': name, 'shelf_life_days': 5}
+                for name in ['Apple', 'Banana', 'Kiwi']
+            ])
+
+        response = client.get('/api/scan/export')
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['success'] is True
+        assert [scan['produce_name'] for scan in data['scans']] == ['Apple', 'Banana', 'Kiwi']
+
+    def test_list_endpoints_query_count(self, client, auth_user, app, query_counter):
+        """Test that the scan list endpoints don't grow queries with scan count"""
+        from backend.database import DatabaseService
+
+        session_id = DatabaseService.create_scan_session(user_id=auth_user.id)
+        DatabaseService.save_produce_scans([
+            {'session_id': session_id, 'user_id': auth_user.id,
+             'produce_name': 'Apple', 'shelf_life_days': 7}
+            for _ in range(5)
+        ])
+
+        for url in ('/api/scan/recent', '/api/scan/export',
+                    f'/api/scan/session/{session_id}'):
+            db.session.expunge_all()
+            query_counter.clear()
+
+            response = client.get(url)
+            response.get_data()  # Drain streamed bodies
+
+            assert response.status_code == 200, url
+            assert len(query_counter) <= 2, url
+
     @patch('backend.services.ai_service.ChatOpenAI')
     def test_storage_tips(self, mock_chat_openai, client):
         """Test getting storage tips (public endpoint)"""
@@ -251,6 +699,8 @@ class TestAIScanningRoutes:
 
         mock_llm = MagicMock()
         mock_llm.invoke.return_value = mock_response
+        # prompt | llm wraps the (callable) mock in a RunnableLambda
+        mock_llm.return_value = mock_response
         mock_chat_openai.return_value = mock_llm
 
         with patch('backend.services.ai_service.ChatOpenAI', return_value=mock_llm):
@@ -264,6 +714,84 @@ class TestAIScanningRoutes:
             assert data['success'] is True
             assert 'recommendations' in data
 
+    def test_storage_tips_common_produce_skip_ai(self, app):
+        """Test that common produce is answered from the local table"""
+        from backend.services.storage_tips import STORAGE_TIPS
+
+        with app.app_context():
+            scan_service = get_scan_service()
+            with patch.object(scan_service._tips_batcher, 'fetch_batch') as fetch:
+                assert scan_service.get_storage_tips('Tomatoes')['recommendations'] == STORAGE_TIPS['tomato']
+                assert scan_service.get_storage_tips('cherries')['recommendations'] == STORAGE_TIPS['cherry']
+            fetch.assert_not_called()
+
+    def test_storage_tips_stored_for_new_workers(self, app):
+        """Test that a stored storage tip is reused without another AI call"""
+        from backend.services import ProduceScanService
+
+        with app.app_context():
+            first = ProduceScanService()
+            with patch.object(first._tips_batcher, 'fetch_batch',
+                              return_value={'lychee': 'Refrigerate once ripe.'}) as fetch:
+                assert first.get_storage_tips(' Lychee ')['recommendations'] == 'Refrigerate once ripe.'
+            assert fetch.call_count == 1
+
+            # A fresh service (another worker, or a restart) has an empty memory cache
+            second = ProduceScanService()
+            with patch.object(second._tips_batcher, 'fetch_batch') as fetch:
+                assert second.get_storage_tips('lychee')['recommendations'] == 'Refrigerate once ripe.'
+            fetch.assert_not_called()
+
+    def test_storage_tips_stream(self, client, app):
+        """Test streaming storage tips, then serving the stored answer"""
+        mock_response = MagicMock()
+        mock_response.content = "Keep rambutans refrigerated in a perforated bag."
+
+        with app.app_context():
+            scan_service = get_scan_service()
+
+        with patch.object(scan_service.ai_service, 'llm') as mock_llm:
+            # prompt | llm wraps the (callable) mock in a RunnableLambda
+            mock_llm.return_value = mock_response
+            response = client.post('/api/scan/storage-tips/stream', json={'produce_name': 'Rambutan'})
+            assert response.status_code == 200
+            assert response.mimetype == 'text/plain'
+            assert response.get_data(as_text=True) == "Keep rambutans refrigerated in a perforated bag."
+
+            again = client.post('/api/scan/storage-tips/stream', json={'produce_name': 'rambutan'})
+            assert again.get_data(as_text=True) == "Keep rambutans refrigerated in a perforated bag."
+        assert mock_llm.call_count == 1
+
+    def test_storage_tips_batches_concurrent_requests(self):
+        """Test that tip requests in one window share a single AI call"""
+        import threading
+        from backend.services.ai_service import StorageTipBatcher
+
+        fetch_batch = MagicMock(side_effect=lambda names: {
+            name: f'tips for {name}' for name in names if name != 'durian'
+        })
+        batcher = StorageTipBatcher(fetch_batch, max_batch=16, max_wait_ms=50)
+        results = {}
+
+        def ask(name):
+            try:
+                results[name] = batcher.submit(name)
+            except ValueError as e:
+                results[name] = e
+
+        threads = [threading.Thread(target=ask, args=(name,))
+                   for name in ['apple', 'banana', 'durian']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert fetch_batch.call_count == 1
+        assert sorted(fetch_batch.call_args[0][0]) == ['apple', 'banana', 'durian']
+        assert results['apple'] == 'tips for apple'
+        assert results['banana'] == 'tips for banana'
+        assert isinstance(results['durian'], ValueError)
+
     def test_storage_tips_missing_produce_name(self, client):
         """Test storage tips without produce name"""
         response = client.post(
@@ -275,10 +803,291 @@ class TestAIScanningRoutes:
         data = json.loads(response.data)
         assert data['success'] is False
 
+    def test_storage_tips_invalid_produce_name(self, client):
+        """Test that implausible produce names are refused before the service"""
+        with patch('backend.routes.get_scan_service') as service:
+            for url in ('/api/scan/storage-tips', '/api/scan/storage-tips/stream'):
+                for name in ['x' * 101, '<script>', 42, ['Apple'], '   ']:
+                    response = client.post(url, json={'produce_name': name})
+
+                    assert response.status_code == 400, (url, name)
+                    assert json.loads(response.data)['success'] is False
+
+            service.assert_not_called()
+
+    def test_api_info_not_modified(self, client):
+        """Test that revalidating the compressed API info returns 304"""
+        first = client.get('/api', headers={'Accept-Encoding': 'br, gzip'})
+        etag = first.headers['ETag']
+        assert etag.startswith('W/')  # Not rewritten per encoding
+
+        response = client.get(
+            '/api',
+            headers={'Accept-Encoding': 'br, gzip', 'If-None-Match': etag}
+        )
+
+        assert response.status_code == 304
+        assert response.data == b''
+
     def test_health_check(self, client):
         """Test health check endpoint"""
         response = client.get('/api/scan/health')
 
         assert response.status_code == 200
         data = json.loads(response.data)
-        assert data['status'] == 'healthy'
\ No newline at end of file
+        assert data['status'] == 'healthy'
+
+class TestDatabaseService:
+    """Tests for DatabaseService persistence helpers"""
+
+    def test_save_produce_scans_bulk(self, app):
+        """Test saving a batch of scans in one transaction"""
+        from backend.database import DatabaseService
+
+        session_id = DatabaseService.create_scan_session()
+        scans = DatabaseService.save_produce_scans([
+            {
+                'scan_id': 'scan_apple',
+                'session_id': session_id,
+                'produce_name': 'Apple',
+                'shelf_life_days': 7
+            },
+            {
+                'scan_id': 'scan_banana',
+                'session_id': session_id,
+                'produce_name': 'Banana',
+                'shelf_life_days': 2,
+                'is_expiring_soon': True
+            }
+        ])
+
+        assert [scan.scan_id for scan in scans] == ['scan_apple', 'scan_banana']
+        assert all(scan.id is not None for scan in scans)
+        assert len(DatabaseService.get_session_scans(session_id)) == 2
+
+    def test_save_produce_scans_empty(self, app):
+        """Test that an empty batch is a no-op"""
+        from backend.database import DatabaseService
+
+        assert DatabaseService.save_produce_scans([]) == []
+
+    def test_bulk_create_batches_in_order(self, app):
+        """Test that bulk_create returns every row, in order, across batches"""
+        from backend.database import DatabaseService
+        from backend.models import ProduceScan
+
+        session_id = DatabaseService.create_scan_session()
+        rows = [
+            {'scan_id': f'scan_{i}', 'session_id': session_id,
+             'produce_name': 'Apple', 'shelf_life_days': i}
+            for i in range(5)
+        ]
+        scans = ProduceScan.bulk_create(rows, batch_size=2)
+
+        assert [scan.scan_id for scan in scans] == [row['scan_id'] for row in rows]
+        assert ProduceScan.query.count() == 5
+
+    def test_get_scan_session_leaves_scans_unloaded(self, app):
+        """Test that fetching a session doesn't load its scans"""
+        from sqlalchemy import inspect
+        from backend.database import DatabaseService
+
+        session_id = DatabaseService.create_scan_session()
+        DatabaseService.save_produce_scans([{
+            'scan_id': 'scan_apple',
+            'session_id': session_id,
+            'produce_name': 'Apple',
+            'shelf_life_days': 7
+        }])
+        db.session.expunge_all()
+
+        session = DatabaseService.get_scan_session(session_id)
+
+        assert 'scans' in inspect(session).unloaded
+        assert [scan.produce_name for scan in session.scans] == ['Apple']
+
+    def test_get_session_results_query_count(self, app, query_counter):
+        """Test that session results don't grow queries with scan count"""
+        from backend.database import DatabaseService
+        from backend.services import ProduceScanService
+
+        session_id = DatabaseService.create_scan_session()
+        DatabaseService.save_produce_scans([
+            {'scan_id': f'scan_{i}', 'session_id': session_id,
+             'produce_name': 'Apple', 'shelf_life_days': 7}
+            for i in range(5)
+        ])
+        db.session.expunge_all()
+        query_counter.clear()
+
+        result = ProduceScanService().get_session_results(session_id)
+
+        assert result['success']
+        assert len(result['scans']) == 5
+        assert len(query_counter) <= 2
+
+    def test_list_users_with_roles_query_count(self, app, query_counter):
+        """Test that listing users loads roles in one extra query, and nothing lazily"""
+        from sqlalchemy.exc import InvalidRequestError
+        from backend.services.auth_service import AuthService
+
+        AuthService.ensure_roles([('user', 'Standard user')])
+        for i in range(3):
+            AuthService.create_user(f'user{i}@example.com', 'password123',
+                                    f'user{i}', roles=('user',))
+        db.session.expunge_all()
+        query_counter.clear()
+
+        users = AuthService.list_users_with_roles()
+
+        assert [[role.name for role in user.roles] for user in users] == [['user']] * 3
+        assert len(query_counter) <= 2
+        with pytest.raises(InvalidRequestError):
+            users[0].scans
+
+    def test_refresh_scan_session_counts(self, app):
+        """Test that session counts are recomputed from stored scans"""
+        from backend.database import DatabaseService
+
+        session_id = DatabaseService.create_scan_session()
+        DatabaseService.save_produce_scans([
+            {'scan_id': 'scan_1', 'session_id': session_id, 'produce_name': 'Apple',
+             'shelf_life_days': 7},
+            {'scan_id': 'scan_2', 'session_id': session_id, 'produce_name': 'Banana',
+             'shelf_life_days': 2, 'is_expiring_soon': True},
+            {'scan_id': 'scan_3', 'session_id': session_id, 'produce_name': 'Kiwi',
+             'shelf_life_days': 0, 'is_expiring_soon': True, 'is_expired': True}
+        ])
+
+        assert DatabaseService.refresh_scan_session_counts(session_id) is True
+
+        session = DatabaseService.get_scan_session(session_id)
+        db.session.refresh(session)
+        assert session.total_scanned == 3
+        assert session.expiring_soon_count == 2
+        assert session.expired_count == 1
+
+    def test_save_scan_batch_unknown_session_saves_nothing(self, app):
+        """Test that a batch for a missing session is rolled back"""
+        from backend.database import DatabaseService
+        from backend.models import ProduceScan
+
+        with pytest.raises(Exception, match='not found'):
+            DatabaseService.save_scan_batch(
+                [{'session_id': 'missing', 'produce_name': 'Apple', 'shelf_life_days': 7}],
+                'missing'
+            )
+
+        assert ProduceScan.query.count() == 0
+
+
+# Tables as created by the first release's models (before any upgrade step)
+BASELINE_SCHEMA = [
+    "CREATE TABLE role (id INTEGER NOT NULL, name VARCHAR(80) NOT NULL, "
+    "description VARCHAR(255), PRIMARY KEY (id), UNIQUE (name))",
+    "CREATE TABLE user (id INTEGER NOT NULL, email VARCHAR(255) NOT NULL, "
+    "username VARCHAR(255) NOT NULL, password VARCHAR(255) NOT NULL, "
+    "active BOOLEAN NOT NULL, fs_uniquifier VARCHAR(255) NOT NULL, "
+    "created_at DATETIME, last_login_at DATETIME, PRIMARY KEY (id), "
+    "UNIQUE (email), UNIQUE (username), UNIQUE (fs_uniquifier))",
+    "CREATE TABLE roles_users (user_id INTEGER, role_id INTEGER, "
+    "FOREIGN KEY(user_id) REFERENCES user (id), FOREIGN KEY(role_id) REFERENCES role (id))",
+    "CREATE TABLE scan_sessions (id INTEGER NOT NULL, session_id VARCHAR(50) NOT NULL, "
+    "user_id INTEGER, total_scanned INTEGER, expiring_soon_count INTEGER, "
+    "expired_count INTEGER, created_at DATETIME, PRIMARY KEY (id), "
+    "UNIQUE (session_id), FOREIGN KEY(user_id) REFERENCES user (id))",
+    "CREATE TABLE produce_scans (id INTEGER NOT NULL, scan_id VARCHAR(50) NOT NULL, "
+    "session_id VARCHAR(50), user_id INTEGER, produce_name VARCHAR(100) NOT NULL, "
+    "shelf_life_days INTEGER NOT NULL, is_expiring_soon BOOLEAN, is_expired BOOLEAN, "
+    "scanned_at DATETIME, notes TEXT, PRIMARY KEY (id), UNIQUE (scan_id), "
+    "FOREIGN KEY(session_id) REFERENCES scan_sessions (session_id), "
+    "FOREIGN KEY(user_id) REFERENCES user (id))",
+    "INSERT INTO user VALUES (1, 'old@example.com', 'olduser', 'password123', 1, "
+    "'uniq-1', '2024-01-01 10:00:00', NULL)",
+    "INSERT INTO role VALUES (1, 'user', 'Standard user')",
+    # The baseline junction table had no key: the same role held twice
+    "INSERT INTO roles_users VALUES (1, 1)",
+    "INSERT INTO roles_users VALUES (1, 1)",
+    "INSERT INTO scan_sessions VALUES (1, 'sess0001', 1, 3, 1, 1, '2024-01-02 10:00:00')",
+    "INSERT INTO produce_scans VALUES (1, 'scan-a', 'sess0001', 1, 'Apple', 7, 0, 0, "
+    "'2024-01-02 10:01:00', 'Fresh')",
+    "INSERT INTO produce_scans VALUES (2, 'scan-b', 'sess0001', 1, 'Banana', 2, 1, 0, "
+    "'2024-01-02 10:02:00', NULL)",
+    "INSERT INTO produce_scans VALUES (3, 'scan-c', 'sess0001', 1, 'Apple', 0, 1, 1, "
+    "'2024-01-02 10:03:00', NULL)",
+    "INSERT INTO produce_scans VALUES (4, 'scan-d', NULL, 1, 'Kiwi', 5, 0, 0, "
+    "'2024-01-03 10:00:00', NULL)",
+]
+
+
+class TestSchemaUpgrade:
+    """Tests for init-db upgrading a database created by the first release"""
+
+    @pytest.fixture
+    def baseline_db(self, app):
+        """Replace the test schema with the first release's tables and rows"""
+        db.drop_all()
+        with db.engine.begin() as conn:
+            for statement in BASELINE_SCHEMA:
+                conn.exec_driver_sql(statement)
+
+    def test_startup_check_refuses_baseline_schema(self, app, baseline_db):
+        """Test that the startup check asks for init-db on an old schema"""
+        from backend.schema import check_schema
+
+        with pytest.raises(RuntimeError, match='init-db'):
+            check_schema()
+
+    def test_init_db_upgrades_baseline_schema(self, app, baseline_db):
+        """Test that init-db upgrades the tables and keeps every row"""
+        from app import init_database
+        from backend.database import DatabaseService
+        from backend.models import ProduceScan, ScanSessionStats
+        from backend.schema import check_schema
+
+        init_database()
+        init_database()  # A second run finds nothing to do
+        check_schema()
+
+        # Produce names moved to the lookup table, scans keep theirs
+        scans = DatabaseService.get_session_scans('sess0001')
+        assert [s['produce_name'] for s in scans] == ['Apple', 'Banana', 'Apple']
+        assert scans[0]['notes'] == 'Fresh'
+
+        # The session-less scan was given a session of its own
+        kiwi = [s for s in DatabaseService.get_user_recent_scans(1) if s['produce_name'] == 'Kiwi']
+        assert kiwi and kiwi[0]['session_id'] is not None
+        assert DatabaseService.get_scan_session(kiwi[0]['session_id']).user_id == 1
+
+        # Session counters moved to scan_session_stats; unset ones are counted
+        session = DatabaseService.get_scan_session('sess0001')
+        assert (session.total_scanned, session.expiring_soon_count, session.expired_count) == (3, 1, 1)
+        assert DatabaseService.get_scan_session(kiwi[0]['session_id']).total_scanned == 1
+
+        # New scans insert into the upgraded table
+        DatabaseService.save_produce_scan(
+            {'session_id': 'sess0001', 'user_id': 1, 'produce_name': 'Kiwi', 'shelf_life_days': 4}
+        )
+        assert len(DatabaseService.get_session_scans('sess0001')) == 4
+
+        # cleanup-sessions' bulk delete cascades to the scans and stats
+        DatabaseService.delete_old_sessions(days=7)
+        assert db.session.scalar(db.select(db.func.count()).select_from(ProduceScan)) == 0
+        assert db.session.scalar(db.select(db.func.count()).select_from(ScanSessionStats)) == 0
+
+    def test_init_db_adds_roles_users_primary_key(self, app, baseline_db):
+        """Test that init-db drops duplicate role links and keys roles_users"""
+        from sqlalchemy import inspect
+        from app import init_database
+        from backend.models import roles_users
+        from backend.services.auth_service import AuthService
+
+        init_database()
+
+        pk = inspect(db.engine).get_pk_constraint('roles_users')
+        assert sorted(pk['constrained_columns']) == ['role_id', 'user_id']
+        assert db.session.execute(db.select(roles_users)).all() == [(1, 1)]
+
+        user = db.session.get(User, 1)
+        assert [role.name for role in user.roles] == ['user']
+        assert AuthService.assign_role(user, 'user') == (False, "User already has this role")
@@ -0,0 +1,17 @@
+"""
+WSGI entrypoint for production serving
+
+Gunicorn imports `app` from this module instead of running Flask's
+development server. Settings live in gunicorn.conf.py.
+
+Usage:
+    flask --app wsgi init-db          # once per deploy (creates/upgrades tables)
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Session cleanup is a cron job (one process, not one per worker):
+    0 * * * *  flask --app wsgi cleanup-sessions --days 7
+"""
+
+from app import create_app
+
+app = create_app('production')